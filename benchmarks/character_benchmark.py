@@ -0,0 +1,96 @@
+"""
+Compares the __slots__ Character and its dict codecs with the former __dict__ based character.
+
+python -m benchmarks.character_benchmark [--sizes 1000 10000 100000]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.ext.Campaign.Character import Character
+
+
+class DictCharacter:
+    """
+    The character layout used before Character got __slots__
+    """
+
+    def __init__(self, tag, name):
+        self.player: str = ""
+        self.name: str = name
+        self.tag: str = tag
+        self.damage_taken: int = 0
+        self.damage_resisted: int = 0
+        self.damage_caused: int = 0
+        self.damage_healed: int = 0
+        self.max_damage: int = 0
+        self.kills: int = 0
+        self.crits: int = 0
+        self.faints: int = 0
+        self.dodged: int = 0
+
+
+def load_dict_character(char_dic: dict) -> DictCharacter:
+    char = DictCharacter("debug", "debug")
+    for key, value in char_dic.items():
+        char.__dict__[key] = value
+    return char
+
+
+def save_dict_character(char: DictCharacter) -> dict:
+    return dict(char.__dict__)
+
+
+def build_roster_data(size: int) -> list[dict]:
+    roster = []
+    for index in range(size):
+        char = Character(f"char{index}", f"Character {index}")
+        char.set_player(str(100000000000000000 + index))
+        char.cause_dam(index % 97, index % 3)
+        char.take_dam(index % 13, index % 2 == 0)
+        char.rolled_crit(index % 5)
+        roster.append(char.to_dict())
+    return roster
+
+
+def measure(roster_data: list[dict], load, save) -> dict[str, float]:
+    started = time.perf_counter()
+    roster = [load(char_dic) for char_dic in roster_data]
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    json.dumps([save(char) for char in roster])
+    save_seconds = time.perf_counter() - started
+
+    del roster
+    tracemalloc.start()
+    roster = [load(char_dic) for char_dic in roster_data]
+    memory_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "load": len(roster) / load_seconds,
+        "save": len(roster) / save_seconds,
+        "bytes": memory_bytes / len(roster)
+    }
+
+
+def main(args: list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark character loading, saving and memory use")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="roster sizes")
+    parsed = parser.parse_args(args)
+
+    print(f"{'roster':>8} {'layout':>8} {'load chars/s':>14} {'save chars/s':>14} {'bytes/char':>11}")
+    for size in parsed.sizes:
+        roster_data = build_roster_data(size)
+        layouts = {
+            "__dict__": (load_dict_character, save_dict_character),
+            "slots": (Character.from_dict, Character.to_dict)
+        }
+        for layout, (load, save) in layouts.items():
+            result = measure(roster_data, load, save)
+            print(f"{size:>8} {layout:>8} {result['load']:>14,.0f} {result['save']:>14,.0f} {result['bytes']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
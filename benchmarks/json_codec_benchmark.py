@@ -0,0 +1,64 @@
+"""
+Measures the cost of encoding and decoding a campaign save with the stdlib json module and with orjson,
+in the indented and the compact file format.
+
+python -m benchmarks.json_codec_benchmark [--characters 10 100 1000] [--repeat 200]
+"""
+import argparse
+import time
+
+from src import json_codec
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager
+from .character_benchmark import build_roster_data
+
+
+def build_save(characters: int) -> dict:
+    save_dic = save_manager.create_fresh_save("100000000000000000")
+    save_dic[save_manager.players_tag] += [str(100000000000000000 + index) for index in range(characters)]
+    save_dic[save_manager.character_tag] = {char["tag"]: char for char in build_roster_data(characters)}
+    return save_dic
+
+
+def time_per_call(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def measure(save_dic: dict, compact: bool, repeat: int) -> (float, float, int):
+    encoded = json_codec.encode_file(save_dic, compact=compact)
+    encode_seconds = time_per_call(lambda: json_codec.encode_file(save_dic, compact=compact), repeat)
+    decode_seconds = time_per_call(lambda: json_codec.loads(encoded), repeat)
+    return encode_seconds, decode_seconds, len(encoded)
+
+
+def main(args: list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the json codec on campaign saves")
+    parser.add_argument("--characters", type=int, nargs="+", default=[10, 100, 1000], help="characters per save")
+    parser.add_argument("--repeat", type=int, default=200, help="encodes and decodes per measurement")
+    parsed = parser.parse_args(args)
+
+    orjson = json_codec.orjson
+    codecs = {"stdlib": None}
+    if orjson is not None:
+        codecs["orjson"] = orjson
+    else:
+        print("orjson is not installed, only the stdlib json module is measured")
+
+    print(f"{'chars':>6} {'codec':>7} {'format':>8} {'encode µs':>10} {'decode µs':>10} {'bytes':>9}")
+    try:
+        for characters in parsed.characters:
+            save_dic = build_save(characters)
+            for codec_name, module in codecs.items():
+                json_codec.orjson = module
+                for compact in [False, True]:
+                    encode_seconds, decode_seconds, size = measure(save_dic, compact, parsed.repeat)
+                    print(f"{characters:>6} {codec_name:>7} {'compact' if compact else 'indented':>8} "
+                          f"{encode_seconds * 1e6:>10.1f} {decode_seconds * 1e6:>10.1f} {size:>9}")
+    finally:
+        json_codec.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares multistep undo and redo, saving after every step as before, with a single UndoTransaction per command.
+Runs without an event loop, so every marked save is written to the hard drive right away. The saves, undo logs and
+lock files of the benchmark are kept in a temporary saves folder, which is removed afterwards.
+
+python -m benchmarks.undo_benchmark [--characters 10 100] [--steps 10] [--repeat 20]
+"""
+import argparse
+import tempfile
+import time
+
+from src.ext.Campaign import Undo, base_command_logic, packg_variables as packg_vars
+from src.ext.Campaign.Character import Character
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, undo_log
+
+benchmark_user = "100000000000000000"
+benchmark_save_name = "undo_benchmark"
+
+
+def legacy_apply_steps(executing_user: str, step_function, amount: int):
+    for _ in range(amount):
+        keep_going, _text = step_function(executing_user)
+        live_manager.save_user_file(executing_user)
+        if not keep_going:
+            return
+
+
+def transaction_apply_steps(executing_user: str, step_function, amount: int):
+    Undo.apply_steps(executing_user, step_function, amount)
+
+
+def setup_save(characters: int, steps: int):
+    live_manager.unload_all_files_and_users()
+    Undo.purge_undo_history()
+    live_manager.create_new_save(benchmark_user, benchmark_save_name)
+    for index in range(characters):
+        live_manager.get_loaded_chars(benchmark_user)[f"char{index}"] = Character(f"char{index}", f"Character {index}")
+    live_manager.save_user_file(benchmark_user)
+    for index in range(steps):
+        base_command_logic.crit(benchmark_user, f"char{index % characters}")
+
+
+def measure(apply_steps, steps: int, repeat: int) -> (float, float):
+    writes = 0
+    original_write = save_manager.write_save_output
+
+    def counting_write(_save_name: str, output: dict):
+        nonlocal writes
+        writes += 1
+        original_write(_save_name, output)
+
+    save_manager.write_save_output = counting_write
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            apply_steps(benchmark_user, Undo.undo, steps)
+            apply_steps(benchmark_user, Undo.redo, steps)
+        seconds = time.perf_counter() - started
+    finally:
+        save_manager.write_save_output = original_write
+    commands = repeat * 2
+    return seconds / commands, writes / commands
+
+
+def main(args: list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark saving during multistep undo and redo")
+    parser.add_argument("--characters", type=int, nargs="+", default=[10, 100], help="characters per save")
+    parser.add_argument("--steps", type=int, default=10, help="undo and redo steps per command")
+    parser.add_argument("--repeat", type=int, default=20, help="undo and redo commands per measurement")
+    parsed = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as save_folder:
+        packg_vars.save_folder_override = save_folder
+        save_manager.setup_save_folders()
+        print(f"{'chars':>6} {'mode':>12} {'ms/command':>11} {'writes/command':>15}")
+        try:
+            for characters in parsed.characters:
+                for mode, apply_steps in (("per step", legacy_apply_steps), ("transaction", transaction_apply_steps)):
+                    setup_save(characters, parsed.steps)
+                    seconds, writes = measure(apply_steps, parsed.steps, parsed.repeat)
+                    print(f"{characters:>6} {mode:>12} {seconds * 1000:>11.2f} {writes:>15.1f}")
+        finally:
+            live_manager.unload_all_files_and_users()
+            Undo.reset_undo()
+            undo_log.wait_for_writes()
+            packg_vars.save_folder_override = None
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
+import abc
+import copy
 import os
-import json
+import sqlite3
+import threading
 from json import JSONDecodeError
 from os.path import exists
 import pathlib
 import logging
+from typing import Optional
+
+from . import json_codec
 
 clocks_rel_save_path = os.sep.join(['..', 'saves', 'clock_saves'])
 clock_save_suffix = '_clsave.json'
+user_save_database_name = 'user_saves.sqlite3'
 
 logger = logging.getLogger('bot')
 
@@ -15,45 +22,190 @@ version_tag = "v"
 kanka_data_tag = "kanka"
 
 
-def get_user_save_filepath(user_id: str) -> str:
-    global clocks_rel_save_path, clock_save_suffix
+def get_user_save_folder_path() -> str:
     this_file_folder_path = pathlib.Path(__file__).parent.resolve()
-    return os.path.join(this_file_folder_path, os.sep.join([clocks_rel_save_path, user_id + clock_save_suffix]))
+    return os.path.normpath(os.path.join(this_file_folder_path, clocks_rel_save_path))
+
+
+def get_user_save_filepath(user_id: str) -> str:
+    return os.path.join(get_user_save_folder_path(), user_id + clock_save_suffix)
+
+
+class UserSaveBackend(abc.ABC):
+    """
+    Storage of the user settings. Every user has one dict, which the backend stores as a whole.
+    """
+
+    @abc.abstractmethod
+    def load(self, user_id: str) -> Optional[dict]:
+        """
+        :param user_id: the discord id of the user
+        :return: the stored dict of the user or None if nothing is stored
+        """
+        pass
+
+    @abc.abstractmethod
+    def save(self, user_id: str, user_dict: dict):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, user_id: str):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonUserSaveBackend(UserSaveBackend):
+    """
+    Stores every user in their own JSON file
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self._folder_created = False
+
+    def get_filepath(self, user_id: str) -> str:
+        return os.path.join(self.folder_path, user_id + clock_save_suffix)
+
+    def load(self, user_id: str) -> Optional[dict]:
+        file_path = self.get_filepath(user_id)
+        if not exists(file_path):
+            return None
+        try:
+            return json_codec.read_file(file_path)
+        except JSONDecodeError as e:
+            logger.error(str(e))
+            logger.error(f"user_id: {user_id}")
+            raise Exception("An error has occured trying to parse JSON clock file")
+
+    def save(self, user_id: str, user_dict: dict):
+        if not self._folder_created:
+            if not exists(self.folder_path):
+                os.makedirs(self.folder_path)
+                logger.info("created user save folder")
+            self._folder_created = True
+        json_codec.write_file(self.get_filepath(user_id), user_dict)
+
+    def delete(self, user_id: str):
+        file_path = self.get_filepath(user_id)
+        if exists(file_path):
+            os.remove(file_path)
+
+
+class SqliteUserSaveBackend(UserSaveBackend):
+    """
+    Stores all users as JSON rows of a single SQLite database
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            folder_path = os.path.dirname(self.database_path)
+            if folder_path != "" and not exists(folder_path):
+                os.makedirs(folder_path)
+            self._connection = sqlite3.connect(self.database_path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS user_saves (user_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._connection.commit()
+        return self._connection
+
+    def load(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._get_connection().execute("SELECT data FROM user_saves WHERE user_id = ?", (user_id,)).fetchone()
+        return None if row is None else json_codec.loads(row[0])
+
+    def save(self, user_id: str, user_dict: dict):
+        data = json_codec.dumps(user_dict, sort_keys=True)
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("INSERT OR REPLACE INTO user_saves (user_id, data) VALUES (?, ?)", (user_id, data))
+            connection.commit()
+
+    def delete(self, user_id: str):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM user_saves WHERE user_id = ?", (user_id,))
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_backend: Optional[UserSaveBackend] = None
+# user_id -> the current dict of the user, users without a save are cached as well
+_user_cache: dict[str, dict] = {}
+
+
+def create_user_save_backend() -> UserSaveBackend:
+    """
+    Creates the backend chosen by USER_SAVE_BACKEND in the environment, "json" (default) or "sqlite"
+    """
+    backend_name = os.environ.get("USER_SAVE_BACKEND", "json").lower()
+    if backend_name == "sqlite":
+        return SqliteUserSaveBackend(os.path.join(get_user_save_folder_path(), user_save_database_name))
+    if backend_name != "json":
+        logger.warning(f"unknown USER_SAVE_BACKEND {backend_name}, using json files")
+    return JsonUserSaveBackend(get_user_save_folder_path())
+
+
+def get_user_save_backend() -> UserSaveBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_user_save_backend()
+    return _backend
+
+
+def set_user_save_backend(backend: Optional[UserSaveBackend]):
+    """
+    Replaces the storage of the user settings and empties the cache. None restores the configured backend on next use.
+    """
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
+    _user_cache.clear()
 
 
 def load_user_dict(user_id: str) -> dict:
-    if exists(get_user_save_filepath(user_id)):
-        with open(get_user_save_filepath(user_id)) as file:
-            try:
-                imported_dic = json.load(file)
-            except JSONDecodeError as e:
-                logger.error(str(e))
-                logger.error(f"user_id: {user_id}")
-                raise Exception("An error has occured trying to parse JSON clock file")
-        if version_tag in imported_dic:
-            return imported_dic
-        else:
-            updated_dict = {clocks_dict_tag: imported_dic, version_tag: 1.0}
-            save_user_dict(user_id, updated_dict)
-            return updated_dict
-    else:
+    """
+    Gets the settings of a user. Only the first call per user reads from the backend.
+
+    :param user_id: the discord id of the user
+    :return: a copy of the user dict, changes are kept once it is passed to save_user_dict
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    imported_dic = get_user_save_backend().load(user_id)
+    if imported_dic is None:
         logger.info(f"Clock savefile doesn't exist, will create new savefile. User ID={user_id}")
-        return {clocks_dict_tag: {}, version_tag: 1.0}
+        user_dict = {clocks_dict_tag: {}, version_tag: 1.0}
+    elif version_tag in imported_dic:
+        user_dict = imported_dic
+    else:
+        user_dict = {clocks_dict_tag: imported_dic, version_tag: 1.0}
+        save_user_dict(user_id, user_dict)
+    _user_cache[user_id] = copy.deepcopy(user_dict)
+    return user_dict
 
 
 def save_user_dict(user_id: str, user_dict: dict):
+    """
+    Stores the settings of a user in the cache and writes them through to the backend.
+    Users without clocks and kanka data are deleted from the backend.
+    """
     if len(user_dict) == 0 or (len(user_dict[clocks_dict_tag]) == 0 and kanka_data_tag not in user_dict):
-        if exists(get_user_save_filepath(user_id)):
-            os.remove(get_user_save_filepath(user_id))
+        get_user_save_backend().delete(user_id)
+        _user_cache[user_id] = {clocks_dict_tag: {}, version_tag: 1.0}
         return
 
-    if not exists(get_user_save_filepath(user_id)):
-        path = ""
-        for path_part in get_user_save_filepath(user_id).split(os.sep):
-            path += path_part + os.sep
-            if not exists(path) and ".json" not in path:
-                os.mkdir(path)
-        logger.info("created savefile")
-    with open(get_user_save_filepath(user_id), 'w') as newfile:
-        json.dump(user_dict, newfile, sort_keys=True, indent=4)
-
+    get_user_save_backend().save(user_id, user_dict)
+    _user_cache[user_id] = copy.deepcopy(user_dict)
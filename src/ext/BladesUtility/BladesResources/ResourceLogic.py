@@ -1,17 +1,24 @@
 import logging
-import os
 
-from discord import Embed, PartialEmoji, ButtonStyle as Bstyle, Interaction, File, SelectOption
+from discord import Embed, PartialEmoji, ButtonStyle as Bstyle, Interaction, SelectOption
 from discord.ui import View, button, Button, Select
 
-from .ResourceSpriteBuilding import build_stress_track_image, delete_merged_image
+from .ResourceSpriteBuilding import build_stress_track_image
 from .ResourceTracker import ResourceTracker
+from ..ImageEncoding import create_png_file, merged_image_name
+from ..RenderCache import RenderCache
 from ....ContextInfo import ContextInfo
 from ....command_helper_functions import edit_interaction_message
 
 
 logger = logging.getLogger('bot')
 
+STRESS_TRACK_CACHE_SIZE = 512
+# stress tracks up to this length are rendered when the extension is loaded
+STRESS_TRACK_PRECOMPUTE_MAX = 12
+
+stress_track_cache = RenderCache("stress track", STRESS_TRACK_CACHE_SIZE)
+
 
 def create_resource_tracker_from_fields(embed: Embed):
     clean_desc = embed.description.replace("*", "").replace("_", "").split(":")[1].strip()
@@ -19,20 +26,38 @@ def create_resource_tracker_from_fields(embed: Embed):
     return ResourceTracker(int(resource_info[0]), int(resource_info[1]))
 
 
-def get_stress_tracker_embed(stress_tracker: ResourceTracker):
-    file_path = build_stress_track_image(stress_tracker)
+def precompute_stress_tracks(max_resource: int = STRESS_TRACK_PRECOMPUTE_MAX):
+    """
+    Renders every stress track up to a length into the stress track cache
+
+    :param max_resource: the longest stress track that is rendered
+    """
+    for max_value in range(max_resource + 1):
+        for value in range(max_value + 1):
+            stress_track_cache.get_or_render(
+                (value, max_value), lambda: build_stress_track_image(ResourceTracker(value, max_value)))
+    logger.debug(f"precomputed {stress_track_cache.get_stats()['entries']} stress tracks")
+
+
+async def get_stress_track_png(stress_tracker: ResourceTracker) -> bytes:
+    # the render works on a copy, so later changes to the tracker cannot end up in the cached image
+    tracker_copy = ResourceTracker(stress_tracker.value, stress_tracker.max_resource)
+    return await stress_track_cache.get_or_render_async(
+        (tracker_copy.value, tracker_copy.max_resource), build_stress_track_image, tracker_copy)
+
+
+async def get_stress_tracker_embed(stress_tracker: ResourceTracker):
+    png = await get_stress_track_png(stress_tracker)
 
     embed = Embed(title=f'Stress Track')
     embed.description = f'Stress: {stress_tracker.value}/{stress_tracker.max_resource}'
-    embed.set_image(url='attachment://merged.png')
-    return embed, file_path
+    embed.set_image(url=f'attachment://{merged_image_name}')
+    return embed, png
 
 
 async def send_stress_tracker(ctx: ContextInfo, stress_tracker: ResourceTracker):
-    embed, file_path = get_stress_tracker_embed(stress_tracker)
-    file = File(file_path)
-    await ctx.respond(embed=embed, file=file, view=ResourceView(stress_tracker))
-    os.remove(file_path)
+    embed, png = await get_stress_tracker_embed(stress_tracker)
+    await ctx.respond(embed=embed, file=create_png_file(png), view=ResourceView(stress_tracker))
 
 
 class ResourceView(View):
@@ -58,7 +83,7 @@ class ResourceView(View):
     async def set_stress(self, _: Button, interaction: Interaction):
 
         self.update_resource_data(interaction)
-        embed, file_path = get_stress_tracker_embed(self.resource_tracker)
+        embed, png = await get_stress_tracker_embed(self.resource_tracker)
         view = ResourceView(resource_tracker=self.resource_tracker)
         options = []
         for val in range(self.resource_tracker.max_resource+1):
@@ -74,17 +99,16 @@ class ResourceView(View):
         async def selection_made(interaction: Interaction):
             self.update_resource_data(interaction)
             self.resource_tracker.set_value(int(stress_select.values[0]))
-            embed, file_path = get_stress_tracker_embed(self.resource_tracker)
+            embed, png = await get_stress_tracker_embed(self.resource_tracker)
             new_view = ResourceView(resource_tracker=self.resource_tracker)
             await edit_interaction_message(
                 interaction,
                 {
                     "embed": embed,
                     "view": new_view,
-                    "file": File(file_path)
+                    "file": create_png_file(png)
                 }
             )
-            delete_merged_image()
             self.stop()
 
         stress_select.callback = selection_made
@@ -94,10 +118,9 @@ class ResourceView(View):
             {
                 "embed": embed,
                 "view": view,
-                "file": File(file_path)
+                "file": create_png_file(png)
             }
         )
-        delete_merged_image()
         self.stop()
 
     @button(label="reduce max", style=Bstyle.gray, row=1, emoji=PartialEmoji.from_str("◀"), custom_id="reduce_max")
@@ -112,29 +135,27 @@ class ResourceView(View):
     async def change_value(self, increase: bool, interaction: Interaction):
         self.update_resource_data(interaction)
         self.resource_tracker.set_value(self.resource_tracker.value + (1 if increase else -1))
-        embed, file_path = get_stress_tracker_embed(self.resource_tracker)
+        embed, png = await get_stress_tracker_embed(self.resource_tracker)
         await edit_interaction_message(
             interaction,
             {
                 "embed": embed,
                 "view": ResourceView(resource_tracker=self.resource_tracker),
-                "file": File(file_path)
+                "file": create_png_file(png)
             }
         )
-        delete_merged_image()
         self.stop()
 
     async def change_max(self, increase: bool, interaction: Interaction):
         self.update_resource_data(interaction)
         self.resource_tracker.set_max_value(self.resource_tracker.max_resource + (1 if increase else -1))
-        embed, file_path = get_stress_tracker_embed(self.resource_tracker)
+        embed, png = await get_stress_tracker_embed(self.resource_tracker)
         await edit_interaction_message(
             interaction,
             {
                 "embed": embed,
                 "view": ResourceView(resource_tracker=self.resource_tracker),
-                "file": File(file_path)
+                "file": create_png_file(png)
             }
         )
-        delete_merged_image()
         self.stop()
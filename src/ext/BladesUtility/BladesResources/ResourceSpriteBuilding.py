@@ -1,21 +1,38 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
 from PIL.Image import open as image_open, Image, new as create_new_image, Resampling
-from discord import File
 
 from .ResourceTracker import ResourceTracker
+from ..ImageEncoding import encode_png
 
 logger = logging.getLogger('bot')
 
 in_between_sprite_size = [5, 16]
 stress_bar_sprite_size = [16, 32]
 
+# bar, filled bar and in between sprite, cropped once by load_stress_bar_sprites
+_stress_bar_sprites: Optional[tuple[Image, Image, Image]] = None
 
-def fill_end_image(spritesheet: Image, end_image: Image, stress_tracker: ResourceTracker):
+
+def load_stress_bar_sprites():
+    global _stress_bar_sprites
+    with image_open(get_blade_dice_spritesheet_filepath()) as sheet_file:
+        spritesheet = sheet_file.convert('RGBA')
+    _stress_bar_sprites = get_sprites_from_spritesheet(spritesheet)
+
+
+def get_stress_bar_sprites() -> tuple[Image, Image, Image]:
+    if _stress_bar_sprites is None:
+        load_stress_bar_sprites()
+    return _stress_bar_sprites
+
+
+def fill_end_image(end_image: Image, stress_tracker: ResourceTracker):
     global in_between_sprite_size, stress_bar_sprite_size
-    bar_sprite, filled_sprite, in_between_sprite = get_sprites_from_spritesheet(spritesheet)
+    bar_sprite, filled_sprite, in_between_sprite = get_stress_bar_sprites()
 
     def calc_start(index: int):
         return 2 + stress_bar_sprite_size[0] * index + index * 3
@@ -54,20 +71,14 @@ def get_asset_folder_filepath() -> str:
     return os.path.join(this_file_folder_path, os.sep.join(["Assets", ""]))
 
 
-def get_merged_filepath() -> str:
-    return get_asset_folder_filepath() + "merged.png"
-
+def build_stress_track_image(stress_tracker: ResourceTracker) -> bytes:
+    """
+    Renders a stress track
 
-def build_stress_track_image(stress_tracker: ResourceTracker) -> str:
-    spritesheet = image_open(get_blade_dice_spritesheet_filepath()).convert('RGBA')
+    :param stress_tracker: the tracker holding the current and max stress
+    :return: the png encoded image
+    """
     new_image = generate_end_image(stress_tracker.max_resource)
-    fill_end_image(spritesheet, new_image, stress_tracker)
-    merged_file_path = get_merged_filepath()
-
-    new_image.resize((new_image.size[0] * 2, new_image.size[1] * 2), resample=Resampling.NEAREST).save(
-        merged_file_path, "PNG")
-    return merged_file_path
-
+    fill_end_image(new_image, stress_tracker)
 
-def delete_merged_image():
-    os.remove(get_merged_filepath())
+    return encode_png(new_image.resize((new_image.size[0] * 2, new_image.size[1] * 2), resample=Resampling.NEAREST))
@@ -1,21 +1,39 @@
 import logging
 from discord import slash_command, ApplicationContext
 from discord.commands import option
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from .BladesCommandException import BladesCommandException
 from .DevilsAndEntanglements.DevilsBargainDeck import db_functionality, check_devils_bargain_assets
 from .DevilsAndEntanglements.EntanglementFunctions import entanglement_functionality, check_entanglement_assets, \
     entanglement_wanted_functionality
-from .Dice import blades_roll_command
+from .Dice import blades_roll_command, start_roll_cache_warm_up, get_roll_cache_stats
+from .DiceAtlas import load_dice_atlas
+from .RenderExecutor import get_render_stats, shutdown_render_executor
 from .Wiki.ItemWiki import setup_wiki, wiki_search
 from ...ContextInfo import init_context
 
 logger = logging.getLogger('bot')
+STATS_LOG_INTERVAL_MINUTES = 60
 
 
 class BladesUtilityCog(commands.Cog):
 
+    def cog_unload(self):
+        self.log_render_stats.cancel()
+        # the event loop is not blocked by the remaining renders
+        shutdown_render_executor(wait=False)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self.log_render_stats.is_running():
+            self.log_render_stats.start()
+
+    @tasks.loop(minutes=STATS_LOG_INTERVAL_MINUTES, reconnect=False)
+    async def log_render_stats(self):
+        logger.info(f"roll image caches: {get_roll_cache_stats()}")
+        logger.info(f"render pool: {get_render_stats()}")
+
     @slash_command(name="devils_bargain", description="Returns one or more random devils bargain cards. Default: 1 card")
     async def devils_bargain(self, ctx: ApplicationContext, nr: int = 1):
         try:
@@ -62,6 +80,8 @@ def setup(bot: commands.Bot):
     check_entanglement_assets()
     check_devils_bargain_assets()
     setup_wiki()
+    load_dice_atlas()
+    start_roll_cache_warm_up()
     bot.add_cog(BladesUtilityCog())
 
 
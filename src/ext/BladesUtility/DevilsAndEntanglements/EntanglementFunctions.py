@@ -1,4 +1,3 @@
-import json
 import os
 import pathlib
 import logging
@@ -6,6 +5,7 @@ from os.path import exists
 
 from discord import Embed, ApplicationContext
 
+from .... import json_codec
 from ..Dice import get_blades_roll_sorted
 from .Entanglement_table import entanglement_sorting_table
 
@@ -67,8 +67,7 @@ def check_entanglement_assets():
         return
 
     entanglements_enabled = True
-    with open(expanded_entanglement_path)as file:
-        imported_expanded_entanglements = json.load(file)
+    imported_expanded_entanglements = json_codec.read_file(expanded_entanglement_path)
     logger.debug("looking for entanglements")
     for column in entanglement_sorting_table:
         for roll in column:
@@ -1,48 +1,76 @@
+import itertools
 import logging
 import os
-from PIL.Image import open as image_open, Image, new as create_new_image
+import threading
+from PIL.Image import Image, new as create_new_image
 import random
-import pathlib
 
-from discord import File, Embed, ApplicationContext
+from discord import Embed, ApplicationContext
 
 from .BladesCommandException import BladesCommandException
+from .DiceAtlas import get_blades_face, get_sided_die_base, get_die_nr_image, \
+    get_success_tag_sprite, blades_dice_sprite_size, sided_die_sprite_size
+from .ImageEncoding import create_png_file, encode_png, merged_image_name, success_image_name
+from .RenderCache import RenderCache
+from .RenderExecutor import run_render
 
 logger = logging.getLogger('bot')
-asset_folder_rel_path = os.sep.join(["Assets", ""])
 
-blades_dice_sprite_size = 64
-sided_die_sprite_size = 64
-nr_size = (17, 26)
-nrs_index_within_spritesheet = 7  # where are the numbers in relation to the sprite columns
+BLADES_ROLL_CACHE_SIZE = 4096
+SIZED_ROLL_CACHE_SIZE = 1024
+# sorted blades outcomes up to this many dice are rendered ahead of time if ROLL_CACHE_WARMUP=1
+ROLL_CACHE_WARMUP_MAX_DICE = 6
 
-
-def get_asset_folder_filepath():
-    this_file_folder_path = pathlib.Path(__file__).parent.resolve()
-    return os.path.join(this_file_folder_path, asset_folder_rel_path)
+blades_roll_cache = RenderCache("blades roll", BLADES_ROLL_CACHE_SIZE)
+sized_roll_cache = RenderCache("sorted roll", SIZED_ROLL_CACHE_SIZE)
 
 
 async def blades_roll_command(ctx: ApplicationContext, dice_amount: int, sorted_dice=False):
     erg, rolled_array = get_blades_roll_sorted(dice_amount) if sorted_dice else get_blades_roll(dice_amount)
-    spritesheet = image_open(get_blade_dice_spritesheet_filepath()).convert('RGBA')
-    dice_sprite_size = get_blades_sprite_size()
-    new_image = generate_end_image(dice_amount if dice_amount > 0 else 2, dice_sprite_size, 100, True)
-    interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, spritesheet, sorted_dice=sorted_dice)
-    success_file_path = get_asset_folder_filepath() + "success.png"
-    merged_file_path = get_asset_folder_filepath() + "merged.png"
-
-    get_success_tag_sprite(erg).save(success_file_path, "PNG")
-    new_image.save(merged_file_path, "PNG")
+    success_file = create_png_file(await get_success_tag_png(erg), success_image_name)
+    merged_file = create_png_file(await get_blades_roll_png(erg, rolled_array, sorted_dice), merged_image_name)
 
     embed = Embed(title=f'Rolled {dice_amount} dice')
-    embed.set_image(url='attachment://merged.png')
-    embed.set_thumbnail(url='attachment://success.png')
-    await ctx.respond(embed=embed, files=[File(success_file_path), File(merged_file_path)])
-    os.remove(success_file_path)
-    os.remove(merged_file_path)
+    embed.set_image(url=f'attachment://{merged_image_name}')
+    embed.set_thumbnail(url=f'attachment://{success_image_name}')
+    await ctx.respond(embed=embed, files=[success_file, merged_file])
+
+
+def get_blades_roll_key(erg: int, rolled_array: list[int], sorted_dice: bool) -> tuple:
+    """
+    Builds the render cache key of a blades roll, the image only depends on the dice faces and
+    whether the roll was a crit
+
+    :param erg: the result of the roll
+    :param rolled_array: the rolled array returned by get_blades_roll or get_blades_roll_sorted
+    :param sorted_dice: True if rolled_array holds the amount each face was rolled
+    :return: the cache key
+    """
+    return "blades", sorted_dice, erg == 2, tuple(rolled_array)
 
 
-def interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, spritesheet, sorted_dice=False):
+async def get_blades_roll_png(erg: int, rolled_array: list[int], sorted_dice: bool) -> bytes:
+    return await blades_roll_cache.get_or_render_async(
+        get_blades_roll_key(erg, rolled_array, sorted_dice), render_blades_roll, erg, rolled_array, sorted_dice)
+
+
+async def get_success_tag_png(erg: int) -> bytes:
+    return await blades_roll_cache.get_or_render_async(("tag", erg), render_success_tag, erg)
+
+
+def render_success_tag(erg: int) -> bytes:
+    return encode_png(get_success_tag_sprite(erg))
+
+
+def render_blades_roll(erg: int, rolled_array: list[int], sorted_dice: bool) -> bytes:
+    dice_sprite_size = get_blades_sprite_size()
+    dice_amount = sum(rolled_array) if sorted_dice else len(rolled_array)
+    new_image = generate_end_image(dice_amount, dice_sprite_size, 100, True)
+    interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, sorted_dice=sorted_dice)
+    return encode_png(new_image)
+
+
+def interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, sorted_dice=False):
     if sorted_dice:
         # Read the two images
         all_rolls_index = 0
@@ -50,7 +78,7 @@ def interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, spritesh
             nr_rolled = 6 - array_index
             if nr_rolled == 6 and erg == 2:
                 nr_rolled = 7
-            nr_image = get_sprite_from_uniform_spritesheet(spritesheet, dice_sprite_size, nr_rolled - 1)
+            nr_image = get_blades_face(nr_rolled - 1)
             for _ in range(amount_rolled):
                 new_image.paste(nr_image, (dice_sprite_size * all_rolls_index, 0), nr_image)
                 all_rolls_index += 1
@@ -58,13 +86,12 @@ def interpret_roll_info(dice_sprite_size, erg, new_image, rolled_array, spritesh
         for array_index, nr_rolled in enumerate(rolled_array):
             if nr_rolled == 6 and erg == 2:
                 nr_rolled = 7
-            nr_image = get_sprite_from_uniform_spritesheet(spritesheet, dice_sprite_size, nr_rolled - 1)
+            nr_image = get_blades_face(nr_rolled - 1)
             new_image.paste(nr_image, (dice_sprite_size * array_index, 0), nr_image)
 
 
 async def all_size_roll_sorted(ctx: ApplicationContext, dice_amount: int, dice_type: int):
     rolled_array = get_roll_sorted(dice_amount, dice_type)
-    merged_file_path = get_asset_folder_filepath() + "merged.png"
 
     sum_val = 0
     nr_attachment = "Numbers rolled:\n"
@@ -74,59 +101,97 @@ async def all_size_roll_sorted(ctx: ApplicationContext, dice_amount: int, dice_t
             sum_val += (indx + 1) * val
     embed = Embed(title=f"**{dice_amount}d{dice_type}= {sum_val}**")
     if dice_amount <= 10 and dice_type <= 100:
-        # generate image
-        max_columns = 5
-        spritesheet = image_open(get_sized_dice_spritesheet_filepath()).convert('RGBA')
-        base_sprite_indx = get_base_sprite_indx(dice_type)
-        die_size = get_sided_die_sprite_size()
-        base_image = get_sprite_from_uniform_spritesheet(spritesheet, die_size, base_sprite_indx)
-        end_image = generate_end_image(dice_amount, die_size, max_columns, True)
-        # Combine image with numbers and paste onto the result
-        index = 0
-        for nr_rolled, amount_rolled in enumerate(rolled_array):
-            for _ in range(amount_rolled):
-                paste_nr_image(spritesheet, end_image, base_image, index, max_columns, nr_rolled)
-                index += 1
-        end_image.save(merged_file_path, "PNG")
-        image_file = File(merged_file_path)
+        image_file = create_png_file(await get_sorted_roll_png(dice_type, rolled_array))
         embed.set_image(url=f"attachment://{image_file.filename}")
         await ctx.respond(file=image_file, embed=embed)
-        os.remove(merged_file_path)
     else:
         embed.description = nr_attachment
         await ctx.respond(embed=embed)
 
 
+async def get_sorted_roll_png(dice_type: int, rolled_array: list[int]) -> bytes:
+    """
+    Gets the image of a sorted roll from the render cache
+
+    :param dice_type: the size of the rolled dice
+    :param rolled_array: the amount each number was rolled, as returned by get_roll_sorted
+    :return: the png encoded image
+    """
+    rolled_counts = tuple((nr_rolled, amount) for nr_rolled, amount in enumerate(rolled_array) if amount > 0)
+    key = (get_base_sprite_indx(dice_type), rolled_counts)
+    return await sized_roll_cache.get_or_render_async(key, render_sorted_roll, dice_type, rolled_counts)
+
+
+def render_sorted_roll(dice_type: int, rolled_counts: tuple[tuple[int, int], ...]) -> bytes:
+    rolled_indices = [nr_rolled for nr_rolled, amount_rolled in rolled_counts for _ in range(amount_rolled)]
+    return render_sized_roll(dice_type, rolled_indices)
+
+
+def render_sized_roll(dice_type: int, rolled_indices: list[int]) -> bytes:
+    """
+    Renders a row of sized dice
+
+    :param dice_type: the size of the rolled dice
+    :param rolled_indices: the rolled numbers - 1 in the order they are shown
+    :return: the png encoded image
+    """
+    max_columns = 5
+    die_size = get_sided_die_sprite_size()
+    base_image = get_sided_die_base(get_base_sprite_indx(dice_type))
+    end_image = generate_end_image(len(rolled_indices), die_size, max_columns, True)
+    # Combine image with numbers and paste onto the result
+    for index, nr_rolled_index in enumerate(rolled_indices):
+        paste_nr_image(end_image, base_image, index, max_columns, nr_rolled_index)
+    return encode_png(end_image)
+
+
+def warm_up_roll_caches(max_dice: int = ROLL_CACHE_WARMUP_MAX_DICE):
+    """
+    Renders every success tag and every sorted blades roll of up to max_dice dice into the render cache
+
+    :param max_dice: the largest dice amount that is rendered
+    """
+    for erg in range(-1, 3):
+        blades_roll_cache.get_or_render(("tag", erg), lambda: render_success_tag(erg))
+    for dice_amount in range(max_dice + 1):
+        rolled = dice_amount if dice_amount > 0 else 2
+        for faces in itertools.combinations_with_replacement(range(6), rolled):
+            rolled_array = [faces.count(face) for face in range(6)]
+            erg = 2 if dice_amount > 0 and rolled_array[0] > 1 else 1
+            blades_roll_cache.get_or_render(get_blades_roll_key(erg, rolled_array, True),
+                                            lambda: render_blades_roll(erg, rolled_array, True))
+    logger.info(f"roll cache warmed up with {blades_roll_cache.get_stats()['entries']} images")
+
+
+def start_roll_cache_warm_up():
+    if os.environ.get("ROLL_CACHE_WARMUP") == "1":
+        threading.Thread(target=warm_up_roll_caches, name="roll_cache_warm_up", daemon=True).start()
+
+
+def get_roll_cache_stats() -> dict[str, dict[str, float]]:
+    return {cache.name: cache.get_stats() for cache in [blades_roll_cache, sized_roll_cache]}
+
+
 async def all_size_roll(ctx: ApplicationContext, dice_amount: int, dice_type: int):
     if dice_amount > 100 or dice_amount < 1:
         raise BladesCommandException("cannot roll more than 100 dice or less than 1")
     if dice_type < 0:
         raise BladesCommandException("Please input a positive number for dice size")
-    merged_file_path = get_asset_folder_filepath() + "merged.png"
 
     sum_val = 0
     nr_attachment = "Numbers rolled:\n"
     if dice_amount <= 10 and dice_type <= 100:
-        # generate image
-        max_columns = 5
-        spritesheet = image_open(get_sized_dice_spritesheet_filepath()).convert('RGBA')
-        base_sprite_indx = get_base_sprite_indx(dice_type)
-        die_size = get_sided_die_sprite_size()
-        base_image = get_sprite_from_uniform_spritesheet(spritesheet, die_size, base_sprite_indx)
-        end_image = generate_end_image(dice_amount, die_size, max_columns, True)
-        # Combine image with numbers and paste onto the result
+        rolled_indices = []
         for indx in range(dice_amount):
             val = random.randint(1, dice_type)
             nr_attachment += f"{val} + " if indx < dice_amount - 1 else f"{val}"
             sum_val += val
-            paste_nr_image(spritesheet, end_image, base_image, indx, max_columns, val-1)
+            rolled_indices.append(val - 1)
 
         embed = Embed(title=f"**{dice_amount}d{dice_type}= {sum_val}**")
-        end_image.save(merged_file_path, "PNG")
-        image_file = File(merged_file_path)
+        image_file = create_png_file(await run_render("sized roll", render_sized_roll, dice_type, rolled_indices))
         embed.set_image(url=f"attachment://{image_file.filename}")
         await ctx.respond(file=image_file, embed=embed)
-        os.remove(merged_file_path)
     else:
         for indx in range(dice_amount):
             val = random.randint(1, dice_type)
@@ -137,27 +202,26 @@ async def all_size_roll(ctx: ApplicationContext, dice_amount: int, dice_type: in
         await ctx.respond(embed=embed)
 
 
-def paste_nr_image(spritesheet: Image, end_image: Image, base_image: Image, index: int, max_columns: int,
-                   nr_rolled_index: int):
+def paste_nr_image(end_image: Image, base_image: Image, index: int, max_columns: int, nr_rolled_index: int):
     nr_offset = (15, 19)
     nr_rolled = nr_rolled_index + 1
     die_sprite_size = base_image.size[0]
     sprite_table_paste_image(end_image, base_image, die_sprite_size, (0, 0), max_columns, index)
     if nr_rolled < 10:
-        nr_image = get_die_nr_image(spritesheet, nr_rolled_index)
+        nr_image = get_die_nr_image(nr_rolled_index)
         nr_offset = (nr_offset[0] + int(nr_image.size[0]/2), nr_offset[1])
         sprite_table_paste_image(end_image, nr_image, die_sprite_size, nr_offset, max_columns, index)
     elif 10 <= nr_rolled < 100:
         first_nr_index = int(nr_rolled / 10) - 1
         second_nr_index = nr_rolled % 10 - 1
         second_nr_index = second_nr_index if second_nr_index >= 0 else 9
-        nr_image = get_die_nr_image(spritesheet, first_nr_index)
-        nr_image2 = get_die_nr_image(spritesheet, second_nr_index)
+        nr_image = get_die_nr_image(first_nr_index)
+        nr_image2 = get_die_nr_image(second_nr_index)
         sprite_table_paste_image(end_image, nr_image, die_sprite_size, nr_offset, max_columns, index, 0)
         sprite_table_paste_image(end_image, nr_image2, die_sprite_size, nr_offset, max_columns, index, 1)
     elif nr_rolled == 100:
-        nr_image = get_die_nr_image(spritesheet, 0)
-        nr_image2 = get_die_nr_image(spritesheet, 9)
+        nr_image = get_die_nr_image(0)
+        nr_image2 = get_die_nr_image(9)
         nr_offset = (nr_offset[0] - int(nr_image.size[0]/4), nr_offset[1])
         sprite_table_paste_image(end_image, nr_image, die_sprite_size, nr_offset, max_columns, index, 0, 1)
         sprite_table_paste_image(end_image, nr_image2, die_sprite_size, nr_offset, max_columns, index, 1, 1)
@@ -253,26 +317,6 @@ def get_roll_sorted(amount: int, dice_size: int):
     return rolled_array
 
 
-def get_die_nr_image(spritesheet: Image, index: int):
-    global nrs_index_within_spritesheet, nr_size
-    if 0 > index or index > 10:
-        logger.error(f"tried number that isn't valid {index}")
-        raise BladesCommandException(
-            "FATAL Error. Tried to get image for an invalid number. This should never happen. Contact the bot creator.")
-    sheet_size = spritesheet.size
-    dice_per_row = int(sheet_size[0] / get_sided_die_sprite_size())
-    start_x = (nrs_index_within_spritesheet % dice_per_row) * get_sided_die_sprite_size()
-    start_y = int(nrs_index_within_spritesheet / dice_per_row) * get_sided_die_sprite_size()
-    cols = int((sheet_size[0] - start_x) / nr_size[0])
-
-    # crop amounts
-    left = start_x + (index % cols) * nr_size[0]
-    right = left + nr_size[0]
-    top = start_y + int(index / cols) * nr_size[1]
-    bottom = top + nr_size[1]
-    return spritesheet.crop((left, top, right, bottom))
-
-
 def generate_end_image(sprite_amount, sprite_size, max_columns: int, transparent=False) -> Image:
     end_image_length = sprite_size * sprite_amount if sprite_amount < max_columns else sprite_size * max_columns
     end_image_height = sprite_size * (int(sprite_amount / max_columns) + (1 if sprite_amount % max_columns != 0 else 0))
@@ -291,7 +335,8 @@ def sprite_table_paste_image(parent_image: Image,
                              ):
     row = int(index / max_columns)
     col = index % max_columns
-    temp_image = paste_image.crop((side_crop, 0, paste_image.size[0] - side_crop, paste_image.size[1]))
+    temp_image = paste_image if side_crop == 0 else \
+        paste_image.crop((side_crop, 0, paste_image.size[0] - side_crop, paste_image.size[1]))
     parent_image.paste(
         temp_image,
         (
@@ -301,63 +346,14 @@ def sprite_table_paste_image(parent_image: Image,
         temp_image)
 
 
-def get_die_base_image_filepath(nr: int):
-    return get_asset_folder_filepath() + os.sep.join(["dice", f"dice_base-{nr}.png"])
-
-
-def get_blade_dice_spritesheet_filepath():
-    return get_asset_folder_filepath() + os.sep.join(["dice", "Blades_dice_spritesheet.png"])
-
-
-def get_sized_dice_spritesheet_filepath():
-    return get_asset_folder_filepath() + os.sep.join(["dice", "sized_dice_spritesheet.png"])
-
-
-def get_tag_spritesheet_filepath():
-    return get_asset_folder_filepath() + os.sep.join(["dice", "blades_success_tags.png"])
-
-
-def get_success_tag_sprite(success: int):
-    if 2 < success or success < -1:
-        raise BladesCommandException("Blades/get_success_tag: Tried to get success tag outside of range")
-
-    spritesheet = image_open(get_tag_spritesheet_filepath()).convert('RGBA')
-    success_tag = None
-    width, height = spritesheet.size
-
-    if success == 0:
-        return spritesheet.crop((0, 0, int(width / 3), 32))
-    if success == -1:
-        success_tag = spritesheet.crop((0, 32, int(width / 3), height))
-    elif success == 1:
-        success_tag = spritesheet.crop((int(width / 3), 32, int(width / 3) * 2, height))
-    elif success == 2:
-        success_tag = spritesheet.crop((int(width / 3) * 2, 32, width, height))
-
-    return success_tag
-
-
 def get_blades_sprite_size():
-    global blades_dice_sprite_size
     return blades_dice_sprite_size
 
 
 def get_sided_die_sprite_size():
-    global sided_die_sprite_size
     return sided_die_sprite_size
 
 
-def get_sprite_from_uniform_spritesheet(spritesheet: Image, sprite_size: int, index: int):
-    sheet_size = spritesheet.size
-    columns = int(sheet_size[0] / sprite_size)
-    # crop amounts
-    left = (index % columns) * sprite_size
-    right = left + sprite_size
-    top = int(index / columns) * sprite_size
-    bottom = top + sprite_size
-    return spritesheet.crop((left, top, right, bottom))
-
-
 def get_base_sprite_indx(dice_size):
     if dice_size == 20:
         return 0
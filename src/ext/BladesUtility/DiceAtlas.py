@@ -0,0 +1,136 @@
+import logging
+import os
+import pathlib
+from PIL.Image import open as image_open, Image
+
+from .BladesCommandException import BladesCommandException
+
+logger = logging.getLogger('bot')
+asset_folder_rel_path = os.sep.join(["Assets", ""])
+
+blades_dice_sprite_size = 64
+sided_die_sprite_size = 64
+nr_size = (17, 26)
+nrs_index_within_spritesheet = 7  # where are the numbers in relation to the sprite columns
+blades_face_amount = 7  # faces 1 to 6 and the critical 6
+sided_base_amount = 7
+digit_amount = 10
+
+# pre-cropped sprites, filled by load_dice_atlas
+_blades_faces: list[Image] = []
+_sided_bases: list[Image] = []
+_digits: list[Image] = []
+_success_tags: dict[int, Image] = {}
+
+
+def get_asset_folder_filepath():
+    this_file_folder_path = pathlib.Path(__file__).parent.resolve()
+    return os.path.join(this_file_folder_path, asset_folder_rel_path)
+
+
+def get_blade_dice_spritesheet_filepath():
+    return get_asset_folder_filepath() + os.sep.join(["dice", "Blades_dice_spritesheet.png"])
+
+
+def get_sized_dice_spritesheet_filepath():
+    return get_asset_folder_filepath() + os.sep.join(["dice", "sized_dice_spritesheet.png"])
+
+
+def get_tag_spritesheet_filepath():
+    return get_asset_folder_filepath() + os.sep.join(["dice", "blades_success_tags.png"])
+
+
+def load_dice_atlas():
+    """
+    Opens the dice spritesheets once and crops every die face, digit and success tag out of them, so rolls only
+    have to paste the prepared sprites
+    """
+    global _blades_faces, _sided_bases, _digits, _success_tags
+    with image_open(get_blade_dice_spritesheet_filepath()) as sheet_file:
+        blades_sheet = sheet_file.convert('RGBA')
+    with image_open(get_sized_dice_spritesheet_filepath()) as sheet_file:
+        sized_sheet = sheet_file.convert('RGBA')
+    with image_open(get_tag_spritesheet_filepath()) as sheet_file:
+        tag_sheet = sheet_file.convert('RGBA')
+
+    _blades_faces = [get_sprite_from_uniform_spritesheet(blades_sheet, blades_dice_sprite_size, index)
+                     for index in range(blades_face_amount)]
+    _sided_bases = [get_sprite_from_uniform_spritesheet(sized_sheet, sided_die_sprite_size, index)
+                    for index in range(sided_base_amount)]
+    _digits = [crop_die_nr_image(sized_sheet, index) for index in range(digit_amount)]
+    _success_tags = {success: crop_success_tag_sprite(tag_sheet, success) for success in range(-1, 3)}
+    logger.debug("dice atlas loaded")
+
+
+def check_atlas_loaded():
+    if len(_blades_faces) == 0:
+        load_dice_atlas()
+
+
+def get_blades_face(index: int) -> Image:
+    """
+    Gets the sprite of a blades die face
+
+    :param index: the rolled number - 1, the critical 6 has index 6
+    :return: the die face sprite
+    """
+    check_atlas_loaded()
+    return _blades_faces[index]
+
+
+def get_sided_die_base(index: int) -> Image:
+    check_atlas_loaded()
+    return _sided_bases[index]
+
+
+def get_die_nr_image(index: int) -> Image:
+    if 0 > index or index >= digit_amount:
+        logger.error(f"tried number that isn't valid {index}")
+        raise BladesCommandException(
+            "FATAL Error. Tried to get image for an invalid number. This should never happen. Contact the bot creator.")
+    check_atlas_loaded()
+    return _digits[index]
+
+
+def get_success_tag_sprite(success: int) -> Image:
+    if 2 < success or success < -1:
+        raise BladesCommandException("Blades/get_success_tag: Tried to get success tag outside of range")
+    check_atlas_loaded()
+    return _success_tags[success]
+
+
+def crop_die_nr_image(spritesheet: Image, index: int) -> Image:
+    sheet_size = spritesheet.size
+    dice_per_row = int(sheet_size[0] / sided_die_sprite_size)
+    start_x = (nrs_index_within_spritesheet % dice_per_row) * sided_die_sprite_size
+    start_y = int(nrs_index_within_spritesheet / dice_per_row) * sided_die_sprite_size
+    cols = int((sheet_size[0] - start_x) / nr_size[0])
+
+    # crop amounts
+    left = start_x + (index % cols) * nr_size[0]
+    right = left + nr_size[0]
+    top = start_y + int(index / cols) * nr_size[1]
+    bottom = top + nr_size[1]
+    return spritesheet.crop((left, top, right, bottom))
+
+
+def crop_success_tag_sprite(spritesheet: Image, success: int) -> Image:
+    width, height = spritesheet.size
+    if success == 0:
+        return spritesheet.crop((0, 0, int(width / 3), 32))
+    if success == -1:
+        return spritesheet.crop((0, 32, int(width / 3), height))
+    if success == 1:
+        return spritesheet.crop((int(width / 3), 32, int(width / 3) * 2, height))
+    return spritesheet.crop((int(width / 3) * 2, 32, width, height))
+
+
+def get_sprite_from_uniform_spritesheet(spritesheet: Image, sprite_size: int, index: int):
+    sheet_size = spritesheet.size
+    columns = int(sheet_size[0] / sprite_size)
+    # crop amounts
+    left = (index % columns) * sprite_size
+    right = left + sprite_size
+    top = int(index / columns) * sprite_size
+    bottom = top + sprite_size
+    return spritesheet.crop((left, top, right, bottom))
@@ -0,0 +1,34 @@
+import io
+
+from PIL.Image import Image
+from discord import File
+
+merged_image_name = "merged.png"
+success_image_name = "success.png"
+
+
+def encode_png(image: Image) -> bytes:
+    """
+    Encodes an image as png in memory
+
+    :param image: the rendered image
+    :return: the png bytes
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def create_png_file(png: bytes, filename: str = merged_image_name) -> File:
+    """
+    Wraps png bytes into a discord File. A File can only be sent once, so every message needs a new one.
+
+    :param png: the png bytes
+    :param filename: the attachment name the embeds refer to with attachment://filename
+    :return: the discord File
+    """
+    return File(io.BytesIO(png), filename=filename)
+
+
+def create_image_file(image: Image, filename: str = merged_image_name) -> File:
+    return create_png_file(encode_png(image), filename)
@@ -0,0 +1,99 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from .RenderExecutor import run_render
+
+logger = logging.getLogger('bot')
+
+
+class RenderCache:
+    """
+    Least recently used cache of encoded images, keyed by everything that decides how the image looks
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        """
+        Gets the cached image for a key or renders and caches it if it is missing
+
+        :param key: the canonical description of the image
+        :param render: renders the image if it is not cached yet
+        :return: the encoded image
+        """
+        png = self._lookup(key)
+        if png is not None:
+            return png
+        png = render()
+        self.put(key, png)
+        return png
+
+    async def get_or_render_async(self, key: Hashable, render: Callable[..., bytes], *args) -> bytes:
+        """
+        Gets the cached image for a key. Missing images are rendered in the render pool and cached.
+
+        :param key: the canonical description of the image
+        :param render: renders the image if it is not cached yet
+        :param args: the arguments passed to render
+        :return: the encoded image
+        """
+        png = self._lookup(key)
+        if png is not None:
+            return png
+        png = await run_render(self.name, render, *args)
+        self.put(key, png)
+        return png
+
+    def put(self, key: Hashable, png: bytes):
+        with self._lock:
+            self.entries[key] = png
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _lookup(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            png = self.entries.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return png
+
+    def contains(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self.entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_hit_rate(self) -> float:
+        with self._lock:
+            return self._get_hit_rate()
+
+    def get_stats(self) -> dict[str, float]:
+        # the warm up thread may fill the cache at the same time
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": sum(len(png) for png in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self._get_hit_rate()
+            }
+
+    def _get_hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger('bot')
+
+DEFAULT_RENDER_POOL_SIZE = 2
+# renders that may wait for or run in the pool at the same time, further renders wait on the event loop
+DEFAULT_RENDER_MAX_PENDING = 16
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pool_size = 0
+_max_pending = 0
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+_stats = {
+    "jobs": 0,
+    "failed": 0,
+    "render_seconds": 0.0,
+    "max_render_seconds": 0.0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0
+}
+
+
+def get_env_int(environment_tag: str, default: int) -> int:
+    value = os.environ.get(environment_tag)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def configure_render_executor(pool_size: int = None, max_pending: int = None):
+    """
+    Creates the render pool. Sizes that are not given are read from RENDER_POOL_SIZE and RENDER_MAX_PENDING in the
+    environment, or use the defaults.
+
+    :param pool_size: the amount of threads rendering images
+    :param max_pending: the amount of renders that may be queued or running at the same time
+    """
+    global _executor, _pool_size, _max_pending, _semaphore, _semaphore_loop
+    pool_size = pool_size if pool_size is not None else get_env_int("RENDER_POOL_SIZE", DEFAULT_RENDER_POOL_SIZE)
+    max_pending = max_pending if max_pending is not None else \
+        get_env_int("RENDER_MAX_PENDING", DEFAULT_RENDER_MAX_PENDING)
+    if pool_size < 1 or max_pending < 1:
+        raise ValueError("render pool size and max pending renders have to be at least 1")
+    with _lock:
+        old_executor = _executor
+        _executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="render")
+        _pool_size = pool_size
+        _max_pending = max_pending
+        _semaphore = None
+        _semaphore_loop = None
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+    logger.debug(f"render pool started with {pool_size} threads")
+
+
+def shutdown_render_executor(wait: bool = True):
+    """
+    Stops the render pool, the next render creates it again
+
+    :param wait: if True, this waits until the pending renders are done. Running renders are always finished.
+    """
+    global _executor, _semaphore, _semaphore_loop
+    with _lock:
+        old_executor = _executor
+        _executor = None
+        _semaphore = None
+        _semaphore_loop = None
+    if old_executor is not None:
+        old_executor.shutdown(wait=wait)
+
+
+def _get_semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    global _semaphore, _semaphore_loop
+    # an asyncio semaphore belongs to the loop it was first used on
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(_max_pending)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+async def run_render(job_name: str, render: Callable[..., Any], *args) -> Any:
+    """
+    Runs a render function in the render pool, so the event loop keeps serving other interactions in the meantime.
+    If too many renders are pending, this waits until one of them is done.
+
+    :param job_name: the name used when logging the job timing
+    :param render: the function that renders the image
+    :param args: the arguments passed to render
+    :return: the result of render
+    """
+    if _executor is None:
+        configure_render_executor()
+    loop = asyncio.get_running_loop()
+    queued_at = time.perf_counter()
+    async with _get_semaphore(loop):
+        started_at = []
+
+        def timed_render():
+            started_at.append(time.perf_counter())
+            return render(*args)
+
+        try:
+            result = await loop.run_in_executor(_executor, timed_render)
+        except Exception:
+            _record_job(job_name, queued_at, started_at, failed=True)
+            raise
+    _record_job(job_name, queued_at, started_at)
+    return result
+
+
+def _record_job(job_name: str, queued_at: float, started_at: list[float], failed: bool = False):
+    finished_at = time.perf_counter()
+    start = started_at[0] if len(started_at) > 0 else finished_at
+    wait_seconds = start - queued_at
+    render_seconds = finished_at - start
+    with _lock:
+        _stats["jobs"] += 1
+        _stats["failed"] += 1 if failed else 0
+        _stats["render_seconds"] += render_seconds
+        _stats["max_render_seconds"] = max(_stats["max_render_seconds"], render_seconds)
+        _stats["wait_seconds"] += wait_seconds
+        _stats["max_wait_seconds"] = max(_stats["max_wait_seconds"], wait_seconds)
+    logger.debug(f"render {job_name}: waited {wait_seconds * 1000:.1f}ms, rendered {render_seconds * 1000:.1f}ms")
+
+
+def get_render_stats() -> dict[str, float]:
+    with _lock:
+        stats = dict(_stats)
+    stats["pool_size"] = _pool_size
+    stats["max_pending"] = _max_pending
+    return stats
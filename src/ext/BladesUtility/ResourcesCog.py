@@ -2,7 +2,8 @@ import logging
 from discord.ext import commands
 from discord import ApplicationContext, option
 
-from .BladesResources.ResourceLogic import ResourceView, send_stress_tracker
+from .BladesResources.ResourceLogic import ResourceView, send_stress_tracker, precompute_stress_tracks
+from .BladesResources.ResourceSpriteBuilding import load_stress_bar_sprites
 from .BladesResources.ResourceTracker import ResourceTracker
 from ...ContextInfo import init_context
 from ...command_helper_functions import channel_perm_check
@@ -24,6 +25,8 @@ class ResourcesCog(commands.Cog):
 
 def setup(bot: commands.Bot):
     # Every extension should have this function
+    load_stress_bar_sprites()
+    precompute_stress_tracks()
     bot.add_cog(ResourcesCog())
     bot.add_view(ResourceView(ResourceTracker(0, 9)))
     logger.info("Resources extension loaded")
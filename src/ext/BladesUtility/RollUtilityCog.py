@@ -5,6 +5,7 @@ from discord.ext import commands
 
 from .BladesCommandException import BladesCommandException
 from .Dice import all_size_roll_sorted, all_size_roll
+from .DiceAtlas import load_dice_atlas
 
 logger = logging.getLogger('bot')
 
@@ -28,6 +29,7 @@ class RollUtilityCog(commands.Cog):
 def setup(bot: commands.Bot):
     # Every extension should have this function
     logger.debug("setting up Blades Cog")
+    load_dice_atlas()
     bot.add_cog(RollUtilityCog())
 
 
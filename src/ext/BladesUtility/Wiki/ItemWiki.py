@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import pathlib
@@ -8,46 +7,22 @@ from discord.ui import View, Select
 
 from . import EntryLabels as eLabel
 from .WikiEntry import WikiEntry
+from .WikiSearchIndex import WikiSearchIndex
+from .... import json_codec
 from ....ContextInfo import ContextInfo, init_context
 
 relative_wiki_path = os.sep.join(["Assets", "item_wiki.json"])
 wiki: dict[str, WikiEntry] = {}
+wiki_index = WikiSearchIndex([])
 
 log = logging.getLogger('bot')
 
 
-def levenshtein_distance(word1, word2):
-    # Declaring array 'D' with rows = len(a) + 1 and columns = len(b) + 1:
-    D = [[0 for _i in range(len(word2) + 1)] for _j in range(len(word1) + 1)]
-
-    # Initialising first row and first column:
-    for row in range(len(word1) + 1):
-        D[row][0] = row
-    for col in range(len(word2) + 1):
-        D[0][col] = col
-
-    # check for each spot if substitution, insertion or
-    for row in range(1, len(word1) + 1):
-        for col in range(1, len(word2) + 1):
-            if word1[row - 1] == word2[col - 1]:
-                D[row][col] = D[row - 1][col - 1]
-            else:
-                # Adding 1 to account for the cost of operation
-                insertion = 1 + D[row][col - 1]
-                deletion = 1 + D[row - 1][col]
-                replacement = 1 + D[row - 1][col - 1]
-
-                # Choosing the best option:
-                D[row][col] = min(insertion, deletion, replacement)
-
-    return D[len(word1)][len(word2)]
-
-
 def setup_wiki():
+    global wiki_index
     wiki_path = os.sep.join([str(pathlib.Path(__file__).parent.resolve()), relative_wiki_path])
 
-    with open(wiki_path)as file:
-        imported_wiki = json.load(file)
+    imported_wiki = json_codec.read_file(wiki_path)
 
     for category in imported_wiki[eLabel.CATEGORIES_LABEL]:
         if eLabel.CPROP_ENTRIES_LABEL in category:
@@ -56,7 +31,7 @@ def setup_wiki():
             handle_super_entries(category)
         if eLabel.CPROP_ENTRYGROUPS_LABEL in category:
             handle_entrygroup(category)
-
+    wiki_index = WikiSearchIndex(wiki.keys())
 
 
 def handle_entries(category: dict):
@@ -114,21 +89,22 @@ async def send_wiki_entry(ctx: ContextInfo, entry: WikiEntry):
         await ctx.respond(embed=embed, file=file)
 
 
+def find_wiki_suggestions(term: str) -> list[dict]:
+    """
+    Finds the wiki keys closest to a search term that is not a key itself
+
+    :param term: the lowercase search term
+    :return: up to 5 suggestions with the key and its distance to the term, -1 if the key contains the term
+    """
+    return [{"key": key, "distance": distance} for key, distance in wiki_index.search(term)]
+
+
 async def wiki_search(ctx: ContextInfo, search_term: str):
-    found = []
     term = search_term.lower()
     if term in wiki:
         await send_wiki_entry(ctx, wiki[term])
     else:
-        for key in wiki.keys():
-            if term in key and len(term) >= 4:
-                found.append({"key": key, "distance": -1})
-                continue
-            distance = levenshtein_distance(term, key)
-            if distance < 5:
-                found.append({"key": key, "distance": distance})
-        found = sorted(found, key=lambda val1: val1["distance"])
-        found = found[:min(5, len(found))]
+        found = find_wiki_suggestions(term)
 
         if len(found) == 1:
             await send_wiki_entry(ctx, wiki[found[0]["key"]])
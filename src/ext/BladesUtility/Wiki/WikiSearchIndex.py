@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from typing import Iterable
+
+SUBSTRING_MIN_LENGTH = 4
+# keys with a smaller levenshtein distance than this are suggested
+MAX_DISTANCE_EXCLUSIVE = 5
+SUBSTRING_DISTANCE = -1
+GRAM_SIZE = 3
+
+
+def build_pattern_masks(pattern: str) -> dict[str, int]:
+    """
+    Builds the bit masks marking the positions of every character in a pattern
+
+    :param pattern: the word that is compared against many others
+    :return: a mask per character, bit i is set if pattern[i] is the character
+    """
+    masks = {}
+    for index, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << index)
+    return masks
+
+
+def pattern_levenshtein_distance(pattern_masks: dict[str, int], pattern_length: int, text: str, bound: int) -> int:
+    """
+    Calculates the levenshtein distance between a pattern and a text with the bit parallel algorithm of Myers,
+    which handles a whole column of the distance matrix at once. The calculation stops as soon as the distance
+    cannot come back down to bound.
+
+    :param pattern_masks: the masks built by build_pattern_masks for the pattern
+    :param pattern_length: the length of the pattern
+    :param text: the word compared with the pattern
+    :param bound: the largest distance that has to be calculated exactly
+    :return: the distance, or bound + 1 if the distance is larger than bound
+    """
+    too_far = bound + 1
+    if abs(pattern_length - len(text)) > bound:
+        return too_far
+    if pattern_length == 0:
+        return len(text)
+    mask = (1 << pattern_length) - 1
+    high_bit = 1 << (pattern_length - 1)
+    vertical_positive = mask
+    vertical_negative = 0
+    score = pattern_length
+    remaining = len(text)
+    for char in text:
+        equal = pattern_masks.get(char, 0)
+        x_vertical = equal | vertical_negative
+        x_horizontal = (((equal & vertical_positive) + vertical_positive) ^ vertical_positive) | equal
+        horizontal_positive = (vertical_negative | ~(x_horizontal | vertical_positive)) & mask
+        horizontal_negative = vertical_positive & x_horizontal
+        if horizontal_positive & high_bit:
+            score += 1
+        elif horizontal_negative & high_bit:
+            score -= 1
+        remaining -= 1
+        # every remaining character can lower the distance by one at most
+        if score - remaining > bound:
+            return too_far
+        horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        vertical_positive = (horizontal_negative | ~(x_vertical | horizontal_positive)) & mask
+        vertical_negative = horizontal_positive & x_vertical
+    return score if score <= bound else too_far
+
+
+def bounded_levenshtein_distance(word1: str, word2: str, bound: int) -> int:
+    """
+    Calculates the levenshtein distance of two words, as long as it is not larger than bound
+
+    :param word1: the first word
+    :param word2: the second word
+    :param bound: the largest distance that has to be calculated exactly
+    :return: the distance, or bound + 1 if the distance is larger than bound
+    """
+    return pattern_levenshtein_distance(build_pattern_masks(word1), len(word1), word2, bound)
+
+
+class WikiSearchIndex:
+    """
+    Index over the wiki keys that finds substring matches through trigram postings and similar keys through segment
+    postings. Every key is split into MAX_DISTANCE_EXCLUSIVE segments, a key within MAX_DISTANCE_EXCLUSIVE - 1 edits
+    of a term keeps at least one of them unchanged, so only keys sharing a segment with the term are compared.
+    Results are ordered like a full scan over the keys in insertion order.
+    """
+
+    def __init__(self, keys: Iterable[str], max_cached_searches: int = 256):
+        self.positions: dict[str, int] = {}
+        self.postings: dict[str, set[str]] = {}
+        # segment -> key, start of the segment within the key, length of the key
+        self.segments: dict[str, list[tuple[str, int, int]]] = {}
+        self.segment_lengths: set[int] = set()
+        # keys too short to be split, they are compared with every term
+        self.short_keys: list[str] = []
+        self.max_cached_searches = max_cached_searches
+        self.cached_searches: OrderedDict[tuple[str, int], list[tuple[str, int]]] = OrderedDict()
+        for key in keys:
+            self.add_key(key)
+
+    def add_key(self, key: str):
+        if key in self.positions:
+            return
+        self.positions[key] = len(self.positions)
+        self.cached_searches.clear()
+        for gram in get_grams(key):
+            self.postings.setdefault(gram, set()).add(key)
+        segment_count = MAX_DISTANCE_EXCLUSIVE
+        if len(key) < segment_count:
+            self.short_keys.append(key)
+            return
+        start = 0
+        for index in range(segment_count):
+            segment_length = len(key) // segment_count + (1 if index < len(key) % segment_count else 0)
+            self.segments.setdefault(key[start:start + segment_length], []).append((key, start, len(key)))
+            self.segment_lengths.add(segment_length)
+            start += segment_length
+
+    def search(self, term: str, max_results: int = 5) -> list[tuple[str, int]]:
+        """
+        Finds the keys most similar to a search term. Keys containing the term get the distance -1 if the term is at
+        least 4 characters long, all other keys are suggested if their levenshtein distance is smaller than 5.
+
+        :param term: the lowercase search term
+        :param max_results: the amount of suggestions returned
+        :return: key and distance of the best suggestions, sorted by distance and then by insertion order
+        """
+        cache_key = (term, max_results)
+        cached = self.cached_searches.get(cache_key)
+        if cached is not None:
+            self.cached_searches.move_to_end(cache_key)
+            return list(cached)
+
+        substring_keys = self.find_substring_keys(term) if len(term) >= SUBSTRING_MIN_LENGTH else []
+        found = [(key, SUBSTRING_DISTANCE) for key in substring_keys[:max_results]]
+        if len(found) < max_results:
+            substring_set = set(substring_keys)
+            similar = [(key, distance) for key, distance in self.find_similar_keys(term, MAX_DISTANCE_EXCLUSIVE - 1)
+                       if key not in substring_set]
+            similar.sort(key=lambda match: (match[1], self.positions[match[0]]))
+            found += similar[:max_results - len(found)]
+
+        self.cached_searches[cache_key] = found
+        if len(self.cached_searches) > self.max_cached_searches:
+            self.cached_searches.popitem(last=False)
+        return list(found)
+
+    def find_substring_keys(self, term: str) -> list[str]:
+        candidates = None
+        for gram in sorted(get_grams(term), key=lambda term_gram: len(self.postings.get(term_gram, ()))):
+            gram_keys = self.postings.get(gram)
+            if gram_keys is None:
+                return []
+            candidates = set(gram_keys) if candidates is None else candidates & gram_keys
+            if len(candidates) == 0:
+                return []
+        if candidates is None:
+            candidates = self.positions.keys()
+        return sorted((key for key in candidates if term in key), key=self.positions.__getitem__)
+
+    def find_similar_keys(self, term: str, max_distance: int) -> list[tuple[str, int]]:
+        """
+        Finds every key within max_distance edits of a term
+
+        :param term: the lowercase search term
+        :param max_distance: the largest distance a key may have, at most MAX_DISTANCE_EXCLUSIVE - 1
+        :return: the keys and their distances in no particular order
+        """
+        term_length = len(term)
+        candidates = set(self.short_keys)
+        for segment_length in self.segment_lengths:
+            for term_start in range(term_length - segment_length + 1):
+                for key, key_start, key_length in self.segments.get(term[term_start:term_start + segment_length], ()):
+                    # an unchanged segment is shifted by one position per insertion or deletion in front of it
+                    if abs(key_start - term_start) <= max_distance and abs(key_length - term_length) <= max_distance:
+                        candidates.add(key)
+
+        term_masks = build_pattern_masks(term)
+        found = []
+        for key in candidates:
+            distance = pattern_levenshtein_distance(term_masks, term_length, key, max_distance)
+            if distance <= max_distance:
+                found.append((key, distance))
+        return found
+
+
+def get_grams(word: str) -> set[str]:
+    return {word[index:index + GRAM_SIZE] for index in range(len(word) - GRAM_SIZE + 1)}
@@ -1,14 +1,31 @@
 import logging
 
 from discord import slash_command, ApplicationContext
+from discord.ext import tasks
 from discord.ext.commands import Cog, Bot
 from . import wrapped_commands as commands, campaign_helper as cmp_hlp
+from .SaveDataManagement import save_writer, live_save_manager
 from ...ContextInfo import init_context
 
 logger = logging.getLogger('bot')
+STATS_LOG_INTERVAL_MINUTES = 60
 
 
 class CampaignCog(Cog):
+    def cog_unload(self):
+        self.log_save_stats.cancel()
+        save_writer.flush_all_saves(wait=False)
+
+    @Cog.listener()
+    async def on_ready(self):
+        if not self.log_save_stats.is_running():
+            self.log_save_stats.start()
+
+    @tasks.loop(minutes=STATS_LOG_INTERVAL_MINUTES, reconnect=False)
+    async def log_save_stats(self):
+        logger.info(f"loaded save files: {live_save_manager.get_file_cache_stats()}")
+        logger.info(f"save locks: {live_save_manager.get_save_lock_stats()}")
+
     @slash_command(name="edit_char",
                    description="Use a simple button interface to change a characters' stats")
     async def edit_char(self, ctx: ApplicationContext, char_tag: str = None):
@@ -92,6 +109,13 @@ class CampaignCog(Cog):
     async def redo(self, ctx: ApplicationContext, amount: int = 1):
         return await commands.redo(await init_context(ctx=ctx), amount)
 
+    @slash_command(
+        name="batch",
+        description="Change several stats at once, for example: fez crit 1; olav take 12; olav cause 8"
+    )
+    async def stat_batch(self, ctx: ApplicationContext, operations: str):
+        return await commands.stat_batch(await init_context(ctx=ctx), operations)
+
     @slash_command(name="log", description="Outputs all current Character information")
     async def log(self, ctx: ApplicationContext, adv=False):
         return await commands.log((await init_context(ctx=ctx)), adv)
@@ -1,4 +1,59 @@
+from .campaign_exceptions import CharacterDataException
+
+LABEL_PLAYER = "player"
+LABEL_NAME = "name"
+LABEL_TAG = "tag"
+LABEL_TAKEN = "damage_taken"
+LABEL_RESISTED = "damage_resisted"
+LABEL_CAUSED = "damage_caused"
+LABEL_HEALED = "damage_healed"
+LABEL_MAXDAM = "max_damage"
+LABEL_KILLS = "kills"
+LABEL_CRITS = "crits"
+LABEL_FAINTS = "faints"
+LABEL_DODGE = "dodged"
+
+CHARACTER_FIELD_TYPES: dict[str, type] = {
+    LABEL_PLAYER: str,
+    LABEL_NAME: str,
+    LABEL_TAG: str,
+    LABEL_TAKEN: int,
+    LABEL_RESISTED: int,
+    LABEL_CAUSED: int,
+    LABEL_HEALED: int,
+    LABEL_MAXDAM: int,
+    LABEL_KILLS: int,
+    LABEL_CRITS: int,
+    LABEL_FAINTS: int,
+    LABEL_DODGE: int
+}
+
+
+def coerce_stat(key: str, value):
+    """
+    Turns a stat value of an older save_file into the type of the stat. Older saves stored player ids as numbers and
+    files edited by hand may contain whole numbers as floats.
+
+    :param key: the label of the stat
+    :param value: the loaded value
+    :return: the value with the type of the stat
+    :raises CharacterDataException: if the value cannot be turned into the type of the stat
+    """
+    expected_type = CHARACTER_FIELD_TYPES[key]
+    value_type = type(value)
+    # bool is a subclass of int, but never a valid stat
+    if value_type is expected_type:
+        return value
+    if expected_type is str and value_type is int:
+        return str(value)
+    if expected_type is int and value_type is float and value.is_integer():
+        return int(value)
+    raise CharacterDataException(f"character stat {key} has to be a {expected_type.__name__}, "
+                                 f"got {value_type.__name__}")
+
+
 class Character:
+    __slots__ = tuple(CHARACTER_FIELD_TYPES)
 
     def __init__(self, tag, name):
         self.player: str = ""
@@ -45,6 +100,57 @@ class Character:
     def heal(self, health: int):
         self.damage_healed += health
 
+    def to_dict(self) -> dict:
+        """
+        Turns the character into the json dictionary stored in save_files
+        """
+        return {
+            LABEL_PLAYER: self.player,
+            LABEL_NAME: self.name,
+            LABEL_TAG: self.tag,
+            LABEL_TAKEN: self.damage_taken,
+            LABEL_RESISTED: self.damage_resisted,
+            LABEL_CAUSED: self.damage_caused,
+            LABEL_HEALED: self.damage_healed,
+            LABEL_MAXDAM: self.max_damage,
+            LABEL_KILLS: self.kills,
+            LABEL_CRITS: self.crits,
+            LABEL_FAINTS: self.faints,
+            LABEL_DODGE: self.dodged
+        }
+
+    @classmethod
+    def from_dict(cls, char_dic: dict) -> "Character":
+        """
+        Creates a character from a json dictionary stored in a save_file. Stats missing in the dictionary keep their
+        default value.
+
+        :param char_dic: the loaded dictionary containing infos of a single character
+        :return: The created character object
+        :raises CharacterDataException: if the dictionary contains unknown stats or stats that cannot be turned into
+            their type
+        """
+        unknown = char_dic.keys() - CHARACTER_FIELD_TYPES.keys()
+        if len(unknown) > 0:
+            raise CharacterDataException(f"unknown character stats {sorted(unknown)}")
+        if any(type(value) is not CHARACTER_FIELD_TYPES[key] for key, value in char_dic.items()):
+            char_dic = {key: coerce_stat(key, value) for key, value in char_dic.items()}
+        get = char_dic.get
+        char = cls.__new__(cls)
+        char.player = get(LABEL_PLAYER, "")
+        char.name = get(LABEL_NAME, "")
+        char.tag = get(LABEL_TAG, "")
+        char.damage_taken = get(LABEL_TAKEN, 0)
+        char.damage_resisted = get(LABEL_RESISTED, 0)
+        char.damage_caused = get(LABEL_CAUSED, 0)
+        char.damage_healed = get(LABEL_HEALED, 0)
+        char.max_damage = get(LABEL_MAXDAM, 0)
+        char.kills = get(LABEL_KILLS, 0)
+        char.crits = get(LABEL_CRITS, 0)
+        char.faints = get(LABEL_FAINTS, 0)
+        char.dodged = get(LABEL_DODGE, 0)
+        return char
+
     def __str__(self):
         return f"------------------\n" \
                f"**{self.name}** / _{self.tag}_\n" \
@@ -54,17 +160,3 @@ class Character:
                f"max damage in one round: {self.max_damage}\n" \
                f"kills: {self.kills}    crits: {self.crits}   fainted: {self.faints}\n" \
                f"dodges: {self.dodged}"
-
-
-LABEL_PLAYER = "player"
-LABEL_NAME = "name"
-LABEL_TAG = "tag"
-LABEL_TAKEN = "damage_taken"
-LABEL_RESISTED = "damage_resisted"
-LABEL_CAUSED = "damage_caused"
-LABEL_HEALED = "damage_healed"
-LABEL_MAXDAM = "max_damage"
-LABEL_KILLS = "kills"
-LABEL_CRITS = "crits"
-LABEL_FAINTS = "faints"
-LABEL_DODGE = "dodged"
@@ -1,66 +1,196 @@
+import asyncio
+import heapq
+import itertools
 import logging
-from threading import Timer
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Callable
 
 logger = logging.getLogger('bot')
 
 
 class TempEntry:
-    def __init__(self, value: Any, time, func: callable):
-        self.func = func
+    def __init__(self, value: Any, expiry_time: float, size: int = 0):
         self.value: Any = value
-        self.time = time
-        self.timer = Timer(time, func)
-        self.timer.start()
+        self.expiry_time: float = expiry_time
+        self.size: int = size
+        # id of the heap item that currently tracks this entry
+        self.heap_id: int = -1
 
-    def reset_timer(self):
-        self.timer.cancel()
-        self.timer = Timer(self.time, self.func)
-        self.timer.start()
 
-    def cancel(self):
-        self.timer.cancel()
-
-    def get(self):
-        self.reset_timer()
-        return self.value
+class TempEntryDict:
+    """
+    Dictionary whose entries are removed once they have not been accessed for deletion_time seconds.
 
-    def set(self, value):
-        self.reset_timer()
-        self.value = value
+    Accessing an entry only refreshes its timestamp. All entries share a single expiry heap, which is swept by the
+    running event loop whenever its earliest item is due. Without a running loop, expired entries are removed when
+    they are accessed.
 
+    If max_entries or max_bytes are given, the least recently used entries are evicted whenever the dictionary grows
+    past them. The size of an entry is estimated with size_func. Entries for which can_evict returns False are neither
+    evicted nor expired, the dictionary may grow past its limits until they can be evicted again.
+    """
 
-class TempEntryDict:
-    def __init__(self, deletion_time: int, entry_name: str):
+    def __init__(self,
+                 deletion_time: int,
+                 entry_name: str,
+                 on_removal: Callable[[str, Any], None] = None,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 size_func: Callable[[Any], int] = None,
+                 can_evict: Callable[[str], bool] = None):
         self.entry_name = entry_name
         self.deletion_time = deletion_time
-        self.temp_entries: dict[str, TempEntry] = {}
+        self.on_removal = on_removal
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_func = size_func
+        self.can_evict = can_evict
+        self.temp_entries: OrderedDict[str, TempEntry] = OrderedDict()
+        self.total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._expiry_heap: list[tuple[float, int, str]] = []
+        self._heap_ids = itertools.count()
+        self._sweep_handle: Optional[asyncio.TimerHandle] = None
+        self._sweep_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def remove(self, key: str):
         if key in self.temp_entries:
-            self.temp_entries[key].cancel()
+            entry = self.temp_entries[key]
+            if self.on_removal is not None:
+                self.on_removal(key, entry.value)
             del self.temp_entries[key]
+            self.total_size -= entry.size
             logger.info(f"{key}: {self.entry_name} was cleared from memory")
 
     def clear(self):
-        while len(self.temp_entries) > 0:
-            key, val = self.temp_entries.popitem()
-            val.cancel()
+        self.temp_entries.clear()
+        self.total_size = 0
+        self._expiry_heap.clear()
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+            self._sweep_handle = None
 
     def set(self, key, value):
-        if key in self.temp_entries:
-            self.temp_entries[key].set(value)
-            logger.debug(f"{key}: {self.entry_name} timer was reset")
+        now = time.monotonic()
+        self._expire_due(now)
+        entry = self.temp_entries.get(key)
+        if entry is not None:
+            entry.value = value
+            entry.expiry_time = now + self.deletion_time
+            self.temp_entries.move_to_end(key)
         else:
-            self.temp_entries[key] = TempEntry(value, self.deletion_time, lambda: self.remove(key))
+            entry = TempEntry(value, now + self.deletion_time)
+            self.temp_entries[key] = entry
+            self._push(key, entry)
+        self.refresh_size(key)
 
     def get(self, key) -> Optional[Any]:
-        if key in self.temp_entries:
-            logger.debug(f"{key}: {self.entry_name} timer was reset")
-            return self.temp_entries[key].get()
-        else:
+        entry = self._get_live_entry(key)
+        if entry is None:
+            self.misses += 1
             return None
+        self.hits += 1
+        entry.expiry_time = time.monotonic() + self.deletion_time
+        self.temp_entries.move_to_end(key)
+        return entry.value
+
+    def refresh_size(self, key: str):
+        """
+        Estimates the size of an entry again after its value was changed in place and evicts the least recently
+        used entries if the dictionary has grown past its limits.
+
+        :param key: the key of the changed entry
+        """
+        entry = self.temp_entries.get(key)
+        if entry is None:
+            return
+        if self.size_func is not None:
+            new_size = self.size_func(entry.value)
+            self.total_size += new_size - entry.size
+            entry.size = new_size
+        self._evict_over_limit(key)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.temp_entries),
+            "bytes": self.total_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
 
     def __contains__(self, key: str) -> bool:
-        return key in self.temp_entries
+        return self._get_live_entry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.temp_entries)
+
+    def _get_live_entry(self, key) -> Optional[TempEntry]:
+        entry = self.temp_entries.get(key)
+        if entry is not None and entry.expiry_time <= time.monotonic() and self._is_evictable(key):
+            self.remove(key)
+            return None
+        return entry
+
+    def _evict_over_limit(self, kept_key: str):
+        while len(self.temp_entries) > 1 and (
+                (self.max_entries is not None and len(self.temp_entries) > self.max_entries) or
+                (self.max_bytes is not None and self.total_size > self.max_bytes)):
+            # the kept entry is skipped even if it alone exceeds the limit
+            lru_key = next((key for key in self.temp_entries if key != kept_key and self._is_evictable(key)), None)
+            if lru_key is None:
+                break
+            self.evictions += 1
+            logger.debug(f"{lru_key}: {self.entry_name} evicted to stay within memory limits")
+            self.remove(lru_key)
+
+    def _is_evictable(self, key: str) -> bool:
+        return self.can_evict is None or self.can_evict(key)
+
+    def _push(self, key: str, entry: TempEntry):
+        entry.heap_id = next(self._heap_ids)
+        heapq.heappush(self._expiry_heap, (entry.expiry_time, entry.heap_id, key))
+        self._schedule_sweep()
+
+    def _expire_due(self, now: float):
+        """
+        Removes every entry whose expiry time has passed. Heap items of entries that were accessed in the meantime
+        are pushed back with the refreshed expiry time.
+        """
+        heap = self._expiry_heap
+        while len(heap) > 0 and heap[0][0] <= now:
+            _, heap_id, key = heapq.heappop(heap)
+            entry = self.temp_entries.get(key)
+            if entry is None or entry.heap_id != heap_id:
+                continue
+            if entry.expiry_time <= now:
+                if self._is_evictable(key):
+                    self.remove(key)
+                    continue
+                # the entry is still in use, so it expires once it was not accessed for another deletion_time
+                entry.expiry_time = now + self.deletion_time
+            entry.heap_id = next(self._heap_ids)
+            heapq.heappush(heap, (entry.expiry_time, entry.heap_id, key))
+
+    def _schedule_sweep(self):
+        if len(self._expiry_heap) == 0:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        delay = max(0.0, self._expiry_heap[0][0] - time.monotonic())
+        if self._sweep_handle is not None and not self._sweep_handle.cancelled() and self._sweep_loop is loop:
+            if self._sweep_handle.when() <= loop.time() + delay:
+                return
+            self._sweep_handle.cancel()
+        self._sweep_handle = loop.call_later(delay, self._sweep)
+        self._sweep_loop = loop
 
+    def _sweep(self):
+        self._sweep_handle = None
+        self._expire_due(time.monotonic())
+        self._schedule_sweep()
@@ -1,4 +1,5 @@
-from .live_save_manager import check_file_loaded, get_loaded_chars
+from .live_save_manager import check_file_loaded, get_loaded_chars, get_loaded_dict, get_loaded_filename
+from . import player_index, save_journal
 from ..Character import Character
 from ...command_exceptions import CommandException
 
@@ -30,22 +31,22 @@ def get_char_tag_by_id(executing_user: str, search_user_id: str = None) -> str:
     if search_user_id is None:
         search_user_id = executing_user
     check_file_loaded(executing_user, raise_error=True)
-    for char in get_loaded_chars(executing_user).values():
-        if char.player == search_user_id:
-            return char.tag
-    raise CommandException("This user does not have an assigned character")
+    char_tag = player_index.get_player_char_tag(get_loaded_dict(executing_user), search_user_id)
+    if char_tag is None:
+        raise CommandException("This user does not have an assigned character")
+    return char_tag
 
 
 def get_char_name_by_id(executing_user: str, search_user_id: str) -> str:
-    for char in get_loaded_chars(executing_user).values():
-        if char.player == str(search_user_id):
-            return char.name
-    raise CommandException("This user does not have an assigned character")
+    char_tag = player_index.get_player_char_tag(get_loaded_dict(executing_user), str(search_user_id))
+    if char_tag is None:
+        raise CommandException("This user does not have an assigned character")
+    return get_loaded_chars(executing_user)[char_tag].name
 
 
 def get_char(user_id: str, char_tag: str) -> Character:
     """
-    Gets a character from a loaded savefile
+    Gets a character from a loaded savefile. The character is marked as touched, so its changes are journaled.
 
     :param user_id: the user_id of the user trying to access
     :param char_tag: the character tag associated with the appropriate character
@@ -57,14 +58,23 @@ def get_char(user_id: str, char_tag: str) -> Character:
     if char_tag not in _char_dict:
         raise CommandException("Character doesn't exist")
     else:
+        save_journal.mark_char_touched(get_loaded_filename(user_id), char_tag)
         return _char_dict[char_tag]
 
 
 def check_if_user_has_char(executing_user: str, search_user_id: str) -> bool:
-    for char in get_loaded_chars(executing_user).values():
-        if char.player == search_user_id:
-            return True
-    return False
+    return player_index.get_player_char_tag(get_loaded_dict(executing_user), search_user_id) is not None
+
+
+def set_char_player(executing_user: str, char_tag: str, player: str):
+    """
+    Assigns a character of the loaded save to a player, use this instead of Character.set_player for loaded characters
+
+    :param executing_user: id of executing user
+    :param char_tag: tag of the character
+    :param player: the discord id of the player or "" to unassign the character
+    """
+    player_index.set_char_player(get_loaded_dict(executing_user), get_char(executing_user, char_tag), player)
 
 
 def retag_char(executing_user: str, char_tag_old: str, char_tag_new: str):
@@ -74,5 +84,5 @@ def retag_char(executing_user: str, char_tag_old: str, char_tag_new: str):
 
     _chardict = get_loaded_chars(executing_user)
     _chardict[char_tag_new] = _chardict[char_tag_old]
-    _chardict[char_tag_new].tag = char_tag_new
+    player_index.retag_char(get_loaded_dict(executing_user), _chardict[char_tag_new], char_tag_new)
     del _chardict[char_tag_old]
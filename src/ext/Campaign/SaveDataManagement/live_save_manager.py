@@ -1,16 +1,53 @@
+import asyncio
+import contextlib
+import copy
 import logging
+import sys
+import time
+from typing import Optional, AsyncIterator
 
 from .TempEntryDict import TempEntryDict
 from ..Character import Character
-from ..campaign_exceptions import NotFileAdminException, NoAssignedSaveException, UserNotPlayerException
-from .save_file_management import save_file_to_parsed_dictionary, save_data_to_file, players_tag, character_tag, \
-    create_fresh_save, setup_save_folders, admin_tag
+from ..campaign_exceptions import NotFileAdminException, NoAssignedSaveException, UserNotPlayerException, \
+    SaveConflictException
+from .save_file_management import save_file_to_parsed_dictionary, players_tag, character_tag, \
+    create_fresh_save, setup_save_folders, admin_tag, is_save_stale
+from .save_writer import mark_save_dirty, start_flush, flush_all_saves, is_save_pending, discard_pending_save, \
+    is_write_running, set_conflict_handler
+from . import save_index, player_index, save_journal
 
 USER_ID_DELETION_SECONDS = 10800
 FILE_DELETION_SECONDS = 3600
+# upper bounds for the save_files kept in memory, the least recently used files are unloaded past them
+MAX_LOADED_FILES = 200
+MAX_LOADED_FILES_BYTES = 64 * 1024 * 1024
+
+
+def estimate_save_size(save_dict: dict) -> int:
+    """
+    Roughly estimates the memory used by a parsed save dictionary
+
+    :param save_dict: the parsed save dictionary
+    :return: the estimated size in bytes
+    """
+    size = sys.getsizeof(save_dict) + sum(sys.getsizeof(player) for player in save_dict[players_tag])
+    for tag, char in save_dict[character_tag].items():
+        size += sys.getsizeof(tag) + sys.getsizeof(char)
+        size += sum(sys.getsizeof(getattr(char, field)) for field in Character.__slots__)
+    if player_index.player_index_tag in save_dict:
+        size += sys.getsizeof(save_dict[player_index.player_index_tag])
+    return size
+
 
 ID_dict = TempEntryDict(USER_ID_DELETION_SECONDS, "ID")
-file_dict = TempEntryDict(FILE_DELETION_SECONDS, "File")
+file_dict = TempEntryDict(FILE_DELETION_SECONDS,
+                          "File",
+                          lambda file_name, _: start_flush(file_name),
+                          max_entries=MAX_LOADED_FILES,
+                          max_bytes=MAX_LOADED_FILES_BYTES,
+                          size_func=estimate_save_size,
+                          # a command holding the lock of a save may still change it after an await
+                          can_evict=lambda file_name: file_name not in _save_locks)
 logger = logging.getLogger('bot')
 
 
@@ -19,6 +56,7 @@ def setup_live_save_data():
     setup_save_folders()
     ID_dict.clear()
     file_dict.clear()
+    save_index.build_save_index()
 
 
 def check_file_loaded(user_id: str, raise_error: bool = False) -> bool:
@@ -73,9 +111,23 @@ def get_loaded_dict(user_id: str) -> dict:
 
 
 def check_file_player(user_id: str, _save_name: str, raise_error=False) -> bool:
+    """
+    Checks if a user is a player of a save. Saves that are not in memory are checked with the save index,
+    so they are not loaded just for the check.
+
+    :param user_id: the id of the user
+    :param _save_name: the save_file name without suffix
+    :param raise_error: If true, the function will throw a UserNotPlayerException if the user is not a player
+    :return: True if the user is a player, False otherwise
+    :raises SaveFileNotFoundException: if the save does not exist
+    """
     global file_dict
-    load_file_into_memory(_save_name)
-    if user_id in file_dict.get(_save_name)[players_tag]:
+    loaded_dict = file_dict.get(_save_name)
+    if loaded_dict is not None:
+        players = loaded_dict[players_tag]
+    else:
+        players = save_index.get_save_summary(_save_name).players
+    if user_id in players:
         return True
     elif raise_error:
         raise UserNotPlayerException()
@@ -112,14 +164,22 @@ def access_file_as_user(user_id: str, _save_name: str) -> str:
         ID_dict.remove(user_id)
         return f"unloaded current saveFile"
     check_file_player(user_id, _save_name, True)
+    load_file_into_memory(_save_name)
     ID_dict.set(user_id, _save_name)
     return f"Savefile {_save_name} exists.\nData loaded."
 
 
 def save_user_file(user_id: str):
+    """
+    Marks the savefile assigned to a user as changed. The file is written to the hard drive shortly after,
+    together with all other changes made in the meantime.
+
+    :param user_id: the id of the user whose savefile was changed
+    :raises SaveConflictException: if another bot process changed the savefile, the changes in memory are dropped
+    """
     file_name = get_loaded_filename(user_id)
     if file_name is not None:
-        save_data_to_file(file_name, file_dict.get(file_name))
+        save_loaded_file(file_name)
     else:
         raise Exception("save_user_file was called for a user that had no savefile assigned")
 
@@ -133,15 +193,129 @@ def load_file_into_memory(_file_name, replace=False):
     :return:
     """
     global file_dict
-    if _file_name not in file_dict or replace:
+    if replace or file_dict.get(_file_name) is None:
         file_dict.set(_file_name, save_file_to_parsed_dictionary(_file_name))
         logger.debug(f"Loaded {_file_name} into meomory")
     else:
         logger.debug(f"{_file_name} accessed")
 
 
+def check_file_in_memory(_file_name) -> bool:
+    return _file_name in file_dict
+
+
+def get_file_dict(_file_name) -> Optional[dict]:
+    """
+    :param _file_name: the save_name without suffix
+    :return: the parsed dictionary of the save_file or None if the file is not in memory
+    """
+    return file_dict.get(_file_name)
+
+
+def save_loaded_file(_file_name):
+    """
+    Marks a save_file in memory as changed, like save_user_file does for the file assigned to a user
+
+    :param _file_name: the save_name without suffix
+    :raises SaveConflictException: if another bot process changed the savefile, the changes in memory are dropped
+    """
+    save_dict = file_dict.get(_file_name)
+    if save_dict is None:
+        raise Exception(f"save_loaded_file was called for {_file_name}, which is not in memory")
+    try:
+        mark_save_dirty(_file_name, save_dict)
+    except SaveConflictException:
+        invalidate_file(_file_name)
+        raise
+    file_dict.refresh_size(_file_name)
+
+
+def invalidate_file(_file_name):
+    """
+    Drops a save_file from memory together with its pending changes, so it is loaded from the hard drive again
+    on its next access
+
+    :param _file_name: the save_name without suffix
+    """
+    discard_pending_save(_file_name, wait=False)
+    file_dict.remove(_file_name)
+
+
+def drop_conflicting_file(_file_name):
+    """
+    Drops a save_file from memory after the writer thread refused one of its writes, because another bot process
+    changed it. A save that was reloaded in the meantime is kept.
+
+    :param _file_name: the save_name without suffix
+    """
+    if check_file_in_memory(_file_name) and (is_write_running(_file_name) or is_save_stale(_file_name)):
+        invalidate_file(_file_name)
+
+
+set_conflict_handler(drop_conflicting_file)
+
+
+def reload_file_if_stale(_file_name):
+    """
+    Loads a save_file in memory from the hard drive again, if another bot process changed it since it was loaded.
+    Saves whose own writes are still running are not checked, the writer thread refuses them if they conflict.
+
+    :param _file_name: the save_name without suffix
+    :raises SaveConflictException: if the save had changes that were not yet written, they are dropped together with
+        the save in memory
+    """
+    if not check_file_in_memory(_file_name) or is_write_running(_file_name) or not is_save_stale(_file_name):
+        return
+    if is_save_pending(_file_name):
+        logger.warning(f"{_file_name} was changed by another process, its pending changes were dropped")
+        invalidate_file(_file_name)
+        raise SaveConflictException()
+    logger.info(f"{_file_name} was changed by another process, reloading it")
+    load_file_into_memory(_file_name, replace=True)
+
+
+def snapshot_save_dict(save_dict: dict) -> dict:
+    """
+    Copies the state of a parsed save dictionary, so it can be restored with restore_save_dict.
+    The characters are restored into the same Character objects, which undo actions may still reference.
+
+    :param save_dict: the parsed save dictionary
+    :return: the snapshot
+    """
+    snapshot = {key: copy.deepcopy(value) for key, value in save_dict.items() if key != character_tag}
+    snapshot[character_tag] = {tag: (char, copy.copy(char)) for tag, char in save_dict[character_tag].items()}
+    return snapshot
+
+
+def restore_save_dict(save_dict: dict, snapshot: dict):
+    """
+    Returns a parsed save dictionary to the state of a snapshot, a snapshot can only be restored once
+
+    :param save_dict: the parsed save dictionary the snapshot was taken of
+    :param snapshot: the snapshot returned by snapshot_save_dict
+    """
+    chars = {}
+    for tag, (char, saved_char) in snapshot.pop(character_tag).items():
+        for field in Character.__slots__:
+            setattr(char, field, getattr(saved_char, field))
+        chars[tag] = char
+    save_dict.clear()
+    save_dict.update(snapshot)
+    save_dict[character_tag] = chars
+
+
+def get_file_cache_stats() -> dict[str, int]:
+    """
+    Gets the number and estimated size of the save_files in memory, together with the hit, miss and eviction counts
+
+    :return: the statistics of the loaded file cache
+    """
+    return file_dict.get_stats()
+
+
 def unload_all_files_and_users():
     global file_dict, ID_dict
+    flush_all_saves()
     file_dict.clear()
     ID_dict.clear()
 
@@ -185,11 +359,151 @@ def rem_player_from_save(executing_user: str, rem_user: str) -> str:
         return f"player {rem_user} is not part of savefile {get_loaded_filename(executing_user)}"
 
     players.remove(rem_user)
-    for char in get_loaded_chars(executing_user).values():
-        if char.player == rem_user:
-            char.set_player("")
+    char_tag = player_index.get_player_char_tag(_dict, rem_user)
+    if char_tag is not None:
+        save_journal.mark_char_touched(get_loaded_filename(executing_user), char_tag)
+        player_index.set_char_player(_dict, _dict[character_tag][char_tag], "")
     _dict[players_tag] = players
     ret = f"player {rem_user} removed from save_file {get_loaded_filename(executing_user)}"
     logger.info(ret)
     return ret
 
+
+class SaveLock:
+    """
+    Read/write lock of a single save for the coroutines of the bot. Readers share the lock, while a writer holds it
+    alone. Waiting writers are let in before new readers, so a stream of reads cannot starve them. The task holding the
+    write lock can acquire it again, but a task holding a read lock cannot upgrade it to a write lock.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer: Optional[asyncio.Task] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._waiting = 0
+
+    def is_idle(self) -> bool:
+        return self._readers == 0 and self._writer is None and self._waiting == 0
+
+    async def acquire(self, write: bool) -> bool:
+        """
+        :param write: True for the write lock, False for a read lock
+        :return: True if the coroutine had to wait for the lock
+        """
+        task = asyncio.current_task()
+        if self._writer is task:
+            self._writer_depth += 1
+            return False
+        contended = False
+        self._waiting += 1
+        try:
+            async with self._condition:
+                if write:
+                    self._waiting_writers += 1
+                    try:
+                        while self._writer is not None or self._readers > 0:
+                            contended = True
+                            await self._condition.wait()
+                    finally:
+                        self._waiting_writers -= 1
+                    self._writer = task
+                    self._writer_depth = 1
+                else:
+                    while self._writer is not None or self._waiting_writers > 0:
+                        contended = True
+                        await self._condition.wait()
+                    self._readers += 1
+        finally:
+            self._waiting -= 1
+        return contended
+
+    async def release(self):
+        async with self._condition:
+            if self._writer is asyncio.current_task():
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+            else:
+                self._readers -= 1
+            self._condition.notify_all()
+
+
+# save_name -> lock of the save, a lock is removed once nobody holds or waits for it
+_save_locks: dict[str, SaveLock] = {}
+_lock_stats = {
+    "read_acquired": 0,
+    "write_acquired": 0,
+    "read_contended": 0,
+    "write_contended": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0
+}
+
+
+@contextlib.asynccontextmanager
+async def lock_save(_save_name: Optional[str], write: bool = True) -> AsyncIterator[None]:
+    """
+    Holds the lock of a save while the body runs. Commands changing a save take the write lock, commands only
+    reading it take a read lock, so they can run alongside each other. Once the lock is held, a save that was changed
+    by another bot process is reloaded, this is the only check for such changes a command makes.
+
+    :param _save_name: the save_name without suffix, None if there is nothing to lock
+    :param write: True if the body changes the save
+    :raises SaveConflictException: if another bot process changed the save while this one had unwritten changes
+    """
+    if _save_name is None:
+        yield
+        return
+    lock = _save_locks.get(_save_name)
+    if lock is None:
+        lock = SaveLock()
+        _save_locks[_save_name] = lock
+    started = time.perf_counter()
+    contended = await lock.acquire(write)
+    _record_lock_acquisition(write, contended, time.perf_counter() - started)
+    try:
+        reload_file_if_stale(_save_name)
+        yield
+    finally:
+        await lock.release()
+        if lock.is_idle() and _save_locks.get(_save_name) is lock:
+            del _save_locks[_save_name]
+
+
+def lock_loaded_save(user_id: str, write: bool = True) -> contextlib.AbstractAsyncContextManager:
+    """
+    Locks the save that is loaded by a user, see lock_save
+
+    :param user_id: the id of the user
+    :param write: True if the save is changed while the lock is held
+    """
+    return lock_save(get_loaded_filename(user_id), write)
+
+
+def get_save_lock_stats() -> dict[str, float]:
+    """
+    Gets how often save locks were acquired and how often and how long commands had to wait for them
+
+    :return: the lock statistics
+    """
+    stats = dict(_lock_stats)
+    stats["locked_saves"] = len(_save_locks)
+    return stats
+
+
+def reset_save_lock_stats():
+    for key in _lock_stats:
+        _lock_stats[key] = 0 if key.endswith("acquired") or key.endswith("contended") else 0.0
+
+
+def _record_lock_acquisition(write: bool, contended: bool, wait_seconds: float):
+    mode = "write" if write else "read"
+    _lock_stats[f"{mode}_acquired"] += 1
+    if contended:
+        _lock_stats[f"{mode}_contended"] += 1
+        logger.debug(f"waited {wait_seconds * 1000:.1f}ms for a {mode} lock")
+    _lock_stats["wait_seconds"] += wait_seconds
+    _lock_stats["max_wait_seconds"] = max(_lock_stats["max_wait_seconds"], wait_seconds)
+
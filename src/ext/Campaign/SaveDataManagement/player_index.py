@@ -0,0 +1,82 @@
+from typing import Optional
+
+from ..Character import Character
+from . import save_file_management as save_manager
+
+# key of the player index inside a parsed save dictionary, the index is only kept in memory and never written
+player_index_tag = "player_index"
+
+
+def build_player_index(chars: dict[str, Character]) -> dict[str, str]:
+    """
+    :param chars: the characters of a parsed save dictionary
+    :return: player id -> tag of the character claimed by the player. If older saves assigned several characters to
+        one player, the first one is indexed.
+    """
+    index = {}
+    for char in chars.values():
+        if char.player != "" and char.player not in index:
+            index[char.player] = char.tag
+    return index
+
+
+def get_player_index(save_dict: dict) -> dict[str, str]:
+    """
+    Gets the player index of a parsed save dictionary, it is built on first use
+
+    :param save_dict: the parsed save dictionary
+    :return: player id -> character tag
+    """
+    index = save_dict.get(player_index_tag)
+    if index is None:
+        index = build_player_index(save_dict[save_manager.character_tag])
+        save_dict[player_index_tag] = index
+    return index
+
+
+def get_player_char_tag(save_dict: dict, player: str) -> Optional[str]:
+    """
+    :param save_dict: the parsed save dictionary
+    :param player: the discord id of the player
+    :return: the tag of the character claimed by the player or None if the player has no character
+    """
+    return get_player_index(save_dict).get(player)
+
+
+def index_char(save_dict: dict, char: Character):
+    """
+    Adds the player of a character to the index, needs to be called when a character is added to the save
+    """
+    if char.player != "":
+        get_player_index(save_dict).setdefault(char.player, char.tag)
+
+
+def unindex_char(save_dict: dict, char: Character):
+    """
+    Removes the player of a character from the index, needs to be called when a character is removed from the save
+    """
+    index = get_player_index(save_dict)
+    if char.player != "" and index.get(char.player) == char.tag:
+        del index[char.player]
+
+
+def set_char_player(save_dict: dict, char: Character, player: str):
+    """
+    Assigns a character to a player and keeps the index up to date
+
+    :param save_dict: the parsed save dictionary containing the character
+    :param char: the character
+    :param player: the discord id of the player or "" to unassign the character
+    """
+    unindex_char(save_dict, char)
+    char.set_player(player)
+    index_char(save_dict, char)
+
+
+def retag_char(save_dict: dict, char: Character, new_tag: str):
+    """
+    Changes the tag of a character and keeps the index up to date, the character dictionary is not changed
+    """
+    unindex_char(save_dict, char)
+    char.tag = new_tag
+    index_char(save_dict, char)
@@ -1,15 +1,30 @@
-import json
+import contextlib
 import logging
 import os
+import tempfile
+import threading
 from datetime import datetime
+from io import BytesIO
 from os.path import exists
 from os import mkdir
+from typing import Iterator, Optional
 from discord import File
 from ..Character import Character
-from ..campaign_exceptions import SaveFileNotFoundException
+from ..campaign_exceptions import SaveFileNotFoundException, SaveConflictException
 from ..packg_variables import get_save_folder_filepath, get_cache_folder_filepath
+from . import save_writer, save_journal, sqlite_saves, save_migrations, save_index
+from .... import json_codec
+
+try:
+    import fcntl
+except ImportError:
+    # advisory file locks are only available on unix, elsewhere only a single bot process may use the saves folder
+    fcntl = None
 
 save_files_suffix = '_save.json'
+temp_files_suffix = '.tmp'
+lock_folder_name = 'locks'
+lock_files_suffix = '.lock'
 save_type_version = 1.3
 date_time_save_format = "%Y-%m-%d %H:%M:%S"
 character_tag = 'characters'
@@ -18,9 +33,15 @@ version_tag = 'v'
 session_tag = 'session'
 players_tag = 'players'
 admin_tag = 'admin'
+# "json" stores every save in its own file, "sqlite" stores all saves in one database with a row per character
+SAVE_BACKEND = os.environ.get("SAVE_BACKEND", "json").lower()
 
 logger = logging.getLogger('bot')
 
+_stamps_lock = threading.Lock()
+# save_name -> stamp of the stored save as this process last read or wrote it
+_known_stamps: dict[str, tuple] = {}
+
 
 def setup_save_folders():
     """
@@ -32,17 +53,29 @@ def setup_save_folders():
     if not exists(get_cache_folder_filepath()):
         logger.debug("CACHE_FILEPATH_CREATED")
         mkdir(get_cache_folder_filepath())
+    for file_name in os.listdir(get_save_folder_filepath()):
+        if file_name.endswith(temp_files_suffix):
+            logger.info(f"removed unfinished savefile write {file_name}")
+            os.remove(os.path.join(get_save_folder_filepath(), file_name))
 
 
 def get_savefile_as_discord_file(_save_name) -> File:
     """
-    Gets a File object pointing to a save_file on the hard drive
+    Gets a File object pointing to a save_file on the hard drive. Commands flush the save with
+    save_writer.flush_save_async first, so no write is left for this function to wait for.
 
     :param _save_name: the save_file name without suffix
     :return: The file object
     :raises SaveFileNotFoundException: if file by the given name is not found
     """
 
+    save_writer.flush_save(_save_name)
+    if use_sqlite_backend():
+        save_dic = sqlite_saves.read_save(_save_name)
+        if save_dic is None:
+            raise SaveFileNotFoundException()
+        output = json_codec.encode_file(save_dic)
+        return File(BytesIO(output), filename=_save_name + save_files_suffix)
     file_path = build_savefile_path(_save_name)
     if not exists(file_path):
         raise SaveFileNotFoundException()
@@ -51,14 +84,43 @@ def get_savefile_as_discord_file(_save_name) -> File:
 
 def check_savefile_existence(_save_name) -> bool:
     """
-    Checks if save_file of given name exists on the hard drive
+    Checks if save_file of given name exists on the hard drive or is about to be written to it
 
     :param _save_name: the save_file name without suffix
     :return: True if save_file exists, False otherwise
     """
+    return save_writer.is_save_pending(_save_name) or save_index.is_save_indexed(_save_name) \
+        or stored_save_exists(_save_name) or save_journal.journal_exists(_save_name)
+
+
+def use_sqlite_backend() -> bool:
+    return SAVE_BACKEND == "sqlite"
+
+
+def stored_save_exists(_save_name) -> bool:
+    """
+    Checks if the storage of the configured backend contains a save, ignoring pending writes and journals
+
+    :param _save_name: the save_file name without suffix
+    :return: True if the save is stored
+    """
+    if use_sqlite_backend():
+        return sqlite_saves.save_exists(_save_name)
     return exists(build_savefile_path(_save_name))
 
 
+def list_save_names() -> list[str]:
+    """
+    Lists the names of every stored save
+
+    :return: the save_file names without suffix
+    """
+    if use_sqlite_backend():
+        return sqlite_saves.list_saves()
+    return sorted(file_name[:-len(save_files_suffix)] for file_name in os.listdir(get_save_folder_filepath())
+                  if file_name.endswith(save_files_suffix))
+
+
 def remove_save_file(_save_name) -> None:
     """
     Removes the save_file with the given name from the hard drive
@@ -68,10 +130,19 @@ def remove_save_file(_save_name) -> None:
     """
     if _save_name == "":
         raise Exception("cannot remove file with empty name")
-    path = build_savefile_path(_save_name)
-    if exists(path):
-        logger.info("deleted savefile", _save_name)
-        os.remove(path)
+    save_writer.discard_pending_save(_save_name)
+    with lock_save_file(_save_name):
+        save_journal.remove_journal(_save_name)
+        save_index.remove_save_summary(_save_name)
+        forget_save_stamp(_save_name)
+        if use_sqlite_backend():
+            sqlite_saves.delete_save(_save_name)
+            logger.info(f"deleted save {_save_name}")
+            return
+        path = build_savefile_path(_save_name)
+        if exists(path):
+            logger.info("deleted savefile", _save_name)
+            os.remove(path)
 
 
 def compare_savefile_novelty_by_path(path1: str, path2: str) -> int:
@@ -84,10 +155,8 @@ def compare_savefile_novelty_by_path(path1: str, path2: str) -> int:
     """
     if not exists(path1) or not exists(path2):
         raise Exception(f"cannot compare files that don't exist: \npath1: {path1} \npath2: {path2}")
-    with open(path1) as file1:
-        path1_dic = json.load(file1)
-    with open(path2) as file2:
-        path2_dic = json.load(file2)
+    path1_dic = json_codec.read_file(path1)
+    path2_dic = json_codec.read_file(path2)
 
     return compare_unparsed_dict_novelty(path1_dic, path2_dic)
 
@@ -95,7 +164,7 @@ def compare_savefile_novelty_by_path(path1: str, path2: str) -> int:
 def save_file_to_parsed_dictionary(_save_name) -> dict:
     """
     Loads the save file with the given name from the hard drive, parses it, and updates
-    it to the newest save_file version if necessary.
+    it to the newest save_file version if necessary. An updated save is written with the next regular write.
 
     :param _save_name: the name of the save file to be loaded
     :return: the parsed save_file dictionary
@@ -110,26 +179,32 @@ def save_file_to_parsed_dictionary(_save_name) -> dict:
     for char_tag, char_data in save_dict[character_tag].items():
         returned_dict[character_tag][char_tag] = json_dict_to_character(char_data)
     if updated:
-        save_data_to_file(_save_name, returned_dict)
+        save_writer.mark_save_dirty(_save_name, returned_dict)
         logger.info(f"Updated {_save_name} to newest version and loaded into memory.")
     return returned_dict
 
 
 def save_file_to_unparsed_dict(_save_name) -> dict:
     """
-    Gets the pure unparsed json dictionary from a save_file
+    Gets the pure unparsed json dictionary from a save_file, with all operations of its journal applied
 
     :param _save_name: the name of the save_file without the suffix
     :return: The pure json dictionary
     :raises SaveFileNotFoundException: if a file of this name cannot be found
     """
-    save_path = build_savefile_path(_save_name)
+    save_writer.flush_save(_save_name)
+    save_dic = None
+    with lock_save_file(_save_name, exclusive=False):
+        if use_sqlite_backend():
+            save_dic = sqlite_saves.read_save(_save_name)
+        elif exists(build_savefile_path(_save_name)):
+            save_dic = json_codec.read_file(build_savefile_path(_save_name))
+        save_dic = save_journal.replay_journal(_save_name, save_dic)
+        remember_save_stamp(_save_name)
     # file was deleted while a user was accessing it
-    if not exists(save_path):
+    if save_dic is None:
         raise SaveFileNotFoundException()
-    with open(save_path) as file:
-        save_dic = json.load(file)
-        return save_dic
+    return save_dic
 
 
 def save_data_to_file(_save_name: str, export_dic: dict) -> None:
@@ -144,22 +219,247 @@ def save_data_to_file(_save_name: str, export_dic: dict) -> None:
         raise Exception("A file with an empty name cannot be saved to storage")
     if export_dic is None:
         raise Exception("Trying to save an empty dictionary as a save")
+    write_save_output(_save_name, build_save_output(_save_name, export_dic))
+
+
+def build_save_output(_save_name: str, export_dic: dict) -> dict:
+    """
+    Builds the json dictionary that is written into a save_file and updates the last_change timestamp of the parsed
+    dictionary. The result shares no mutable data with the parsed dictionary, so it can be written from another thread.
+
+    :param _save_name: the name of the save_file without the suffix
+    :param export_dic: The parsed save_file dictionary that should be exported
+    :return: the json dictionary
+    """
+    change_time = datetime.now().replace(microsecond=0)
+    export_dic[last_changed_tag] = change_time
+    output = create_fresh_save(export_dic[admin_tag])
+    output[session_tag] = export_dic[session_tag]
+    output[last_changed_tag] = change_time.strftime(date_time_save_format)
+    output[players_tag] = list(export_dic[players_tag])
+    for char in export_dic[character_tag].values():
+        output[character_tag][char.tag] = char.to_dict()
+    if save_journal.SAVE_JOURNAL_ENABLED:
+        output[save_journal.journal_seq_tag] = save_journal.get_journal_seq(_save_name)
+    return output
+
+
+def write_save_output(_save_name: str, output: dict) -> None:
+    """
+    Writes an already built json dictionary into the storage of the configured backend. Afterwards the journal
+    operations contained in the written save are removed from the journal.
+
+    :param _save_name: the name of the save_file without the suffix
+    :param output: the json dictionary created by build_save_output
+    :raises SaveConflictException: if another process changed the stored save since this process last read or wrote it
+    """
+    with compare_and_swap_save(_save_name):
+        if use_sqlite_backend():
+            sqlite_saves.write_save(_save_name, output)
+        else:
+            write_save_output_file(_save_name, output)
+        if save_journal.journal_seq_tag in output:
+            save_journal.compact_journal(_save_name, output[save_journal.journal_seq_tag])
+        # the summary keeps the stamp of the save after its journal was compacted
+        save_index.update_save_summary(_save_name, output)
+
+
+def write_save_output_file(_save_name: str, output: dict) -> None:
+    """
+    Writes a json dictionary into a save_file on the hard drive. The data is written into a temporary file first,
+    which then replaces the save_file, so a crash during the write never leaves a broken save_file behind.
+
+    :param _save_name: the name of the save_file without the suffix
+    :param output: the json dictionary created by build_save_output
+    """
     save_path = build_savefile_path(_save_name)
     created = not exists(save_path)
+    write_json_file(save_path, output)
+    if created:
+        logger.info("created savefile " + _save_name)
+
+
+def write_json_file(file_path: str, output: dict) -> None:
+    """
+    Writes a json dictionary into a temporary file next to the given path, which then replaces the file at the path
+
+    :param file_path: the path of the file
+    :param output: the json dictionary
+    """
+    folder_path = os.path.dirname(file_path)
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=folder_path, prefix=os.path.basename(file_path), suffix=temp_files_suffix
+    )
+    try:
+        with os.fdopen(file_descriptor, 'wb') as newfile:
+            newfile.write(json_codec.encode_file(output))
+            newfile.flush()
+            os.fsync(newfile.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_folder(folder_path)
+
+
+def import_save_file(file_path: str, _save_name: str) -> None:
+    """
+    Replaces a stored save with a json save_file, for example one downloaded from the cloud save channel.
+    The imported file is removed afterwards.
+
+    :param file_path: the path of the json save_file
+    :param _save_name: the name of the save without the suffix
+    """
+    save_writer.discard_pending_save(_save_name)
+    with lock_save_file(_save_name):
+        save_journal.remove_journal(_save_name)
+        save_index.remove_save_summary(_save_name)
+        # the imported save is read again on its next access, in every process
+        forget_save_stamp(_save_name)
+        if use_sqlite_backend():
+            save_dic = json_codec.read_file(file_path)
+            sqlite_saves.write_save(_save_name, save_dic)
+            os.remove(file_path)
+        else:
+            os.replace(file_path, build_savefile_path(_save_name))
+
+
+def build_lockfile_path(_save_name: str) -> str:
+    """
+    Builds the path of the lock file of a save. Lock files are kept apart from the save_files, as those are replaced
+    on every write, and they are never removed, so every process always locks the same file.
+
+    :param _save_name: The save_file name without suffix
+    :return: the built file path
+    """
+    return os.path.join(get_save_folder_filepath(), lock_folder_name, _save_name + lock_files_suffix)
+
+
+@contextlib.contextmanager
+def lock_save_file(_save_name: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    Holds an advisory lock on a save while the body runs, shared by every bot process using the saves folder.
+    Reading a save takes a shared lock, changing its stored data or journal takes the exclusive lock.
+    Does nothing on systems without fcntl. The lock is not reentrant, the body must not lock the same save again.
+
+    :param _save_name: the save_file name without suffix
+    :param exclusive: True if the body changes the stored save
+    """
+    with lock_file(build_lockfile_path(_save_name), exclusive):
+        yield
+
+
+@contextlib.contextmanager
+def lock_file(lock_path: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    Holds an advisory lock on a lock file while the body runs, the lock file is created if it is missing.
+    Does nothing on systems without fcntl.
+
+    :param lock_path: the path of the lock file
+    :param exclusive: True for an exclusive lock, False for a shared lock
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a') as opened_lock:
+        fcntl.flock(opened_lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(opened_lock.fileno(), fcntl.LOCK_UN)
+
+
+def get_save_stamp(_save_name: str) -> tuple:
+    """
+    Gets a stamp of the stored save and its journal, which changes whenever either of them is written
+
+    :param _save_name: the save_file name without suffix
+    :return: the version of the database row or the inode, modification time and size of the save_file, together with
+        those of the journal. None for a missing save or journal
+    """
+    if use_sqlite_backend():
+        stored_stamp = sqlite_saves.get_save_version(_save_name)
+    else:
+        stored_stamp = get_file_stamp(build_savefile_path(_save_name))
+    return stored_stamp, get_file_stamp(save_journal.build_journal_path(_save_name))
+
+
+def get_file_stamp(file_path: str) -> Optional[tuple[int, int, int]]:
+    """
+    :param file_path: the path of a file
+    :return: the inode, modification time and size of the file, None if it is missing
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def remember_save_stamp(_save_name: str):
+    """
+    Stores the current stamp of a save, used after this process read or wrote the save while holding its lock
+
+    :param _save_name: the save_file name without suffix
+    """
+    stamp = get_save_stamp(_save_name)
+    with _stamps_lock:
+        _known_stamps[_save_name] = stamp
+
+
+def forget_save_stamp(_save_name: str):
+    with _stamps_lock:
+        _known_stamps.pop(_save_name, None)
+
+
+def is_save_stale(_save_name: str) -> bool:
+    """
+    Checks if another process changed the stored save since this process last read or wrote it.
+    Saves this process never read are never stale.
+
+    :param _save_name: the save_file name without suffix
+    :return: True if the save in memory is outdated
+    """
+    with _stamps_lock:
+        known_stamp = _known_stamps.get(_save_name)
+    return known_stamp is not None and known_stamp != get_save_stamp(_save_name)
+
+
+@contextlib.contextmanager
+def compare_and_swap_save(_save_name: str) -> Iterator[None]:
+    """
+    Holds the exclusive lock of a save while the body changes its stored data or journal, after making sure no other
+    process changed the save since this process last read or wrote it. Afterwards the new stamp of the save is stored.
+
+    :param _save_name: the save_file name without suffix
+    :raises SaveConflictException: if the save was changed by another process
+    """
+    with lock_save_file(_save_name):
+        if is_save_stale(_save_name):
+            raise SaveConflictException()
+        yield
+        remember_save_stamp(_save_name)
 
-    with open(save_path, 'w') as newfile:
-        change_time = datetime.now().replace(microsecond=0)
-        export_dic[last_changed_tag] = change_time
-        output = create_fresh_save(export_dic[admin_tag])
-        output[session_tag] = export_dic[session_tag]
-        output[last_changed_tag] = change_time.strftime(date_time_save_format)
-        output[players_tag] = export_dic[players_tag]
-        for char in export_dic[character_tag].values():
-            temp = char.__dict__
-            output[character_tag][temp['tag']] = temp
-        json.dump(output, newfile, sort_keys=True, indent=4)
-        if created:
-            logger.info("created savefile " + _save_name)
+
+def fsync_folder(folder_path: str) -> None:
+    """
+    Makes sure a rename inside the folder is stored on the hard drive. Not every OS supports opening folders,
+    in that case this does nothing.
+
+    :param folder_path: the path of the folder
+    """
+    try:
+        folder_descriptor = os.open(folder_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(folder_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(folder_descriptor)
 
 
 def json_dict_to_character(char_dic: dict) -> Character:
@@ -168,11 +468,9 @@ def json_dict_to_character(char_dic: dict) -> Character:
 
     :param char_dic: the loaded dictionary containing infos of a single character
     :return: The created character object
+    :raises CharacterDataException: if the dictionary contains unknown stats or stats of the wrong type
     """
-    char = Character("debug", "debug")
-    for key, value in char_dic.items():
-        char.__dict__[key] = value
-    return char
+    return Character.from_dict(char_dic)
 
 
 def str_to_datetime(time_string: str) -> datetime:
@@ -224,15 +522,7 @@ def check_file_version_and_update(save_file_data: dict) -> (bool, dict):
     :param save_file_data: The dictionary containing all infos of a single parsed json save file
     :return: tuple[bool, dict]. bool is true if the file was updated, dict is the updated dictionary
     """
-    global save_type_version, version_tag
-    if version_tag in save_file_data and float(save_file_data[version_tag]) >= save_type_version:
-        return False, save_file_data
-    else:
-        fresh_save = create_fresh_save()
-        for key in save_file_data.keys():
-            fresh_save[key] = save_file_data[key]
-
-    return True, fresh_save
+    return save_migrations.migrate_save_dict(save_file_data)
 
 
 def compare_unparsed_dict_novelty(dic1: dict, dic2: dict) -> int:
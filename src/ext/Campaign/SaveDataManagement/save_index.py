@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from ..campaign_exceptions import SaveFileNotFoundException
+from . import save_file_management as save_manager, sqlite_saves, save_journal, save_writer
+from .... import json_codec
+
+logger = logging.getLogger('bot')
+
+
+class SaveSummary:
+    """
+    The values of a save needed to check access to it, without its characters. The stamp is the save stamp of
+    save_file_management the values were read or written with, a summary with another stamp is outdated.
+    """
+
+    def __init__(self, admin: str, players: tuple[str, ...], last_change: str, version: float,
+                 stamp: Optional[tuple] = None):
+        self.admin = admin
+        self.players = players
+        self.last_change = last_change
+        self.version = version
+        self.stamp = stamp
+
+
+_lock = threading.Lock()
+_summaries: dict[str, SaveSummary] = {}
+
+
+def summarize_save(save_dic: dict, stamp: Optional[tuple] = None) -> SaveSummary:
+    """
+    :param save_dic: the unparsed json dictionary of a save, or a parsed save dictionary
+    :param stamp: the stamp of the stored save the dictionary was read from
+    :return: the summary of the save
+    """
+    last_change = save_dic[save_manager.last_changed_tag]
+    if not isinstance(last_change, str):
+        last_change = last_change.strftime(save_manager.date_time_save_format)
+    return SaveSummary(save_dic.get(save_manager.admin_tag, ""),
+                       tuple(save_dic.get(save_manager.players_tag, ())),
+                       last_change,
+                       float(save_dic.get(save_manager.version_tag, 0)),
+                       stamp)
+
+
+def build_save_index() -> int:
+    """
+    Replaces the index with the summaries of every stored save. Json save_files are parsed one at a time and only
+    their summary is kept, the sqlite backend only reads the save rows without characters.
+
+    :return: the amount of indexed saves
+    """
+    started = time.perf_counter()
+    summaries = {}
+    if save_manager.use_sqlite_backend():
+        for _save_name, save_values, save_version in sqlite_saves.read_all_save_values():
+            journal_stamp = save_manager.get_file_stamp(save_journal.build_journal_path(_save_name))
+            summaries[_save_name] = summarize_save(save_values, (save_version, journal_stamp))
+    else:
+        folder_path = save_manager.get_save_folder_filepath()
+        save_names = set()
+        for entry in os.scandir(folder_path):
+            for suffix in (save_manager.save_files_suffix, save_journal.journal_suffix):
+                if entry.name.endswith(suffix):
+                    save_names.add(entry.name[:-len(suffix)])
+        for _save_name in save_names:
+            try:
+                # the stamp is taken first, so a write during the read outdates the summary
+                stamp = save_manager.get_save_stamp(_save_name)
+                summaries[_save_name] = summarize_save(read_save_values(_save_name), stamp)
+            except Exception as e:
+                logger.error(f"{_save_name}: could not be indexed: {e}")
+    with _lock:
+        _summaries.clear()
+        _summaries.update(summaries)
+    logger.info(f"indexed {len(summaries)} saves in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return len(summaries)
+
+
+def update_save_summary(_save_name: str, save_dic: dict):
+    """
+    Updates the summary of a save after it was written, while the lock of the save is still held
+
+    :param _save_name: the save_file name without suffix
+    :param save_dic: the written json dictionary
+    """
+    summary = summarize_save(save_dic, save_manager.get_save_stamp(_save_name))
+    with _lock:
+        _summaries[_save_name] = summary
+
+
+def remove_save_summary(_save_name: str):
+    with _lock:
+        _summaries.pop(_save_name, None)
+
+
+def is_save_indexed(_save_name: str) -> bool:
+    with _lock:
+        return _save_name in _summaries
+
+
+def get_save_summary(_save_name: str) -> SaveSummary:
+    """
+    Gets the summary of a save. Saves that are not indexed yet, for example because they were copied into the saves
+    folder while the bot was running, and saves changed by another bot process since they were indexed are read again.
+
+    :param _save_name: the save_file name without suffix
+    :return: the summary of the save
+    :raises SaveFileNotFoundException: if the save does not exist
+    """
+    stamp = save_manager.get_save_stamp(_save_name)
+    with _lock:
+        summary = _summaries.get(_save_name)
+    if summary is not None and summary.stamp == stamp:
+        return summary
+    if not save_manager.check_savefile_existence(_save_name):
+        raise SaveFileNotFoundException()
+    summary = summarize_save(read_save_values(_save_name), stamp)
+    with _lock:
+        _summaries[_save_name] = summary
+    return summary
+
+
+def read_save_values(_save_name: str) -> dict:
+    # the journal and pending writes are only involved if there are any, so indexing does not fill the journal state
+    if save_writer.is_save_pending(_save_name) or save_journal.journal_exists(_save_name):
+        return save_manager.save_file_to_unparsed_dict(_save_name)
+    if save_manager.use_sqlite_backend():
+        save_dic = sqlite_saves.read_save(_save_name)
+        if save_dic is None:
+            raise SaveFileNotFoundException()
+        return save_dic
+    return json_codec.read_file(save_manager.build_savefile_path(_save_name))
+
+
+def clear_save_index():
+    with _lock:
+        _summaries.clear()
@@ -0,0 +1,260 @@
+import copy
+import logging
+import os
+import threading
+from json import JSONDecodeError
+from os.path import exists
+from typing import Optional
+
+from . import save_file_management as save_manager
+from .... import json_codec
+
+# the journal keeps changes made between two delayed save writes safe from a crash, set SAVE_JOURNAL=0 to disable it
+SAVE_JOURNAL_ENABLED = os.environ.get("SAVE_JOURNAL") != "0"
+journal_suffix = '_journal.jsonl'
+journal_seq_tag = 'journal_seq'
+
+# operation types written into the journal
+OP_FULL = 'full'
+OP_CHAR = 'char'
+OP_DELETE_CHAR = 'del'
+OP_SET = 'set'
+
+logger = logging.getLogger('bot')
+
+_lock = threading.Lock()
+# json state of every save as it was last written into the journal
+_journaled_states: dict[str, dict] = {}
+_journal_seqs: dict[str, int] = {}
+# tags of the characters of every save that may have changed since its last journal entry
+_touched_chars: dict[str, set[str]] = {}
+
+
+def build_journal_path(_save_name: str) -> str:
+    """
+    Builds the path of the operation journal that belongs to a save_file
+
+    :param _save_name: The save_file name without suffix
+    :return: the built file path
+    """
+    return os.sep.join([save_manager.get_save_folder_filepath(), _save_name + journal_suffix])
+
+
+def journal_exists(_save_name: str) -> bool:
+    return exists(build_journal_path(_save_name))
+
+
+def get_journal_seq(_save_name: str) -> int:
+    """
+    Gets the sequence number of the last operation journaled for a save. A save_file written with this number
+    already contains every journaled operation up to it.
+
+    :param _save_name: the save_file name without suffix
+    :return: the sequence number
+    """
+    with _lock:
+        return _journal_seqs.get(_save_name, 0)
+
+
+def get_journaled_save_keys() -> tuple[str, ...]:
+    return save_manager.session_tag, save_manager.admin_tag, save_manager.players_tag
+
+
+def mark_char_touched(_save_name: str, char_tag: str):
+    """
+    Records that a character of a loaded save is about to be changed, so the next journal entry of the save compares
+    it with its journaled state. Added and removed characters are noticed without being marked.
+
+    :param _save_name: the save_file name without suffix
+    :param char_tag: the tag of the character
+    """
+    if not SAVE_JOURNAL_ENABLED:
+        return
+    with _lock:
+        _touched_chars.setdefault(_save_name, set()).add(char_tag)
+
+
+def collect_changes(_save_name: str, save_dict: dict) -> list[str]:
+    """
+    Compares a parsed save dictionary with the state that was last journaled and builds a journal entry for every
+    changed character and save value. Only the characters marked with mark_char_touched and the characters that
+    were added or removed are compared. The first change of a save that was never journaled records the full save.
+    The entries count as journaled right away, they are written to the hard drive by append_changes.
+
+    :param _save_name: the save_file name without suffix
+    :param save_dict: the parsed save dictionary
+    :return: the journal lines of the changes
+    """
+    if not SAVE_JOURNAL_ENABLED:
+        return []
+    with _lock:
+        journaled_state = _journaled_states.get(_save_name)
+        touched_chars = _touched_chars.pop(_save_name, set())
+        operations = []
+        if journaled_state is None:
+            journaled_state = {key: copy.deepcopy(save_dict[key]) for key in get_journaled_save_keys()}
+            journaled_state[save_manager.character_tag] = {
+                tag: char.to_dict() for tag, char in save_dict[save_manager.character_tag].items()
+            }
+            operations.append({"op": OP_FULL, "data": copy.deepcopy(journaled_state)})
+            _journaled_states[_save_name] = journaled_state
+        else:
+            journaled_chars: dict = journaled_state[save_manager.character_tag]
+            live_chars: dict = save_dict[save_manager.character_tag]
+            for tag in touched_chars | (live_chars.keys() - journaled_chars.keys()):
+                char = live_chars.get(tag)
+                if char is None:
+                    continue
+                char_data = char.to_dict()
+                if journaled_chars.get(tag) != char_data:
+                    journaled_chars[tag] = char_data
+                    operations.append({"op": OP_CHAR, "tag": tag, "data": journaled_chars[tag]})
+            for tag in journaled_chars.keys() - live_chars.keys():
+                del journaled_chars[tag]
+                operations.append({"op": OP_DELETE_CHAR, "tag": tag})
+            for key in get_journaled_save_keys():
+                if journaled_state[key] != save_dict[key]:
+                    journaled_state[key] = copy.deepcopy(save_dict[key])
+                    operations.append({"op": OP_SET, "key": key, "value": journaled_state[key]})
+
+        seq = _journal_seqs.get(_save_name, 0)
+        lines = []
+        for operation in operations:
+            seq += 1
+            operation["seq"] = seq
+            lines.append(json_codec.dumps(operation) + "\n")
+        _journal_seqs[_save_name] = seq
+        return lines
+
+
+def append_changes(_save_name: str, lines: list[str]):
+    """
+    Appends journal lines built by collect_changes to the journal of a save and syncs them to the hard drive.
+    Runs on the thread of the save_writer, as it waits for the file lock of the save and the hard drive.
+
+    :param _save_name: the save_file name without suffix
+    :param lines: the journal lines
+    :raises SaveConflictException: if another process changed the stored save since this process last read or wrote it
+    """
+    with save_manager.compare_and_swap_save(_save_name):
+        with open(build_journal_path(_save_name), 'a') as journal:
+            journal.writelines(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+
+def replay_journal(_save_name: str, save_dic: Optional[dict]) -> Optional[dict]:
+    """
+    Applies every journaled operation that is newer than the given unparsed save dictionary. A journal that ends in
+    a partially written line is replayed up to that line.
+
+    :param _save_name: the save_file name without suffix
+    :param save_dic: the unparsed json dictionary loaded from the save_file, None if the save_file is missing
+    :return: the dictionary with all operations applied, None if there was neither a save_file nor a journal
+    """
+    base_seq = save_dic.get(journal_seq_tag, 0) if save_dic is not None else 0
+    last_seq = base_seq
+    replayed = 0
+    if SAVE_JOURNAL_ENABLED and journal_exists(_save_name):
+        with open(build_journal_path(_save_name)) as journal:
+            for line in journal:
+                try:
+                    operation = json_codec.loads(line)
+                except JSONDecodeError:
+                    logger.warning(f"{_save_name}: journal ends in an incomplete entry, it was ignored")
+                    break
+                if operation["seq"] <= base_seq:
+                    continue
+                save_dic = _apply_operation(save_dic, operation)
+                last_seq = operation["seq"]
+                replayed += 1
+    if replayed > 0:
+        logger.info(f"{_save_name}: replayed {replayed} journal entries")
+
+    with _lock:
+        _journal_seqs[_save_name] = max(_journal_seqs.get(_save_name, 0), last_seq)
+        _touched_chars.pop(_save_name, None)
+        if save_dic is None:
+            _journaled_states.pop(_save_name, None)
+        else:
+            journaled_state = {key: copy.deepcopy(save_dic[key]) for key in get_journaled_save_keys()}
+            journaled_state[save_manager.character_tag] = copy.deepcopy(save_dic[save_manager.character_tag])
+            _journaled_states[_save_name] = journaled_state
+    return save_dic
+
+
+def compact_journal(_save_name: str, written_seq: int):
+    """
+    Removes every operation from the journal that is already contained in the save_file on the hard drive
+
+    :param _save_name: the save_file name without suffix
+    :param written_seq: the journal sequence number the save_file was written with
+    """
+    with _lock:
+        journal_path = build_journal_path(_save_name)
+        if not exists(journal_path):
+            return
+        with open(journal_path) as journal:
+            remaining = [line for line in journal if _get_line_seq(line) > written_seq]
+        if len(remaining) == 0:
+            os.remove(journal_path)
+        else:
+            temp_path = journal_path + ".tmp"
+            with open(temp_path, 'w') as temp_journal:
+                temp_journal.writelines(remaining)
+                temp_journal.flush()
+                os.fsync(temp_journal.fileno())
+            os.replace(temp_path, journal_path)
+
+
+def forget_journaled_state(_save_name: str):
+    """
+    Forgets the journaled state and sequence number of a save after its journal entries were refused, as they were
+    counted as journaled by collect_changes. Both are read from the hard drive again when the save is loaded.
+
+    :param _save_name: the save_file name without suffix
+    """
+    with _lock:
+        _journaled_states.pop(_save_name, None)
+        _journal_seqs.pop(_save_name, None)
+        _touched_chars.pop(_save_name, None)
+
+
+def remove_journal(_save_name: str):
+    """
+    Removes the journal of a save and forgets its journaled state
+
+    :param _save_name: the save_file name without suffix
+    """
+    with _lock:
+        _journaled_states.pop(_save_name, None)
+        _touched_chars.pop(_save_name, None)
+        if journal_exists(_save_name):
+            os.remove(build_journal_path(_save_name))
+
+
+def _get_line_seq(line: str) -> int:
+    try:
+        return json_codec.loads(line)["seq"]
+    except JSONDecodeError:
+        # an incomplete entry can never be replayed, so it is dropped
+        return -1
+
+
+def _apply_operation(save_dic: Optional[dict], operation: dict) -> Optional[dict]:
+    op_type = operation["op"]
+    if op_type == OP_FULL:
+        new_dic = save_manager.create_fresh_save()
+        if save_dic is not None:
+            new_dic.update(save_dic)
+        new_dic.update(copy.deepcopy(operation["data"]))
+        return new_dic
+    if save_dic is None:
+        raise Exception("save_journal: journal of a missing save_file does not start with a full entry")
+    if op_type == OP_CHAR:
+        save_dic[save_manager.character_tag][operation["tag"]] = operation["data"]
+    elif op_type == OP_DELETE_CHAR:
+        save_dic[save_manager.character_tag].pop(operation["tag"], None)
+    elif op_type == OP_SET:
+        save_dic[operation["key"]] = operation["value"]
+    return save_dic
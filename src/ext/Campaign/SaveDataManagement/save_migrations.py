@@ -0,0 +1,189 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from . import save_file_management as save_manager, sqlite_saves
+from .... import json_codec
+
+logger = logging.getLogger('bot')
+
+MIGRATION_UPDATED = "updated"
+MIGRATION_CURRENT = "current"
+MIGRATION_FAILED = "failed"
+
+
+class SaveMigration:
+    def __init__(self, from_version: float, to_version: float, migrate: Callable[[dict], dict]):
+        self.from_version = from_version
+        self.to_version = to_version
+        self.migrate = migrate
+
+
+# save_type_version a migration starts from -> the migration
+_migrations: dict[float, SaveMigration] = {}
+
+
+def register_migration(from_version: float, to_version: float):
+    """
+    Registers a function that updates an unparsed save dictionary from one save_type_version to the next.
+    A save is handled by the migration with the highest from_version that is not above the version of the save,
+    so a migration also covers the versions between its from_version and to_version.
+
+    :param from_version: the oldest save version the migration can update
+    :param to_version: the version of the saves returned by the migration
+    """
+    if to_version <= from_version:
+        raise ValueError("a migration has to update a save to a newer version")
+
+    def decorator(migrate: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        if from_version in _migrations:
+            raise ValueError(f"a migration starting at version {from_version} is already registered")
+        _migrations[from_version] = SaveMigration(from_version, to_version, migrate)
+        return migrate
+    return decorator
+
+
+def get_save_version(save_dic: dict) -> float:
+    return float(save_dic.get(save_manager.version_tag, 0))
+
+
+def find_migration(version: float) -> Optional[SaveMigration]:
+    from_versions = [from_version for from_version in _migrations if from_version <= version]
+    return _migrations[max(from_versions)] if len(from_versions) > 0 else None
+
+
+def migrate_save_dict(save_dic: dict) -> (bool, dict):
+    """
+    Runs every migration needed to bring an unparsed save dictionary to the current save_type_version
+
+    :param save_dic: the unparsed json dictionary of a save
+    :return: tuple[bool, dict]. bool is true if the save was migrated, dict is the migrated dictionary
+    :raises Exception: if no registered migration leads from the version of the save to the current version
+    """
+    version = get_save_version(save_dic)
+    if version >= save_manager.save_type_version:
+        return False, save_dic
+    while version < save_manager.save_type_version:
+        migration = find_migration(version)
+        if migration is None:
+            raise Exception(f"there is no migration for save version {version}")
+        save_dic = migration.migrate(save_dic)
+        version = migration.to_version
+        save_dic[save_manager.version_tag] = version
+    return True, save_dic
+
+
+@register_migration(0.0, 1.3)
+def fill_missing_save_values(save_dic: dict) -> dict:
+    """
+    Saves older than 1.3 may lack some of the save values, which are taken from a fresh save
+    """
+    fresh_save = save_manager.create_fresh_save()
+    fresh_save.update(save_dic)
+    return fresh_save
+
+
+class MigrationReport:
+    def __init__(self):
+        self.checked = 0
+        self.updated: list[str] = []
+        # save name -> error message
+        self.failed: dict[str, str] = {}
+        self.seconds = 0.0
+
+    def add_result(self, _save_name: str, status: str, error: str = None):
+        self.checked += 1
+        if status == MIGRATION_UPDATED:
+            self.updated.append(_save_name)
+        elif status == MIGRATION_FAILED:
+            self.failed[_save_name] = error
+
+    def get_saves_per_second(self) -> float:
+        return self.checked / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        text = f"checked {self.checked} saves in {self.seconds:.2f}s ({self.get_saves_per_second():.1f} saves/s), " \
+               f"updated {len(self.updated)}, failed {len(self.failed)}"
+        for _save_name, error in sorted(self.failed.items()):
+            text += f"\n{_save_name}: {error}"
+        return text
+
+
+def migrate_save_file(file_path: str) -> (str, str, Optional[str]):
+    """
+    Migrates a single json save_file in place. Runs in the worker processes of migrate_all_saves.
+
+    :param file_path: the path of the save_file
+    :return: the save name, the migration status and the error message if the migration failed
+    """
+    _save_name = os.path.basename(file_path)[:-len(save_manager.save_files_suffix)]
+    try:
+        updated, save_dic = migrate_save_dict(json_codec.read_file(file_path))
+        if not updated:
+            return _save_name, MIGRATION_CURRENT, None
+        save_manager.write_json_file(file_path, save_dic)
+        return _save_name, MIGRATION_UPDATED, None
+    except Exception as e:
+        return _save_name, MIGRATION_FAILED, f"{type(e).__name__}: {e}"
+
+
+def migrate_unparsed_save(_save_name: str, save_dic: dict) -> (str, str, Optional[str], Optional[dict]):
+    try:
+        updated, save_dic = migrate_save_dict(save_dic)
+        return _save_name, MIGRATION_UPDATED if updated else MIGRATION_CURRENT, None, save_dic if updated else None
+    except Exception as e:
+        return _save_name, MIGRATION_FAILED, f"{type(e).__name__}: {e}", None
+
+
+def migrate_all_saves(folder_path: str = None, workers: int = None) -> MigrationReport:
+    """
+    Migrates every stored save to the current save_type_version in parallel worker processes, so no save has to be
+    migrated on its first load. Must only be used while the bot is not running.
+    Json save_files are read, migrated and written by the workers. With the sqlite backend the workers only migrate,
+    while the database is read and written by this process.
+
+    :param folder_path: the folder of the json save_files, defaults to the saves folder
+    :param workers: the amount of worker processes, defaults to the amount of CPUs
+    :return: the report of the migration
+    """
+    report = MigrationReport()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if save_manager.use_sqlite_backend():
+            save_names = sqlite_saves.list_saves()
+            save_dicts = [sqlite_saves.read_save(_save_name) for _save_name in save_names]
+            # the workers must not inherit the open connection, it is opened again for the writes
+            sqlite_saves.close_database()
+            for _save_name, status, error, save_dic in executor.map(migrate_unparsed_save, save_names, save_dicts,
+                                                                    chunksize=16):
+                if save_dic is not None:
+                    sqlite_saves.write_save(_save_name, save_dic)
+                report.add_result(_save_name, status, error)
+        else:
+            folder_path = folder_path if folder_path is not None else save_manager.get_save_folder_filepath()
+            file_paths = [os.path.join(folder_path, file_name) for file_name in sorted(os.listdir(folder_path))
+                          if file_name.endswith(save_manager.save_files_suffix)]
+            for _save_name, status, error in executor.map(migrate_save_file, file_paths, chunksize=16):
+                report.add_result(_save_name, status, error)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(args: list[str] = None):
+    """
+    Migrates every save of the configured backend to the current save version.
+
+    python -m src.ext.Campaign.SaveDataManagement.save_migrations [--folder FOLDER] [--workers WORKERS]
+    """
+    parser = argparse.ArgumentParser(description="Migrate every save to the current save version")
+    parser.add_argument("--folder", default=None, help="folder of the json save_files, defaults to the saves folder")
+    parser.add_argument("--workers", type=int, default=None, help="amount of worker processes")
+    parsed = parser.parse_args(args)
+    print(migrate_all_saves(parsed.folder, parsed.workers))
+
+
+if __name__ == "__main__":
+    main()
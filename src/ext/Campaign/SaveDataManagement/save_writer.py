@@ -0,0 +1,253 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable, Any
+
+from . import save_file_management as save_manager, save_journal
+from ..campaign_exceptions import SaveConflictException
+
+SAVE_WRITE_DELAY_SECONDS = 2
+
+logger = logging.getLogger('bot')
+
+# a single worker keeps the writes of one save in the order they were scheduled
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save_writer")
+_dirty_saves: dict[str, dict] = {}
+_scheduled_writes: dict[str, asyncio.TimerHandle] = {}
+_running_writes: dict[str, Future] = {}
+_lock = threading.RLock()
+# called on the event loop with the name of a save whose write was refused because another process changed it
+_conflict_handler: Optional[Callable[[str], None]] = None
+
+
+def set_conflict_handler(handler: Optional[Callable[[str], None]]):
+    """
+    Sets the function that drops a save from memory once the writer thread refused one of its writes, because another
+    bot process changed the stored save. It is called on the event loop the write was scheduled from.
+
+    :param handler: called with the save_file name without suffix
+    """
+    global _conflict_handler
+    _conflict_handler = handler
+
+
+def mark_save_dirty(_save_name: str, save_dict: dict):
+    """
+    Marks a loaded save as changed. The changes are appended to the journal of the save right away, while the save
+    itself is written to the hard drive once SAVE_WRITE_DELAY_SECONDS have passed, so every change made within that
+    window only causes a single write. If no event loop is running, the save is written immediately.
+    Both the journal appends and the writes run on the writer thread, so the event loop never waits for the file lock
+    of a save or the hard drive.
+
+    Conflicts with other bot processes are checked once per command by live_save_manager.lock_save. Changes made in
+    the meantime are refused by the writer thread, which then has the save dropped from memory by the conflict handler.
+
+    :param _save_name: the save_file name without suffix
+    :param save_dict: the parsed save dictionary that should be written
+    :raises SaveConflictException: if no event loop is running and another process changed the stored save since this
+        process last read or wrote it
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    delayed = loop is not None and SAVE_WRITE_DELAY_SECONDS > 0
+
+    with _lock:
+        _dirty_saves[_save_name] = save_dict
+        if delayed:
+            journal_lines = save_journal.collect_changes(_save_name, save_dict)
+            if len(journal_lines) > 0:
+                _submit(_save_name, save_journal.append_changes, journal_lines)
+            if _save_name not in _scheduled_writes:
+                _scheduled_writes[_save_name] = loop.call_later(SAVE_WRITE_DELAY_SECONDS, _write_behind, _save_name)
+            return
+    flush_save(_save_name, raise_conflicts=True)
+
+
+def is_save_pending(_save_name: str) -> bool:
+    """
+    Checks if a save has changes that have not yet been written to the hard drive
+
+    :param _save_name: the save_file name without suffix
+    :return: True if there are pending changes
+    """
+    with _lock:
+        return _save_name in _dirty_saves or _save_name in _running_writes
+
+
+def is_write_running(_save_name: str) -> bool:
+    """
+    Checks if a journal append or write of a save is running. The stamp this process remembers for the save is only
+    up to date while none is running.
+
+    :param _save_name: the save_file name without suffix
+    :return: True if a write is running
+    """
+    with _lock:
+        return _save_name in _running_writes
+
+
+def start_flush(_save_name: str) -> Optional[Future]:
+    """
+    Submits the pending changes of a save to the writer thread right away, without waiting for the write
+
+    :param _save_name: the save_file name without suffix
+    :return: the future of the last running write of this save, None if no write is running
+    """
+    with _lock:
+        handle = _scheduled_writes.pop(_save_name, None)
+        if handle is not None:
+            handle.cancel()
+        future = _submit_write(_save_name)
+        if future is None:
+            future = _running_writes.get(_save_name)
+    return future
+
+
+def flush_save(_save_name: str, raise_conflicts: bool = False):
+    """
+    Writes pending changes of a save to the hard drive and waits until every write of this save has finished.
+    Used before the save_file on the hard drive is read, and on shutdown. Coroutines use flush_save_async instead,
+    so the event loop is not blocked while the write runs.
+
+    :param _save_name: the save_file name without suffix
+    :param raise_conflicts: if True, a write refused because another process changed the save raises the
+        SaveConflictException instead of only logging it
+    """
+    future = start_flush(_save_name)
+    if future is not None:
+        _wait_for_write(_save_name, future, raise_conflicts)
+
+
+async def flush_save_async(_save_name: str, raise_conflicts: bool = False):
+    """
+    Writes pending changes of a save to the hard drive like flush_save, but awaits the writes instead of blocking
+    the event loop. Used before a save_file is sent or replaced by a command.
+
+    :param _save_name: the save_file name without suffix
+    :param raise_conflicts: if True, a write refused because another process changed the save raises the
+        SaveConflictException instead of only logging it
+    """
+    future = start_flush(_save_name)
+    if future is None:
+        return
+    try:
+        await asyncio.wrap_future(future)
+    except Exception as e:
+        _handle_write_error(_save_name, e, raise_conflicts)
+
+
+def wait_for_writes(_save_name: str):
+    """
+    Waits until the running journal appends and writes of a save have finished, without writing its pending changes
+
+    :param _save_name: the save_file name without suffix
+    """
+    with _lock:
+        future = _running_writes.get(_save_name)
+    if future is not None:
+        _wait_for_write(_save_name, future)
+
+
+def flush_all_saves(wait: bool = True):
+    """
+    Writes the pending changes of every save to the hard drive. Used on shutdown and when all saves are unloaded.
+
+    :param wait: if False, the writes are only submitted to the writer thread, so the event loop is not blocked
+    """
+    with _lock:
+        save_names = set(_dirty_saves.keys()) | set(_running_writes.keys())
+    for save_name in save_names:
+        if wait:
+            flush_save(save_name)
+        else:
+            start_flush(save_name)
+
+
+def discard_pending_save(_save_name: str, wait: bool = True):
+    """
+    Drops pending changes of a save without writing them. Used when the save_file is removed or replaced.
+
+    :param _save_name: the save_file name without suffix
+    :param wait: if True, the running writes of the save are waited for, so they cannot overwrite the save_file
+        afterwards. Saves that are only dropped from memory do not need to wait, their next load waits for the writes.
+    """
+    with _lock:
+        handle = _scheduled_writes.pop(_save_name, None)
+        if handle is not None:
+            handle.cancel()
+        _dirty_saves.pop(_save_name, None)
+        future = _running_writes.get(_save_name)
+    if wait and future is not None:
+        _wait_for_write(_save_name, future)
+
+
+def _write_behind(_save_name: str):
+    with _lock:
+        _scheduled_writes.pop(_save_name, None)
+        _submit_write(_save_name)
+
+
+def _submit_write(_save_name: str) -> Optional[Future]:
+    save_dict = _dirty_saves.pop(_save_name, None)
+    if save_dict is None:
+        return None
+    # the json dictionary is built on the calling thread, so the worker never touches live save data
+    return _submit(_save_name, save_manager.write_save_output, save_manager.build_save_output(_save_name, save_dict))
+
+
+def _submit(_save_name: str, write_function: Callable[[str, Any], None], data: Any) -> Future:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    try:
+        future = _write_executor.submit(write_function, _save_name, data)
+    except RuntimeError:
+        # the executor no longer accepts work during interpreter shutdown
+        future = Future()
+        try:
+            write_function(_save_name, data)
+            future.set_result(None)
+        except Exception as e:
+            future.set_exception(e)
+    # the single worker finishes the writes of a save in order, so waiting for the last one waits for all of them
+    _running_writes[_save_name] = future
+    future.add_done_callback(lambda done: _write_finished(_save_name, done, loop))
+    return future
+
+
+def _write_finished(_save_name: str, future: Future, loop: Optional[asyncio.AbstractEventLoop]):
+    with _lock:
+        if _running_writes.get(_save_name) is future:
+            del _running_writes[_save_name]
+    if isinstance(future.exception(), SaveConflictException):
+        logger.warning(f"{_save_name}: savefile was changed by another process, its pending changes were dropped")
+        # the refused journal entries were already counted as journaled
+        save_journal.forget_journaled_state(_save_name)
+        if loop is not None and _conflict_handler is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(_conflict_handler, _save_name)
+    elif future.exception() is not None:
+        logger.error(f"{_save_name}: writing the savefile failed: {future.exception()}")
+
+
+def _wait_for_write(_save_name: str, future: Future, raise_conflicts: bool = False):
+    try:
+        future.result()
+    except Exception as e:
+        _handle_write_error(_save_name, e, raise_conflicts)
+
+
+def _handle_write_error(_save_name: str, error: Exception, raise_conflicts: bool):
+    if isinstance(error, SaveConflictException):
+        # a refused write is already logged by _write_finished
+        if raise_conflicts:
+            raise error
+    else:
+        logger.error(f"{_save_name}: waiting for savefile write failed: {error}")
+
+
+atexit.register(flush_all_saves)
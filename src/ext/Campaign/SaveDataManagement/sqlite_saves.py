@@ -0,0 +1,244 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from ..packg_variables import get_save_folder_filepath
+from . import save_file_management as save_manager
+from .... import json_codec
+
+# the characters of a save are stored as one row each, everything else as a single row of the save
+save_database_name = 'saves.sqlite3'
+
+logger = logging.getLogger('bot')
+
+database_path: Optional[str] = None
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+# separate connection for the version checks made by commands, with write ahead logging it never waits for a write
+_version_connection: Optional[sqlite3.Connection] = None
+_version_lock = threading.Lock()
+# json text of every character row as it is stored in the database, so unchanged characters are not written again
+_stored_chars: dict[str, dict[str, str]] = {}
+
+
+def get_database_path() -> str:
+    if database_path is not None:
+        return database_path
+    return os.path.join(get_save_folder_filepath(), save_database_name)
+
+
+def set_database_path(path: Optional[str]):
+    """
+    Switches to another database file. None switches back to the database inside the saves folder.
+
+    :param path: the path of the database file
+    """
+    global database_path
+    close_database()
+    database_path = path
+
+
+def _get_connection() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(get_database_path(), check_same_thread=False, isolation_level=None)
+        # write ahead logging lets readers continue while a save is written
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+        _connection.execute("CREATE TABLE IF NOT EXISTS saves "
+                            "(name TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in _connection.execute("PRAGMA table_info(saves)")]
+        if "version" not in columns:
+            # databases created before saves were versioned
+            _connection.execute("ALTER TABLE saves ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        _connection.execute("CREATE TABLE IF NOT EXISTS characters ("
+                            "save_name TEXT NOT NULL, tag TEXT NOT NULL, data TEXT NOT NULL, "
+                            "PRIMARY KEY (save_name, tag))")
+    return _connection
+
+
+def close_database():
+    global _connection, _version_connection
+    with _lock:
+        with _version_lock:
+            if _version_connection is not None:
+                _version_connection.close()
+                _version_connection = None
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+        _stored_chars.clear()
+
+
+def get_save_version(_save_name: str) -> Optional[int]:
+    """
+    Gets the version of a stored save, which is increased by every write of any bot process
+
+    :param _save_name: the save_file name without suffix
+    :return: the version, None if the database does not contain the save
+    """
+    global _version_connection
+    with _version_lock:
+        if _version_connection is None:
+            with _lock:
+                # makes sure the tables exist
+                _get_connection()
+            _version_connection = sqlite3.connect(get_database_path(), check_same_thread=False,
+                                                  isolation_level=None)
+        row = _version_connection.execute("SELECT version FROM saves WHERE name = ?", (_save_name,)).fetchone()
+    return None if row is None else row[0]
+
+
+def save_exists(_save_name: str) -> bool:
+    with _lock:
+        return _get_connection().execute("SELECT 1 FROM saves WHERE name = ?", (_save_name,)).fetchone() is not None
+
+
+def list_saves() -> list[str]:
+    with _lock:
+        return [row[0] for row in _get_connection().execute("SELECT name FROM saves ORDER BY name")]
+
+
+def read_all_save_values() -> list[tuple[str, dict, int]]:
+    """
+    Reads every save without its characters
+
+    :return: the name, the unparsed json dictionary without characters and the version of every save
+    """
+    with _lock:
+        rows = _get_connection().execute("SELECT name, data, version FROM saves").fetchall()
+    return [(_save_name, json_codec.loads(data), version) for _save_name, data, version in rows]
+
+
+def read_save(_save_name: str) -> Optional[dict]:
+    """
+    Reads a save from the database
+
+    :param _save_name: the save_file name without suffix
+    :return: the unparsed json dictionary of the save, None if the database does not contain it
+    """
+    with _lock:
+        connection = _get_connection()
+        row = connection.execute("SELECT data FROM saves WHERE name = ?", (_save_name,)).fetchone()
+        if row is None:
+            _stored_chars.pop(_save_name, None)
+            return None
+        char_rows = connection.execute("SELECT tag, data FROM characters WHERE save_name = ?", (_save_name,)).fetchall()
+        _stored_chars[_save_name] = dict(char_rows)
+    save_dic = json_codec.loads(row[0])
+    save_dic[save_manager.character_tag] = {tag: json_codec.loads(data) for tag, data in char_rows}
+    return save_dic
+
+
+def write_save(_save_name: str, output: dict):
+    """
+    Writes a save into the database within one transaction. Only characters that changed since the last write
+    are updated.
+
+    :param _save_name: the save_file name without suffix
+    :param output: the unparsed json dictionary of the save
+    """
+    save_data = json_codec.dumps({key: value for key, value in output.items() if key != save_manager.character_tag},
+                                 sort_keys=True)
+    chars = {tag: json_codec.dumps(data, sort_keys=True) for tag, data in output[save_manager.character_tag].items()}
+    with _lock:
+        connection = _get_connection()
+        stored_chars = _stored_chars.get(_save_name)
+        if stored_chars is None:
+            stored_chars = dict(connection.execute("SELECT tag, data FROM characters WHERE save_name = ?",
+                                                   (_save_name,)).fetchall())
+        connection.execute("BEGIN")
+        try:
+            connection.execute("INSERT INTO saves (name, data, version) VALUES (?, ?, 1) "
+                               "ON CONFLICT (name) DO UPDATE SET data = excluded.data, version = saves.version + 1",
+                               (_save_name, save_data))
+            connection.executemany("INSERT INTO characters (save_name, tag, data) VALUES (?, ?, ?) "
+                                   "ON CONFLICT (save_name, tag) DO UPDATE SET data = excluded.data",
+                                   [(_save_name, tag, data) for tag, data in chars.items()
+                                    if stored_chars.get(tag) != data])
+            connection.executemany("DELETE FROM characters WHERE save_name = ? AND tag = ?",
+                                   [(_save_name, tag) for tag in stored_chars if tag not in chars])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            _stored_chars.pop(_save_name, None)
+            raise
+        _stored_chars[_save_name] = chars
+
+
+def delete_save(_save_name: str):
+    with _lock:
+        connection = _get_connection()
+        connection.execute("BEGIN")
+        connection.execute("DELETE FROM characters WHERE save_name = ?", (_save_name,))
+        connection.execute("DELETE FROM saves WHERE name = ?", (_save_name,))
+        connection.execute("COMMIT")
+        _stored_chars.pop(_save_name, None)
+
+
+def import_json_saves(folder_path: str, replace: bool = False) -> list[str]:
+    """
+    Imports every json save_file of a folder into the database
+
+    :param folder_path: the folder containing the save_files
+    :param replace: if True, saves that are already in the database are overwritten
+    :return: the names of the imported saves
+    """
+    save_suffix = save_manager.save_files_suffix
+    imported = []
+    for _save_name in sorted(file_name[:-len(save_suffix)] for file_name in os.listdir(folder_path)
+                             if file_name.endswith(save_suffix)):
+        if not replace and save_exists(_save_name):
+            logger.info(f"{_save_name} is already in the database, skipped")
+            continue
+        write_save(_save_name, json_codec.read_file(os.path.join(folder_path, _save_name + save_suffix)))
+        imported.append(_save_name)
+    return imported
+
+
+def export_json_saves(folder_path: str) -> list[str]:
+    """
+    Exports every save of the database into a json save_file
+
+    :param folder_path: the folder the save_files are written into
+    :return: the names of the exported saves
+    """
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+    exported = []
+    for _save_name in list_saves():
+        json_codec.write_file(os.path.join(folder_path, _save_name + save_manager.save_files_suffix),
+                              read_save(_save_name))
+        exported.append(_save_name)
+    return exported
+
+
+def main(args: list[str] = None):
+    """
+    Moves the json save_files into the database and back.
+
+    python -m src.ext.Campaign.SaveDataManagement.sqlite_saves import [--replace] [--folder FOLDER]
+    python -m src.ext.Campaign.SaveDataManagement.sqlite_saves export [--folder FOLDER]
+    """
+    parser = argparse.ArgumentParser(description="Import json save_files into the save database or export them again")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--folder", default=get_save_folder_filepath(), help="folder of the json save_files")
+    parser.add_argument("--database", default=None, help="path of the database, defaults to the saves folder")
+    parser.add_argument("--replace", action="store_true", help="overwrite saves that are already in the database")
+    parsed = parser.parse_args(args)
+    set_database_path(parsed.database)
+    try:
+        if parsed.action == "import":
+            names = import_json_saves(parsed.folder, parsed.replace)
+        else:
+            names = export_json_saves(parsed.folder)
+    finally:
+        close_database()
+    print(f"{parsed.action}ed {len(names)} saves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from os.path import exists
+from typing import Iterator, Callable, Optional
+
+from . import save_file_management as save_manager
+
+undo_log_folder_name = 'undo_logs'
+undo_log_suffix = '_undo.log'
+
+# line types of the undo log. An action line holds the json text of a history entry, which is only parsed once
+# the entry is undone or redone
+LINE_ACTION = 'a'
+LINE_POINTER = 'p'
+LINE_DISCARD = 'd'
+
+logger = logging.getLogger('bot')
+
+# a single worker keeps the writes of every log in the order they were made, off the event loop
+_log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="undo_log")
+_lock = threading.RLock()
+# user_id -> amount of lines in the undo log of the user, including the lines that are still being written
+_line_counts: dict[str, int] = {}
+# user_id -> the last write of the undo log of the user
+_pending_writes: dict[str, Future] = {}
+
+
+def get_undo_log_folder_path() -> str:
+    return os.path.join(save_manager.get_save_folder_filepath(), undo_log_folder_name)
+
+
+def build_undo_log_path(user_id: str) -> str:
+    return os.path.join(get_undo_log_folder_path(), user_id + undo_log_suffix)
+
+
+def build_undo_lock_path(user_id: str) -> str:
+    """
+    Builds the path of the lock file of an undo log, which every bot process serving the user locks before
+    touching the log
+
+    :param user_id: the discord id of the user
+    :return: the built file path
+    """
+    return os.path.join(save_manager.get_save_folder_filepath(), save_manager.lock_folder_name,
+                        user_id + undo_log_suffix + save_manager.lock_files_suffix)
+
+
+def read_undo_log(user_id: str) -> Iterator[tuple[str, str]]:
+    """
+    Reads the lines of the undo log of a user, once its pending writes have finished. A log that ends in a partially
+    written line is read up to that line.
+
+    :param user_id: the discord id of the user
+    :return: tuples of the line type and its value
+    """
+    wait_for_writes(user_id)
+    # the log is read completely first, so its lock is not held while the caller handles the lines
+    lines = []
+    with save_manager.lock_file(build_undo_lock_path(user_id), exclusive=False):
+        if exists(build_undo_log_path(user_id)):
+            with open(build_undo_log_path(user_id), encoding='utf-8') as log:
+                for line in log:
+                    if not line.endswith("\n") or line[1:2] != " ":
+                        logger.warning(f"{user_id}: undo log ends in an incomplete line, it was ignored")
+                        break
+                    lines.append((line[0], line[2:-1]))
+    with _lock:
+        _line_counts[user_id] = len(lines)
+    yield from lines
+
+
+def append_lines(user_id: str, lines: list[tuple[str, str]]) -> int:
+    """
+    Appends lines to the undo log of a user on the undo log thread. The log is not synced to the hard drive, as losing
+    the last entries of an undo history on a crash only limits how far back a user can undo.
+
+    :param user_id: the discord id of the user
+    :param lines: tuples of the line type and its value, which must not contain a line break
+    :return: the amount of lines in the log afterwards
+    """
+    text = "".join(f"{line_type} {value}\n" for line_type, value in lines)
+    with _lock:
+        _line_counts[user_id] = _line_counts.get(user_id, 0) + len(lines)
+        _submit(user_id, _append_to_log, text)
+        return _line_counts[user_id]
+
+
+def rewrite_undo_log(user_id: str, lines: list[tuple[str, str]]):
+    """
+    Replaces the undo log of a user on the undo log thread, used to drop the lines of entries that are no longer part
+    of the history
+
+    :param user_id: the discord id of the user
+    :param lines: tuples of the line type and its value
+    """
+    text = "".join(f"{line_type} {value}\n" for line_type, value in lines)
+    with _lock:
+        _line_counts[user_id] = len(lines)
+        _submit(user_id, _replace_log, text)
+
+
+def wait_for_writes(user_id: Optional[str] = None):
+    """
+    Waits until the pending writes of an undo log have finished
+
+    :param user_id: the discord id of the user, None waits for the writes of every undo log
+    """
+    with _lock:
+        if user_id is None:
+            futures = list(_pending_writes.values())
+        else:
+            futures = [_pending_writes[user_id]] if user_id in _pending_writes else []
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            # a failed write is already logged by _write_finished
+            pass
+
+
+def delete_undo_logs():
+    wait_for_writes()
+    with _lock:
+        if exists(get_undo_log_folder_path()):
+            shutil.rmtree(get_undo_log_folder_path())
+        _line_counts.clear()
+
+
+def _submit(user_id: str, write_function: Callable[[str, str], None], text: str):
+    try:
+        future = _log_executor.submit(write_function, user_id, text)
+    except RuntimeError:
+        # the executor no longer accepts work during interpreter shutdown
+        future = Future()
+        try:
+            write_function(user_id, text)
+            future.set_result(None)
+        except Exception as e:
+            future.set_exception(e)
+    _pending_writes[user_id] = future
+    future.add_done_callback(lambda done: _write_finished(user_id, done))
+
+
+def _write_finished(user_id: str, future: Future):
+    with _lock:
+        if _pending_writes.get(user_id) is future:
+            del _pending_writes[user_id]
+    if future.exception() is not None:
+        logger.error(f"{user_id}: writing the undo log failed: {future.exception()}")
+
+
+def _append_to_log(user_id: str, text: str):
+    _create_folder()
+    # another bot process serving the same user may append to the log at the same time
+    with save_manager.lock_file(build_undo_lock_path(user_id)):
+        with open(build_undo_log_path(user_id), 'a', encoding='utf-8') as log:
+            log.write(text)
+
+
+def _replace_log(user_id: str, text: str):
+    _create_folder()
+    file_path = build_undo_log_path(user_id)
+    temp_path = file_path + save_manager.temp_files_suffix
+    with save_manager.lock_file(build_undo_lock_path(user_id)):
+        with open(temp_path, 'w', encoding='utf-8') as log:
+            log.write(text)
+        os.replace(temp_path, file_path)
+
+
+def _create_folder():
+    os.makedirs(get_undo_log_folder_path(), exist_ok=True)
@@ -1,25 +1,66 @@
+import os
 from collections import deque
+from typing import Callable
 
 from .SaveDataManagement.TempEntryDict import TempEntryDict
+from .SaveDataManagement import live_save_manager as lsave, undo_log
+from .campaign_exceptions import CommandException, SaveConflictException
 
-from .UndoActions.BaseUndoAction import BaseUndoAction
+from .UndoActions.BaseUndoAction import BaseUndoAction, action_to_record, action_from_record
 from .UndoActions.StatUndoAction import StatUndoAction
+from .UndoActions.LoadFileUndoAction import LoadFileUndoAction
+from ... import json_codec
 
 UNDO_DELETION_SECONDS = 43200
+# amount of actions a user can undo
+UNDO_HISTORY_DEPTH = int(os.environ.get("UNDO_HISTORY_DEPTH") or 10)
+# the undo log of a user is rewritten once it holds this many lines per action of the history
+UNDO_LOG_COMPACTION_FACTOR = 4
 
 QUEUE_TAG = "queue"
 POINTER_TAG = "pointer"
 TIMER_TAG = "timer"
 
+# keys of a history entry
+ENTRY_SAVE_TAG = "s"
+ENTRY_ACTION_TAG = "a"
+
+# user_id -> history of the user. The history is kept as the json text of its entries, so it is only parsed once
+# an action is undone or redone. Users are loaded from their undo log again after they were removed from memory.
 undo_dict: TempEntryDict = TempEntryDict(UNDO_DELETION_SECONDS, "UndoDeque")
 
 
-def get_action_queue(executing_user: str) -> deque[BaseUndoAction]:
+def encode_entry(_save_name: str, action: BaseUndoAction) -> str:
+    """
+    :param _save_name: the save the action was applied to, "" if the user had no save loaded
+    :param action: the undo action
+    :return: the json text of the history entry
+    """
+    return json_codec.dumps({ENTRY_SAVE_TAG: _save_name, ENTRY_ACTION_TAG: action_to_record(action)})
+
+
+def decode_entry(entry: str) -> (str, BaseUndoAction):
+    """
+    :param entry: the json text of a history entry
+    :return: the save the action was applied to and the undo action
+    """
+    entry_dict = json_codec.loads(entry)
+    return entry_dict[ENTRY_SAVE_TAG], action_from_record(entry_dict[ENTRY_ACTION_TAG])
+
+
+def get_action_queue(executing_user: str) -> deque[str]:
+    """
+    :return: the json text of every history entry of the user, use get_actions for the actions themselves
+    """
     global undo_dict, QUEUE_TAG
     check_user_undo(executing_user)
     return undo_dict.get(executing_user)[QUEUE_TAG]
 
 
+def get_actions(executing_user: str) -> list[BaseUndoAction]:
+    return [decode_entry(entry)[1] for entry in get_action_queue(executing_user)]
+
+
 def get_pointer(executing_user: str) -> int:
     global undo_dict, POINTER_TAG
     check_user_undo(executing_user)
@@ -31,36 +72,44 @@ def check_user_undo(executing_user: str):
     if executing_user in undo_dict:
         return
     else:
-        undo_dict.set(executing_user, {QUEUE_TAG: deque(), POINTER_TAG: -1})
+        action_queue, pointer = _load_history(executing_user)
+        undo_dict.set(executing_user, {QUEUE_TAG: action_queue, POINTER_TAG: pointer})
 
 
 def set_pointer(executing_user: str, pointer: int):
-    global undo_dict, POINTER_TAG
-    check_user_undo(executing_user)
-    undo_dict.get(executing_user)[POINTER_TAG] = pointer
+    _set_pointer(executing_user, pointer)
+    _log(executing_user, [(undo_log.LINE_POINTER, str(pointer))])
 
 
 def queue_undo_action(executing_user: str, action: BaseUndoAction):
-    pointer = get_pointer(executing_user)
-    action_queue = get_action_queue(executing_user)
-    discard_undo_queue_after_pointer(executing_user)
-    action_queue.append(action)
-    if len(action_queue) > 10:
-        action_queue.popleft()
-    else:
-        pointer += 1
-    set_pointer(executing_user, pointer)
+    entry = encode_entry(lsave.get_loaded_filename(executing_user) or "", action)
+    pointer = _push_entry(get_action_queue(executing_user), get_pointer(executing_user), entry)
+    _set_pointer(executing_user, pointer)
+    _log(executing_user, [(undo_log.LINE_ACTION, entry)])
 
 
 def queue_basic_action(executing_user: str, char_tag, stat, old_val, new_val):
     queue_undo_action(executing_user, StatUndoAction(char_tag, stat, old_val, new_val))
 
 
+def get_entry_action(executing_user: str, entry: str) -> BaseUndoAction:
+    """
+    Parses a history entry, after making sure the action belongs to the save the user has loaded
+
+    :raises CommandException: if the action was applied to another save
+    """
+    _save_name, action = decode_entry(entry)
+    if not isinstance(action, LoadFileUndoAction) and _save_name != "" \
+            and _save_name != lsave.get_loaded_filename(executing_user):
+        raise CommandException(f"This action was made in savefile {_save_name}, load it to undo or redo the action")
+    return action
+
+
 def undo(executing_user: str) -> tuple[bool, str]:
     pointer = get_pointer(executing_user)
     action_queue = get_action_queue(executing_user)
     if pointer > -1:
-        ret_val = action_queue[pointer].undo(executing_user)
+        ret_val = get_entry_action(executing_user, action_queue[pointer]).undo(executing_user)
         pointer -= 1
         set_pointer(executing_user, pointer)
         return True, ret_val
@@ -72,20 +121,163 @@ def redo(executing_user: str) -> tuple[bool, str]:
     pointer = get_pointer(executing_user)
     action_queue = get_action_queue(executing_user)
     if pointer < len(action_queue) - 1:
+        action = get_entry_action(executing_user, action_queue[pointer + 1])
         pointer += 1
         set_pointer(executing_user, pointer)
-        return True, action_queue[pointer].redo(executing_user)
+        return True, action.redo(executing_user)
     else:
         return False, "No actions to redo"
 
 
+class UndoTransaction:
+    """
+    Applies several undo or redo steps of a user to the saves in memory. The changed saves are only marked for saving
+    once, after every step succeeded. If a step fails, the saves, the loaded file of the user and the undo pointer are
+    returned to their state before the transaction.
+
+    with UndoTransaction(executing_user) as transaction:
+        transaction.step(undo)
+    """
+
+    def __init__(self, executing_user: str):
+        self.executing_user = executing_user
+        self.messages: list[str] = []
+        self._start_pointer = get_pointer(executing_user)
+        self._start_file = lsave.get_loaded_filename(executing_user)
+        # save_name -> snapshot of the save before its first change in this transaction
+        self._snapshots: dict[str, dict] = {}
+
+    def __enter__(self) -> "UndoTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            try:
+                self.commit()
+            except SaveConflictException:
+                # the conflicting save was dropped from memory, every other change of the transaction is undone
+                self.rollback()
+                raise
+        else:
+            self.rollback()
+        return False
+
+    def _snapshot_loaded_file(self):
+        file_name = lsave.get_loaded_filename(self.executing_user)
+        if file_name is None or file_name in self._snapshots:
+            return
+        save_dict = lsave.get_file_dict(file_name)
+        if save_dict is not None:
+            self._snapshots[file_name] = lsave.snapshot_save_dict(save_dict)
+
+    def step(self, step_function: Callable[[str], tuple[bool, str]]) -> bool:
+        """
+        Applies a single step
+
+        :param step_function: undo or redo
+        :return: False if there was nothing left to undo or redo
+        """
+        self._snapshot_loaded_file()
+        keep_going, text = step_function(self.executing_user)
+        self.messages.append(text)
+        # a step may load another file, whose state is kept before the next step changes it
+        self._snapshot_loaded_file()
+        return keep_going
+
+    def commit(self):
+        for file_name in self._snapshots:
+            if lsave.check_file_in_memory(file_name):
+                lsave.save_loaded_file(file_name)
+        self._snapshots.clear()
+
+    def rollback(self):
+        for file_name, snapshot in self._snapshots.items():
+            save_dict = lsave.get_file_dict(file_name)
+            if save_dict is not None:
+                lsave.restore_save_dict(save_dict, snapshot)
+        self._snapshots.clear()
+        if lsave.get_loaded_filename(self.executing_user) != self._start_file:
+            lsave.access_file_as_user(self.executing_user, self._start_file if self._start_file is not None else "")
+        set_pointer(self.executing_user, self._start_pointer)
+
+
+def apply_steps(executing_user: str, step_function: Callable[[str], tuple[bool, str]], amount: int) -> list[str]:
+    """
+    Undoes or redoes several actions in a single UndoTransaction, stops early once there is nothing left to apply
+
+    :param executing_user: the id of the executing user
+    :param step_function: undo or redo
+    :param amount: the maximum amount of steps
+    :return: the message of every applied step
+    """
+    with UndoTransaction(executing_user) as transaction:
+        for _ in range(amount):
+            if not transaction.step(step_function):
+                break
+    return transaction.messages
+
+
 def discard_undo_queue_after_pointer(executing_user: str):
-    pointer = get_pointer(executing_user)
     action_queue = get_action_queue(executing_user)
-    while len(action_queue) > pointer + 1:
-        action_queue.pop()
+    if _discard_after_pointer(action_queue, get_pointer(executing_user)):
+        _log(executing_user, [(undo_log.LINE_DISCARD, "")])
 
 
 def reset_undo():
+    """
+    Removes the history of every user from memory, it is loaded from the undo logs again on the next access
+    """
     global undo_dict
     undo_dict.clear()
+
+
+def purge_undo_history():
+    """
+    Removes the history of every user from memory and deletes the undo logs, so it is lost for good
+    """
+    reset_undo()
+    undo_log.delete_undo_logs()
+
+
+def _set_pointer(executing_user: str, pointer: int):
+    global undo_dict, POINTER_TAG
+    check_user_undo(executing_user)
+    undo_dict.get(executing_user)[POINTER_TAG] = pointer
+
+
+def _discard_after_pointer(action_queue: deque[str], pointer: int) -> bool:
+    discarded = False
+    while len(action_queue) > pointer + 1:
+        action_queue.pop()
+        discarded = True
+    return discarded
+
+
+def _push_entry(action_queue: deque[str], pointer: int, entry: str) -> int:
+    _discard_after_pointer(action_queue, pointer)
+    action_queue.append(entry)
+    while len(action_queue) > UNDO_HISTORY_DEPTH:
+        action_queue.popleft()
+    return len(action_queue) - 1
+
+
+def _load_history(executing_user: str) -> (deque[str], int):
+    action_queue = deque()
+    pointer = -1
+    for line_type, value in undo_log.read_undo_log(executing_user):
+        if line_type == undo_log.LINE_ACTION:
+            pointer = _push_entry(action_queue, pointer, value)
+        elif line_type == undo_log.LINE_POINTER:
+            pointer = min(int(value), len(action_queue) - 1)
+        elif line_type == undo_log.LINE_DISCARD:
+            _discard_after_pointer(action_queue, pointer)
+    return action_queue, pointer
+
+
+def _log(executing_user: str, lines: list[tuple[str, str]]):
+    line_count = undo_log.append_lines(executing_user, lines)
+    if line_count > UNDO_LOG_COMPACTION_FACTOR * UNDO_HISTORY_DEPTH:
+        action_queue = get_action_queue(executing_user)
+        undo_log.rewrite_undo_log(executing_user,
+                                  [(undo_log.LINE_ACTION, entry) for entry in action_queue] +
+                                  [(undo_log.LINE_POINTER, str(get_pointer(executing_user)))])
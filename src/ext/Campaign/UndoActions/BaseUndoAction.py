@@ -1,7 +1,14 @@
 import abc
 
+# record type -> class of the undo action, filled by register_undo_action
+_action_types: dict[str, type] = {}
+RECORD_TYPE_TAG = "t"
+
 
 class BaseUndoAction(abc.ABC):
+    # short name identifying the action in the undo log, assigned by register_undo_action
+    record_type: str = None
+
     @abc.abstractmethod
     def undo(self, executing_user: str) -> str:
         pass
@@ -13,3 +20,42 @@ class BaseUndoAction(abc.ABC):
     @abc.abstractmethod
     def __str__(self):
         pass
+
+    @abc.abstractmethod
+    def to_record(self) -> dict:
+        """
+        :return: the json compatible values needed to recreate the action with from_record, without the record type
+        """
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def from_record(cls, record: dict) -> "BaseUndoAction":
+        pass
+
+
+def register_undo_action(record_type: str):
+    """
+    Registers an undo action class, so it can be stored in the undo log
+
+    :param record_type: the short name written into the records of the action
+    """
+    def decorator(action_class: type) -> type:
+        if record_type in _action_types:
+            raise ValueError(f"the undo record type {record_type} is already registered")
+        action_class.record_type = record_type
+        _action_types[record_type] = action_class
+        return action_class
+    return decorator
+
+
+def action_to_record(action: BaseUndoAction) -> dict:
+    if action.record_type is None:
+        raise Exception(f"{type(action).__name__} was not registered with register_undo_action")
+    record = action.to_record()
+    record[RECORD_TYPE_TAG] = action.record_type
+    return record
+
+
+def action_from_record(record: dict) -> BaseUndoAction:
+    return _action_types[record[RECORD_TYPE_TAG]].from_record(record)
@@ -1,16 +1,26 @@
 from typing import Optional
 
-from .BaseUndoAction import BaseUndoAction
-from ..SaveDataManagement import live_save_manager as lsave
+from .BaseUndoAction import BaseUndoAction, register_undo_action
+from ..SaveDataManagement import live_save_manager as lsave, player_index
 from ..Character import Character
 
 
+@register_undo_action("c")
 class CharUndoAction(BaseUndoAction):
     def __init__(self, old_char: Optional[Character], new_char: Optional[Character]):
         self.old_char = old_char
         self.new_char = new_char
         self.addition = new_char is not None
 
+    def to_record(self) -> dict:
+        return {"o": self.old_char.to_dict() if self.old_char is not None else None,
+                "n": self.new_char.to_dict() if self.new_char is not None else None}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "CharUndoAction":
+        return cls(Character.from_dict(record["o"]) if record["o"] is not None else None,
+                   Character.from_dict(record["n"]) if record["n"] is not None else None)
+
     def __str__(self):
         return f"{self.old_char.name if self.old_char is not None else ''}->{self.new_char.name if self.new_char is not None else ''}"
 
@@ -19,16 +29,20 @@ class CharUndoAction(BaseUndoAction):
         _dict = lsave.get_loaded_chars(executing_user)
         if self.addition:
             del _dict[self.new_char.tag]
+            player_index.unindex_char(lsave.get_loaded_dict(executing_user), self.new_char)
             return f"Undid addition of {self.new_char.name}."
         else:
             _dict[self.old_char.tag] = self.old_char
+            player_index.index_char(lsave.get_loaded_dict(executing_user), self.old_char)
             return f"Undid removal of {self.old_char.name}."
 
     def redo(self, executing_user: str):
         _dict = lsave.get_loaded_chars(executing_user)
         if self.addition:
             _dict[self.new_char.tag] = self.new_char
+            player_index.index_char(lsave.get_loaded_dict(executing_user), self.new_char)
             return f"Added {self.new_char.name} back into file."
         else:
             del _dict[self.old_char.tag]
+            player_index.unindex_char(lsave.get_loaded_dict(executing_user), self.old_char)
             return f"Removed {self.old_char.name} again."
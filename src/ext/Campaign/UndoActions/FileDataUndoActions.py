@@ -1,15 +1,23 @@
 from typing import Any
 
-from .BaseUndoAction import BaseUndoAction
+from .BaseUndoAction import BaseUndoAction, register_undo_action
 from ..SaveDataManagement import live_save_manager as lsave
 
 
+@register_undo_action("f")
 class FileDataUndoAction(BaseUndoAction):
     def __init__(self, stat: str, old_value: Any, new_value: Any):
         self.stat = stat
         self.old_value = old_value
         self.new_value = new_value
 
+    def to_record(self) -> dict:
+        return {"k": self.stat, "o": self.old_value, "n": self.new_value}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "FileDataUndoAction":
+        return cls(record["k"], record["o"], record["n"])
+
     def __str__(self):
         return f"{{{self.stat}}}=({self.old_value}->{self.new_value})"
 
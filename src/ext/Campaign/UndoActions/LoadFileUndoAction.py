@@ -1,12 +1,20 @@
-from .BaseUndoAction import BaseUndoAction
+from .BaseUndoAction import BaseUndoAction, register_undo_action
 from ..SaveDataManagement import live_save_manager as lsave
 
 
+@register_undo_action("l")
 class LoadFileUndoAction(BaseUndoAction):
     def __init__(self, old_file: str, new_file: str):
         self.old_file = old_file
         self.new_file = new_file
 
+    def to_record(self) -> dict:
+        return {"o": self.old_file, "n": self.new_file}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "LoadFileUndoAction":
+        return cls(record["o"], record["n"])
+
     def __str__(self):
         return f"{{filechange}}=({self.old_file}->{self.new_file})"
 
@@ -1,8 +1,9 @@
-from .BaseUndoAction import BaseUndoAction
+from .BaseUndoAction import BaseUndoAction, register_undo_action
 from .StatUndoAction import StatUndoAction
 from ..Character import Character
 
 
+@register_undo_action("m")
 class MultipleBaseAction(BaseUndoAction):
     def __init__(self, char: Character, stats: list[str]):
         self.character_tag: str = char.tag
@@ -11,7 +12,7 @@ class MultipleBaseAction(BaseUndoAction):
         self.actions: list[BaseUndoAction] = []
         self.stats = stats
         for stat in stats:
-            self.old_vals.append(char.__dict__[stat])
+            self.old_vals.append(getattr(char, stat))
 
     def update(self):
         for i in range(0, len(self.stats)):
@@ -20,10 +21,25 @@ class MultipleBaseAction(BaseUndoAction):
                     self.character_tag,
                     self.stats[i],
                     self.old_vals[i],
-                    self.char.__dict__[self.stats[i]]
+                    getattr(self.char, self.stats[i])
                 )
             )
 
+    def to_record(self) -> dict:
+        return {"c": self.character_tag,
+                "a": [[action.stat, action.old_val, action.new_val] for action in self.actions]}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "MultipleBaseAction":
+        # the character is only needed while the action is built, so the loaded action does not reference one
+        action = cls.__new__(cls)
+        action.character_tag = record["c"]
+        action.char = None
+        action.stats = [stat for stat, _old_val, _new_val in record["a"]]
+        action.old_vals = [old_val for _stat, old_val, _new_val in record["a"]]
+        action.actions = [StatUndoAction(record["c"], stat, old_val, new_val) for stat, old_val, new_val in record["a"]]
+        return action
+
     def __str__(self):
         return "\n".join(str(action) for action in self.actions)
 
@@ -1,12 +1,20 @@
 from ..SaveDataManagement import char_data_access as char_acc
-from .BaseUndoAction import BaseUndoAction
+from .BaseUndoAction import BaseUndoAction, register_undo_action
 
 
+@register_undo_action("r")
 class RetagCharUndoAction(BaseUndoAction):
     def __init__(self, old_tag: str, new_tag: str):
         self.old_tag = old_tag
         self.new_tag = new_tag
 
+    def to_record(self) -> dict:
+        return {"o": self.old_tag, "n": self.new_tag}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "RetagCharUndoAction":
+        return cls(record["o"], record["n"])
+
     def __str__(self):
         return f"{{char_retag}}=({self.old_tag}->{self.new_tag})"
 
@@ -1,7 +1,10 @@
-from .BaseUndoAction import BaseUndoAction
-from ..SaveDataManagement import live_save_manager as lsave
+from .BaseUndoAction import BaseUndoAction, register_undo_action
+from ..SaveDataManagement import live_save_manager as lsave, player_index
+from ..SaveDataManagement.char_data_access import get_char
+from ..Character import LABEL_PLAYER
 
 
+@register_undo_action("s")
 class StatUndoAction(BaseUndoAction):
     def __init__(self, character_tag: str, stat: str, old_val, new_val):
         self.stat = stat
@@ -12,10 +15,24 @@ class StatUndoAction(BaseUndoAction):
     def __str__(self):
         return f"{{{self.character_tag},{self.stat}}}=({self.old_val}->{self.new_val})"
 
+    def to_record(self) -> dict:
+        return {"c": self.character_tag, "k": self.stat, "o": self.old_val, "n": self.new_val}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "StatUndoAction":
+        return cls(record["c"], record["k"], record["o"], record["n"])
+
+    def set_value(self, executing_user: str, value):
+        char = get_char(executing_user, self.character_tag)
+        if self.stat == LABEL_PLAYER:
+            player_index.set_char_player(lsave.get_loaded_dict(executing_user), char, value)
+        else:
+            setattr(char, self.stat, value)
+
     def undo(self, executing_user: str) -> str:
-        lsave.get_loaded_chars(executing_user)[self.character_tag].__dict__[self.stat] = self.old_val
+        self.set_value(executing_user, self.old_val)
         return f"Undid {{{self.character_tag}, {self.stat}}}->{self.new_val}. Returned to {self.old_val}"
 
     def redo(self, executing_user: str):
-        lsave.get_loaded_chars(executing_user)[self.character_tag].__dict__[self.stat] = self.new_val
+        self.set_value(executing_user, self.new_val)
         return f"Reapplied change of {{{self.character_tag}, {self.stat}}}{self.old_val}->{self.new_val}"
\ No newline at end of file
@@ -1,10 +1,18 @@
-from .BaseUndoAction import BaseUndoAction
+from .BaseUndoAction import BaseUndoAction, register_undo_action, action_to_record, action_from_record
 
 
+@register_undo_action("g")
 class UndoActionGroup(BaseUndoAction):
     def __init__(self, actions: list[BaseUndoAction]):
         self.actions = actions
 
+    def to_record(self) -> dict:
+        return {"a": [action_to_record(action) for action in self.actions]}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "UndoActionGroup":
+        return cls([action_from_record(action_record) for action_record in record["a"]])
+
     def __str__(self):
         return "\n".join(str(action) for action in self.actions)
 
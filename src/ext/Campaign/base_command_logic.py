@@ -1,26 +1,58 @@
 import copy
 import logging
+import os
+from typing import Callable
 
 import decohints
 from functools import wraps
 
 from discord import User
-from .Character import Character, LABEL_PLAYER
+from .Character import Character, LABEL_PLAYER, LABEL_TAKEN, LABEL_RESISTED, LABEL_CAUSED, LABEL_HEALED, \
+    LABEL_MAXDAM, LABEL_KILLS, LABEL_CRITS, LABEL_FAINTS, LABEL_DODGE
 from src.ContextInfo import ContextInfo
 from .SaveDataManagement.save_file_management import session_tag, character_tag, version_tag, players_tag, \
     check_savefile_existence, \
     get_savefile_as_discord_file
 from .SaveDataManagement.live_save_manager import save_user_file, check_file_loaded, get_loaded_dict, \
     get_loaded_chars, check_file_admin, access_file_as_user, create_new_save, get_loaded_filename, add_player_to_save, \
-    rem_player_from_save
+    rem_player_from_save, check_file_in_memory
 from .SaveDataManagement.char_data_access import check_char_tag, get_char_tag_by_id, check_if_user_has_char, get_char, \
-    retag_char
+    retag_char, set_char_player
+from .SaveDataManagement import player_index, save_writer
 from .campaign_exceptions import CommandException
 from .campaign_helper import check_bot_admin, get_bot
 from . import Undo, UndoActions, packg_variables as cmp_vars
 
 logger = logging.getLogger('bot')
 
+# maximum amount of characters in a save, 0 removes the limit
+MAX_SAVE_CHARACTERS = int(os.environ.get("MAX_SAVE_CHARACTERS") or 10)
+# maximum amount of stat changes in a single batch
+MAX_BATCH_OPERATIONS = 50
+
+# stats that can be changed in a stat batch -> the character method adding to the stat
+BATCH_STAT_FUNCTIONS: dict[str, Callable[[Character, int], None]] = {
+    LABEL_TAKEN: lambda char, delta: char.take_dam(delta),
+    LABEL_RESISTED: lambda char, delta: setattr(char, LABEL_RESISTED, char.damage_resisted + delta),
+    LABEL_CAUSED: lambda char, delta: char.cause_dam(delta),
+    LABEL_HEALED: lambda char, delta: char.heal(delta),
+    LABEL_KILLS: lambda char, delta: char.cause_dam(0, delta),
+    LABEL_CRITS: lambda char, delta: char.rolled_crit(delta),
+    LABEL_FAINTS: lambda char, delta: char.faint(delta),
+    LABEL_DODGE: lambda char, delta: char.dodge(delta)
+}
+# names of the stat commands that can be used in the text of a stat batch
+BATCH_STAT_ALIASES: dict[str, str] = {
+    "take": LABEL_TAKEN,
+    "resist": LABEL_RESISTED,
+    "cause": LABEL_CAUSED,
+    "heal": LABEL_HEALED,
+    "kill": LABEL_KILLS,
+    "crit": LABEL_CRITS,
+    "faint": LABEL_FAINTS,
+    "dodge": LABEL_DODGE
+}
+
 
 @decohints.decohints
 def check_and_save_file_wrapper(function_to_wrap):
@@ -69,7 +101,7 @@ def load_or_create_save(executing_user: str, file_name: str) -> str:
     if old_file_name is None:
         old_file_name = ""
     ret_str = ""
-    if check_file_loaded(file_name) or check_savefile_existence(file_name):
+    if check_file_in_memory(file_name) or check_savefile_existence(file_name):
         ret_str = access_file_as_user(executing_user, file_name)
     else:
         ret_str = create_new_save(executing_user, file_name)
@@ -89,7 +121,7 @@ def log(executing_user: str, adv=False) -> str:
 
     if adv:
         ret_string += "---------\n"
-        for indx, action in enumerate(Undo.get_action_queue(executing_user)):
+        for indx, action in enumerate(Undo.get_actions(executing_user)):
             if indx == ptr:
                 ret_string += "-->"
             ret_string += str(action) + "\n---------\n"
@@ -110,7 +142,7 @@ async def claim_character(executing_user: str, ctx: ContextInfo, char_tag: str,
     if _current_player != "" and _current_player != executing_user and not check_file_admin(executing_user):
         raise CommandException(
             "You are not authorized to assign this character. It has already been claimed by a user.")
-    _character.set_player(assigned_user_id)
+    set_char_player(executing_user, char_tag, assigned_user_id)
 
     user: User = None
     try:
@@ -140,7 +172,7 @@ def unclaim_char(executing_user: str, char_tag: str):
     if _char.player != executing_user and not check_file_admin(executing_user):
         raise CommandException("Only file creators can use this command on other people's characters")
     old_player = _char.player
-    get_loaded_chars(executing_user)[char_tag].set_player("")
+    set_char_player(executing_user, char_tag, "")
     Undo.queue_basic_action(executing_user, char_tag, "player", old_player, "")
     return f"Character {char_tag} unassigned"
 
@@ -178,8 +210,8 @@ def add_char(executing_user: str, tag: str, char_name: str) -> str:
 
     if check_char_tag(executing_user, tag):
         raise CommandException("a character with this tag already exists")
-    if len(get_loaded_chars(executing_user)) == 10:
-        raise CommandException("You already have 10 characters, this is the maximum amount")
+    if 0 < MAX_SAVE_CHARACTERS <= len(get_loaded_chars(executing_user)):
+        raise CommandException(f"You already have {MAX_SAVE_CHARACTERS} characters, this is the maximum amount")
 
     _char = Character(tag, char_name)
     get_loaded_chars(executing_user)[tag] = _char
@@ -194,6 +226,7 @@ def rem_char(executing_user: str, tag: str) -> str:
     _char = get_char(executing_user, tag)
     if _char.player == "" or _char.player == executing_user or check_file_admin(executing_user, True):
         del get_loaded_chars(executing_user)[tag]
+        player_index.unindex_char(get_loaded_dict(executing_user), _char)
         Undo.queue_undo_action(executing_user, UndoActions.CharUndoAction(_char, None))
         return "character " + _char.name + " deleted"
     else:
@@ -285,6 +318,77 @@ def dodge(executing_user: str, char_tag: str, amount: int = 1) -> str:
     return f"Character {char_tag}, dodged an attack. Increased to {_dodged + amount}"
 
 
+def parse_stat_batch(batch_text: str) -> list[tuple[str, str, int]]:
+    """
+    Parses the text of the batch command. Operations are separated by semicolons or line breaks and consist of a
+    character tag, a stat and an amount, for example "fez crit 1; olav take 12"
+
+    :param batch_text: the text entered by the user
+    :return: tuples of character tag, stat and amount
+    :raises CommandException: if an operation is malformed
+    """
+    operations = []
+    for operation_text in batch_text.replace("\n", ";").split(";"):
+        if operation_text.strip() == "":
+            continue
+        parts = operation_text.split()
+        if len(parts) != 3:
+            raise CommandException(f"\"{operation_text.strip()}\" is not of the form: character stat amount")
+        char_tag, stat, amount = parts
+        try:
+            amount = int(amount)
+        except ValueError:
+            raise CommandException(f"\"{amount}\" is not a whole number")
+        operations.append((char_tag, BATCH_STAT_ALIASES.get(stat.lower(), stat.lower()), amount))
+    return operations
+
+
+@check_and_save_file_wrapper
+def apply_stat_batch(executing_user: str, operations: list[tuple[str, str, int]]) -> str:
+    """
+    Adds amounts to the stats of several characters. Every operation is validated before any stat is changed, so
+    either all or none of them are applied. All changes are undone together and the save is only written once.
+
+    :param executing_user: the id of the executing user
+    :param operations: tuples of character tag, stat and the non-negative amount added to the stat
+    :return: the text that should be shown to the user
+    :raises CommandException: if an operation is invalid
+    """
+    if len(operations) == 0:
+        raise CommandException("No stat changes were given")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise CommandException(f"A batch can contain at most {MAX_BATCH_OPERATIONS} stat changes")
+    # char_tag -> stats changed on the character, in order of their first change
+    changed_stats: dict[str, list[str]] = {}
+    for char_tag, stat, delta in operations:
+        check_char_tag(executing_user, char_tag, raise_error=True)
+        if stat not in BATCH_STAT_FUNCTIONS:
+            raise CommandException(f"{stat} is not a stat that can be changed, use one of: "
+                                   f"{', '.join(BATCH_STAT_ALIASES)}")
+        if not isinstance(delta, int) or isinstance(delta, bool) or delta < 0:
+            raise CommandException(f"{delta} is not a valid amount for {char_tag} {stat}")
+        stats = changed_stats.setdefault(char_tag, [])
+        if stat not in stats:
+            stats.append(stat)
+        if stat == LABEL_CAUSED and LABEL_MAXDAM not in stats:
+            stats.append(LABEL_MAXDAM)
+
+    undo_actions = {char_tag: UndoActions.MultipleBaseAction(get_char(executing_user, char_tag), stats)
+                    for char_tag, stats in changed_stats.items()}
+    for char_tag, stat, delta in operations:
+        BATCH_STAT_FUNCTIONS[stat](get_char(executing_user, char_tag), delta)
+
+    ret_string = f"Applied {len(operations)} stat changes"
+    for char_tag, undo_action in undo_actions.items():
+        undo_action.update()
+        changes = [f"{action.stat} {action.old_val}->{action.new_val}" for action in undo_action.actions
+                   if action.old_val != action.new_val]
+        changes_text = ', '.join(changes) if len(changes) > 0 else 'unchanged'
+        ret_string += f"\n**{get_char(executing_user, char_tag).name}**: {changes_text}"
+    Undo.queue_undo_action(executing_user, UndoActions.UndoActionGroup(list(undo_actions.values())))
+    return ret_string
+
+
 @check_and_save_file_wrapper
 def session_increase(executing_user: str):
     check_file_admin(executing_user, raise_error=True)
@@ -313,36 +417,18 @@ async def cache_file(executing_user: str, ctx: ContextInfo):
     file_name = get_loaded_filename(executing_user)
     save_dic = get_loaded_dict(executing_user)
     message = f"cache-{file_name}-session {save_dic[session_tag]}-{save_dic[version_tag]}"
+    await save_writer.flush_save_async(file_name)
     current_file = get_savefile_as_discord_file(file_name)
     await get_bot().get_channel(chat_id).send(message, file=current_file)
     await ctx.respond("cached")
 
 
 def undo_command(executing_user: str, amount: int):
-    if amount > 10:
-        amount = 10
-    ret_val = ""
-    for nr in range(amount):
-        keep_going, text = Undo.undo(executing_user)
-        ret_val += f'{text}\n' if (nr < amount-1) else text
-        if get_loaded_filename(executing_user) is not None:
-            save_user_file(executing_user)
-        if not keep_going:
-            return ret_val
-    return ret_val
+    return "\n".join(Undo.apply_steps(executing_user, Undo.undo, min(amount, Undo.UNDO_HISTORY_DEPTH)))
 
 
 def redo_command(executing_user: str, amount: int) -> str:
-    ret_val = ""
-
-    for nr in range(amount):
-        keep_going, text = Undo.redo(executing_user)
-        ret_val += f'{text}\n' if (nr < amount-1) else text
-        if get_loaded_filename(executing_user) is not None:
-            save_user_file(executing_user)
-        if not keep_going:
-            return ret_val
-    return ret_val
+    return "\n".join(Undo.apply_steps(executing_user, Undo.redo, amount))
 
 # def setup_commands():
 #     def add_to_commands(com_name: str, command):
@@ -22,6 +22,12 @@ class SaveFileNotFoundException(CommandException):
         super().__init__("The savefile was unexpectedly deleted")
 
 
+class SaveConflictException(CommandException):
+    def __init__(self):
+        super().__init__("The savefile was changed by another bot process in the meantime, your last change was not "
+                         "saved. Please try again")
+
+
 class SaveFileImportException(CommandException):
     def __init__(self):
         super().__init__(f"The savefile you tried to import is from an old version that cannot be parsed, "
@@ -51,3 +57,8 @@ class UndoUpdateMissingException(Exception):
 class UndoMultipleStatException(Exception):
     def __init__(self):
         super().__init__("This UndoMultipleStatAction was not Updated")
+
+
+class CharacterDataException(CommandException):
+    def __init__(self, msg: str):
+        super().__init__(msg)
@@ -9,13 +9,16 @@ cache_folder: int = None
 bot_admin_id: int = None
 bot: discord.Bot = None
 message_deletion_delay: int = 10
+# replaces the saves folder, the unit tests and benchmarks use a temporary folder to never touch the real saves
+save_folder_override: str = None
 
 
 def get_save_folder_filepath():
+    if save_folder_override is not None:
+        return save_folder_override
     this_file_folder_path = pathlib.Path(__file__).parent.resolve()
     return os.path.join(this_file_folder_path, os.sep.join(['..', '..', '..', 'saves']))
 
 
 def get_cache_folder_filepath():
-    this_file_folder_path = pathlib.Path(__file__).parent.resolve()
-    return os.path.join(this_file_folder_path, os.sep.join(['..', '..', '..', 'saves', 'cache']))
+    return os.path.join(get_save_folder_filepath(), 'cache')
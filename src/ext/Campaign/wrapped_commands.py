@@ -1,6 +1,5 @@
 import logging
 import os
-from os.path import exists
 from typing import Callable, Awaitable
 
 import discord
@@ -9,10 +8,12 @@ from discord import ButtonStyle as Bstyle, Interaction, ApplicationContext, Part
 
 from . import packg_variables
 from .packg_variables import message_deletion_delay
+from ... import json_codec
 from ...ContextInfo import ContextInfo, init_context
 from .SaveDataManagement import char_data_access as char_data, \
     live_save_manager as live_save, \
-    save_file_management as save_manager
+    save_file_management as save_manager, \
+    save_writer
 from .SaveDataManagement.char_data_access import get_char
 from .campaign_exceptions import CommandException as ComExcept
 from . import base_command_logic as bcom, \
@@ -146,27 +147,32 @@ async def catch_and_respond_char_action(
         ctx: ContextInfo,
         char_tag: str, func: Callable[[str, str], str],
         send_char_view=False,
-        timeout=-1) -> bool:
+        timeout=-1,
+        read_only=False) -> bool:
     """
     Wraps a character specific command function, executing it with the user_id gained from the context.
-    Also if char_tag is None, it will try to load the character name from the current file
+    Also if char_tag is None, it will try to load the character name from the current file.
+    The function runs while the lock of the loaded save is held.
 
     :param ctx: The message context
     :param func: the function executed
     :param char_tag: the char_tag of the character that the command applies to
     :param send_char_view: determines whether the character editing view is sent after execution
     :param timeout: determines how long it takes for the response to dissappear. Set to None if it shouldn't disappear
+    :param read_only: if True, the function only reads the save and can run alongside other reading commands
     """
     executing_user = str(ctx.author.id)
     if timeout == -1:  # set to package default
         timeout = message_deletion_delay
     try:
-        if char_tag is None:
-            char_tag = char_data.get_char_tag_by_id(executing_user)
+        async with live_save.lock_loaded_save(executing_user, write=not read_only):
+            if char_tag is None:
+                char_tag = char_data.get_char_tag_by_id(executing_user)
+            response = func(executing_user, char_tag)
         if send_char_view:
-            await ctx.respond(func(executing_user, char_tag), view=StatView(executing_user, char_tag), delay=timeout)
+            await ctx.respond(response, view=StatView(executing_user, char_tag), delay=timeout)
         else:
-            await ctx.respond(func(executing_user, char_tag), view=UndoView(executing_user), delay=timeout)
+            await ctx.respond(response, view=UndoView(executing_user), delay=timeout)
         return True
     except ComExcept as err:
         await ctx.respond(err)
@@ -177,23 +183,28 @@ async def catch_and_respond_file_action(
         ctx: ContextInfo,
         func: Callable[[str], str],
         timeout: int = -1,
-        send_undo_view=True) -> bool:
+        send_undo_view=True,
+        read_only=False) -> bool:
     """
     Wraps a file specific command function, executing it with the user_id gained from the context.
+    The function runs while the lock of the loaded save is held.
 
     :param ctx: The message context
     :param func: the function executed
     :param timeout: determines how long it takes for the response to dissappear. Set to None if it shouldn't disappear
     :param send_undo_view: determines whether the undo view should be sent after execution
+    :param read_only: if True, the function only reads the save and can run alongside other reading commands
     """
     executing_user = str(ctx.author.id)
     if timeout == -1:  # set to package default
         timeout = message_deletion_delay
     try:
+        async with live_save.lock_loaded_save(executing_user, write=not read_only):
+            response = func(executing_user)
         if send_undo_view:
-            await ctx.respond(func(executing_user), view=UndoView(executing_user), delay=timeout)
+            await ctx.respond(response, view=UndoView(executing_user), delay=timeout)
         else:
-            await ctx.respond(func(executing_user), delay=timeout)
+            await ctx.respond(response, delay=timeout)
         return True
     except ComExcept as err:
         await ctx.respond(err)
@@ -203,7 +214,7 @@ async def catch_and_respond_file_action(
 async def catch_async_file_action(ctx: ContextInfo, func: Callable[[str], Awaitable[None]], send_undo_view=True) -> bool:
     """
         Wraps a file specific command function, executing it with the user_id gained from the context.
-        This is the async version
+        This is the async version, the function holds the write lock of the loaded save until it is done
 
         :param func: the function executed
         :param ctx: The message context
@@ -211,7 +222,8 @@ async def catch_async_file_action(ctx: ContextInfo, func: Callable[[str], Awaita
         """
     executing_user = str(ctx.author.id)
     try:
-        await func(executing_user)
+        async with live_save.lock_loaded_save(executing_user):
+            await func(executing_user)
         if send_undo_view:
             await ctx.respond("", view=UndoView(executing_user))
         return True
@@ -225,7 +237,8 @@ async def edit_char_view(ctx: ContextInfo, char_tag: str) -> bool:
                                               char_tag,
                                               lambda executing_user, tag: f"**{get_char(executing_user, tag).name}**",
                                               send_char_view=True,
-                                              timeout=None)
+                                              timeout=None,
+                                              read_only=True)
     return val
 
 
@@ -288,10 +301,17 @@ async def heal(ctx: ContextInfo, amount: int, char_tag: str = None) -> bool:
                                                lambda executing_user, tag: bcom.heal(executing_user, tag, amount))
 
 
+async def stat_batch(ctx: ContextInfo, operations: str) -> bool:
+    return await catch_and_respond_file_action(ctx,
+                                               lambda executing_user: bcom.apply_stat_batch(
+                                                   executing_user, bcom.parse_stat_batch(operations)))
+
+
 async def log(ctx: ContextInfo, adv=False) -> bool:
     return await catch_and_respond_file_action(ctx,
                                                lambda executing_user: bcom.log(executing_user, adv),
-                                               timeout=None)
+                                               timeout=None,
+                                               read_only=True)
 
 
 async def retag_pc(ctx: ContextInfo, char_tag_old: str, char_tag_new: str) -> bool:
@@ -359,27 +379,31 @@ async def get_cache(ctx: ContextInfo) -> bool:
 
         message = await cmp_hlp.get_bot().get_channel(chat_id).history(limit=1).next()
         filename = message.attachments[0].filename
+        save_name = filename.split(save_manager.save_files_suffix)[0]
         cache_save_path = packg_variables.get_cache_folder_filepath() + f'{os.sep}' + filename
-        local_save_path = packg_variables.get_save_folder_filepath() + f'{os.sep}' + filename
 
         await message.attachments[0].save(fp=cache_save_path)
-        if not exists(local_save_path):
-            os.rename(cache_save_path, local_save_path)
-            await ctx.respond(f"No local version found. Save {filename} has been imported.")
-            await load_command(ctx, file_name=filename.split(save_manager.save_files_suffix)[0])
-            bcom.session_increase(str(ctx.author.id))
-            return True
-
-        if save_manager.compare_savefile_novelty_by_path(local_save_path, cache_save_path) == -1:
-            os.remove(local_save_path)
-            os.rename(cache_save_path, local_save_path)
-            live_save.load_file_into_memory(filename, replace=True)
-            await ctx.respond("replaced")
-            await load_command(ctx, file_name=filename)
-            bcom.session_increase(str(ctx.author.id))
-        else:
-            os.remove(cache_save_path)
-            await ctx.respond("already up to date")
+        # commands of other users must not use the save while it is replaced
+        async with live_save.lock_save(save_name):
+            await save_writer.flush_save_async(save_name)
+            if not save_manager.stored_save_exists(save_name):
+                save_manager.import_save_file(cache_save_path, save_name)
+                await ctx.respond(f"No local version found. Save {filename} has been imported.")
+                await load_command(ctx, file_name=save_name)
+                bcom.session_increase(str(ctx.author.id))
+                return True
+
+            cache_dict = json_codec.read_file(cache_save_path)
+            local_dict = save_manager.save_file_to_unparsed_dict(save_name)
+            if save_manager.compare_unparsed_dict_novelty(local_dict, cache_dict) == -1:
+                save_manager.import_save_file(cache_save_path, save_name)
+                live_save.load_file_into_memory(save_name, replace=True)
+                await ctx.respond("replaced")
+                await load_command(ctx, file_name=save_name)
+                bcom.session_increase(str(ctx.author.id))
+            else:
+                os.remove(cache_save_path)
+                await ctx.respond("already up to date")
         return True
     except ComExcept as err:
         await ctx.respond(str(err))
@@ -391,6 +415,7 @@ async def download(ctx: ApplicationContext) -> bool:
     try:
         live_save.check_file_loaded(executing_user, raise_error=True)
         file_name = live_save.get_loaded_filename(executing_user)
+        await save_writer.flush_save_async(file_name)
         await ctx.respond("save file:", file=save_manager.get_savefile_as_discord_file(file_name))
         return True
     except ComExcept as err:
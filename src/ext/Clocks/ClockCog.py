@@ -1,12 +1,15 @@
+import asyncio
 import logging
+import os
 
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import ApplicationContext, Embed
 from ...command_helper_functions import channel_perm_check
 from .ClockViews import SelectClockSizeView, ClockAdjustmentView
-from .clock_data import load_clock_image_files
+from .clock_data import load_clock_image_files, reload_clock_images_if_changed
 
 logger = logging.getLogger('bot')
+CLOCK_RELOAD_INTERVAL_SECONDS = 30
 
 
 class ClockCog(commands.Cog):
@@ -22,11 +25,25 @@ class ClockCog(commands.Cog):
         view = SelectClockSizeView(clock_title)
         await ctx.respond("", embed=embed, view=view)
 
+    def cog_unload(self):
+        self.reload_clock_images.cancel()
+
+    @tasks.loop(seconds=CLOCK_RELOAD_INTERVAL_SECONDS, reconnect=False)
+    async def reload_clock_images(self):
+        try:
+            await asyncio.to_thread(reload_clock_images_if_changed)
+        except Exception as e:
+            logger.error("an error occurred while reloading the clock images")
+            logger.error(e)
+
 
 def setup(bot: commands.Bot):
     # Every extension should have this function
     load_clock_image_files()
     bot.add_view(SelectClockSizeView())
     bot.add_view(ClockAdjustmentView())
-    bot.add_cog(ClockCog())
+    clock_cog = ClockCog()
+    bot.add_cog(clock_cog)
+    if os.environ.get("CLOCK_HOT_RELOAD") == "1":
+        clock_cog.reload_clock_images.start()
     logger.info("clock extension loaded")
@@ -1,12 +1,16 @@
+import io
 import logging
 from os.path import exists
+from typing import Optional
 from discord import File
 import os
 
 import pathlib
 
 
-clock_files_dic = {}
+# clock size -> tick -> file name and image bytes
+clock_images_dic: dict[int, dict[int, tuple[str, bytes]]] = {}
+clock_assets_signature: frozenset = frozenset()
 clocks_rel_asset_folder_path = os.sep.join(['Assets', ''])
 
 logger = logging.getLogger('bot')
@@ -32,9 +36,10 @@ class Clock:
 
 
 def get_clock_image(clock: Clock) -> File:
-    if clock.size not in clock_files_dic:
+    if clock.size not in clock_images_dic:
         raise NoClockImageException("clocks of this size cannot be printed, missing files")
-    return File(clock_files_dic[clock.size][clock.ticks])
+    file_name, image_bytes = clock_images_dic[clock.size][clock.ticks]
+    return File(io.BytesIO(image_bytes), filename=file_name)
 
 
 def get_clock_asset_folder_path():
@@ -43,29 +48,81 @@ def get_clock_asset_folder_path():
 
 
 def load_clock_image_files():
+    """
+    Reads the images of every clock in the asset folder into memory. The loaded images replace the previous ones
+    all at once, so a reload never serves a partially loaded clock.
+    """
+    global clock_images_dic, clock_assets_signature
     if not exists(get_clock_asset_folder_path()):
         logger.error("Clock asset directory path given is invalid. Check if the correct path was assigned")
         return
-    clock_folders_list = os.listdir(get_clock_asset_folder_path())
-    for clock_folder in clock_folders_list:
-        load_single_clock_image_files(clock_folder)
-
-
-def load_single_clock_image_files(clock_folder: str):
+    new_images_dic = {}
+    for clock_folder in os.listdir(get_clock_asset_folder_path()):
+        if not clock_folder.isdigit():
+            logger.warning(f"Clock asset folder {clock_folder} is not a clock size and was skipped")
+            continue
+        clock_images = load_single_clock_image_files(clock_folder)
+        if clock_images is not None:
+            new_images_dic[int(clock_folder)] = clock_images
+    clock_images_dic = new_images_dic
+    clock_assets_signature = get_clock_assets_signature()
+
+
+def load_single_clock_image_files(clock_folder: str) -> Optional[dict[int, tuple[str, bytes]]]:
+    """
+    Reads the images of a single clock size
+
+    :param clock_folder: the folder of the clock, named after its size
+    :return: file name and image bytes for every tick, None if any tick is missing
+    """
     clock_size = int(clock_folder)
+    folder_path = get_clock_asset_folder_path() + clock_folder
+    folder_files = set(os.listdir(folder_path))
     clock_sub_files_dic = {}
     for tick in range(0, clock_size + 1):
         file_name = str(clock_size) + "-" + str(tick) + ".png"
         file_name_2 = str(clock_size) + "-" + str(tick) + ".jpg"
-        file_path = get_clock_asset_folder_path() + os.sep.join([clock_folder, file_name])
-        file_path_2 = get_clock_asset_folder_path() + os.sep.join([clock_folder, file_name_2])
-        if exists(file_path):
-            clock_sub_files_dic[tick] = file_path
-        elif exists(file_path_2):
-            clock_sub_files_dic[tick] = file_path_2
+        if file_name in folder_files:
+            found_name = file_name
+        elif file_name_2 in folder_files:
+            found_name = file_name_2
         else:
             logger.info(f"Clock {clock_size} is missing files and has been deactivated")
-            break
-    if len(clock_sub_files_dic) == clock_size + 1:
-        clock_files_dic[clock_size] = clock_sub_files_dic
-        logger.info("clock " + str(clock_size) + " loaded and working")
+            return None
+        with open(os.sep.join([folder_path, found_name]), 'rb') as image_file:
+            clock_sub_files_dic[tick] = (found_name, image_file.read())
+    logger.info("clock " + str(clock_size) + " loaded and working")
+    return clock_sub_files_dic
+
+
+def get_clock_assets_signature() -> frozenset:
+    """
+    Describes the current state of the clock asset folder, the signature changes whenever a clock image is added,
+    removed or changed
+
+    :return: path, modification time and size of every file in the clock asset folder
+    """
+    signature = set()
+    asset_folder_path = get_clock_asset_folder_path()
+    if not exists(asset_folder_path):
+        return frozenset()
+    for folder_entry in os.scandir(asset_folder_path):
+        if not folder_entry.is_dir():
+            continue
+        for file_entry in os.scandir(folder_entry.path):
+            stat = file_entry.stat()
+            signature.add((file_entry.path, stat.st_mtime_ns, stat.st_size))
+    return frozenset(signature)
+
+
+def reload_clock_images_if_changed() -> bool:
+    """
+    Reloads the clock images if the asset folder changed since they were loaded
+
+    :return: True if the images were reloaded
+    """
+    if get_clock_assets_signature() == clock_assets_signature:
+        return False
+    logger.info("clock assets changed, reloading clock images")
+    load_clock_image_files()
+    return True
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from json import JSONDecodeError
+from typing import Optional
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger('bot')
+
+KANKA_API_URL = 'https://kanka.io/api/1.0'
+KANKA_REQUEST_TIMEOUT_SECONDS = 10
+KANKA_CACHE_SECONDS = 300
+KANKA_CACHE_MAX_ENTRIES = 512
+KANKA_MAX_CONNECTIONS = 20
+
+
+class KankaRequestException(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class KankaCacheEntry:
+    def __init__(self, data: dict, etag: Optional[str], fetched_at: float):
+        self.data = data
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+
+class KankaClient:
+    """
+    Sends requests to the kanka api over one shared session, so connections are kept alive between queries.
+    Responses are cached for cache_seconds and revalidated with their ETag afterwards.
+    """
+
+    def __init__(self,
+                 api_url: str = KANKA_API_URL,
+                 timeout_seconds: float = KANKA_REQUEST_TIMEOUT_SECONDS,
+                 cache_seconds: float = KANKA_CACHE_SECONDS,
+                 cache_max_entries: int = KANKA_CACHE_MAX_ENTRIES):
+        self.api_url = api_url
+        self.timeout_seconds = timeout_seconds
+        self.cache_seconds = cache_seconds
+        self.cache_max_entries = cache_max_entries
+        # the token is part of the key, as two tokens may see different entities of the same campaign
+        self.cache: OrderedDict[tuple[str, str, str, int], KankaCacheEntry] = OrderedDict()
+        self.requests_sent = 0
+        self.cache_hits = 0
+        self.revalidations = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=KANKA_MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def search(self, campaign_id: str, token: str, query: str, page: int = 1) -> dict:
+        """
+        Searches the entities of a kanka campaign
+
+        :param campaign_id: the id of the campaign
+        :param token: the api token of the user
+        :param query: the search keyword
+        :param page: the result page of the kanka api, starting at 1
+        :return: the json response of the kanka search endpoint, its "data" entry is always a list
+        :raises KankaRequestException: if kanka could not be reached or did not answer with a result
+        """
+        key = (campaign_id, query, token, page)
+        now = time.monotonic()
+        entry = self.cache.get(key)
+        if entry is not None and now - entry.fetched_at < self.cache_seconds:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return entry.data
+
+        url = f"{self.api_url}/campaigns/{quote(campaign_id, safe='')}/search/{quote(query, safe='')}"
+        if page > 1:
+            url += f"?page={page}"
+        headers = {"Authorization": f"Bearer {token}", "Content-type": "application/json"}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        try:
+            self.requests_sent += 1
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    self.revalidations += 1
+                    entry.fetched_at = now
+                    self.cache.move_to_end(key)
+                    return entry.data
+                if response.status != 200:
+                    raise KankaRequestException(f"kanka answered with status {response.status}", response.status)
+                try:
+                    data = await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, JSONDecodeError) as e:
+                    logger.warning(f"kanka answered with a body that is not json: {type(e).__name__}")
+                    raise KankaRequestException("kanka answered with a body that is not json", response.status) from e
+                if not isinstance(data, dict) or not isinstance(data.get("data"), list):
+                    logger.warning("kanka answered without a result list")
+                    raise KankaRequestException("kanka answered without a result list", response.status)
+                etag = response.headers.get("ETag")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"kanka request failed: {type(e).__name__}")
+            raise KankaRequestException("kanka could not be reached") from e
+
+        self.cache[key] = KankaCacheEntry(data, etag, now)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+        return data
+
+
+def has_next_page(response: dict) -> bool:
+    """
+    :param response: the json response of the kanka search endpoint
+    :return: True if the kanka api has another result page for the search
+    """
+    links = response.get("links")
+    return isinstance(links, dict) and links.get("next") is not None
+
+
+kanka_client = KankaClient()
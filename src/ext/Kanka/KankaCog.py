@@ -1,10 +1,12 @@
+import asyncio
 import logging
-from typing import Union
+from typing import Union, Optional
 
-import requests
 from discord import ApplicationContext
 from discord.ext import commands
 
+from .KankaClient import kanka_client, KankaRequestException, has_next_page
+from .KankaViews import get_results_response_params
 from ...UserSaveDataManagement import load_user_dict, kanka_data_tag, save_user_dict
 
 logger = logging.getLogger('bot')
@@ -20,6 +22,14 @@ def load_kanka_data(user_id: str) -> Union[dict, None]:
 
 
 class KankaCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # keeps the closing session referenced until it is done
+        self._close_task: Optional[asyncio.Task] = None
+
+    def cog_unload(self):
+        self._close_task = self.bot.loop.create_task(kanka_client.close())
+
     @commands.slash_command(name="kanka", description="Query a kanka database you or your dungeonmaster has set up")
     async def kanka(self, ctx: ApplicationContext, query_keyword: str):
         kanka_data = load_kanka_data(str(ctx.author.id))
@@ -32,16 +42,23 @@ class KankaCog(commands.Cog):
         if kanka_id_tag not in kanka_data:
             await ctx.respond("Kanka campaign ID not set. Please use the _kanka\_setup_ command")
             return
-        search_query = 'https://kanka.io/api/1.0/campaigns/' + kanka_data[kanka_id_tag] + '/search/' + query_keyword
-        r = requests.get(search_query ,
-                         headers={"Authorization": f"Bearer {kanka_data[kanka_token_tag]}", "Content-type": "application/json"})
-        if r.status_code != 200:
+        campaign_id = kanka_data[kanka_id_tag]
+        token = kanka_data[kanka_token_tag]
+        try:
+            result_dict = await kanka_client.search(campaign_id, token, query_keyword)
+        except KankaRequestException as e:
+            if e.status is None:
+                await ctx.respond("Kanka could not be reached right now. Please try again later.")
+                return
             await ctx.respond("There seems to have been an error making the request. Keep in mind that API Tokens stop working after 365 days.\n"
                               "Also make sure you have the correct campaign ID")
             return
-        result_dict: dict = r.json()
-        for val in result_dict["data"]:
-            await ctx.respond(val["urls"]["view"])
+        await ctx.respond(**get_results_response_params(
+            query_keyword,
+            result_dict["data"],
+            has_next_page(result_dict),
+            lambda api_page: kanka_client.search(campaign_id, token, query_keyword, api_page)
+        ))
 
     @commands.slash_command(name="kanka_setup", description="set/remove the campaign id in order to use the kanka command")
     async def kanka_setup(self, ctx: ApplicationContext, campaign_id: str = None, token: str = None, remove: bool = False):
@@ -79,5 +96,5 @@ class KankaCog(commands.Cog):
 
 def setup(bot: commands.Bot):
     # Every extension should have this function
-    bot.add_cog(KankaCog())
+    bot.add_cog(KankaCog(bot))
     logger.info("kanka extension loaded")
\ No newline at end of file
@@ -0,0 +1,134 @@
+import logging
+from typing import Awaitable, Callable, Optional
+
+from discord import Interaction, ButtonStyle as Bstyle, PartialEmoji, Embed
+from discord.ui import View, button, Button
+
+from .KankaClient import KankaRequestException, has_next_page
+from ...command_helper_functions import edit_interaction_message
+
+logger = logging.getLogger('bot')
+RESULTS_PER_PAGE: int = 10
+RESULT_VIEW_TIMEOUT: int = 3600  # 1 hour
+
+
+def build_result_lines(results: list[dict]) -> list[str]:
+    """
+    Turns the entities of a kanka search into one markdown line each
+
+    :param results: the data list of a kanka search response
+    :return: a link to each entity, labeled with its name if kanka sent one
+    """
+    lines = []
+    for val in results:
+        url = val["urls"]["view"]
+        lines.append(f'[{val["name"]}]({url})' if "name" in val else url)
+    return lines
+
+
+def get_page_count(lines: list[str]) -> int:
+    return max(1, -(-len(lines) // RESULTS_PER_PAGE))
+
+
+def build_result_page_embed(query: str, lines: list[str], page: int, has_more: bool = False) -> Embed:
+    """
+    Builds the embed showing a single page of search results
+
+    :param query: the searched keyword
+    :param lines: every result line loaded so far
+    :param page: the index of the page, starting at 0
+    :param has_more: True if the kanka api has further results that were not loaded yet
+    :return: the embed of the page
+    """
+    page_lines = lines[page * RESULTS_PER_PAGE:(page + 1) * RESULTS_PER_PAGE]
+    embed = Embed(title=f'Kanka results for "{query}"')
+    embed.description = "\n".join(page_lines)
+    more = "+" if has_more else ""
+    embed.set_footer(text=f"{len(lines)}{more} results, page {page + 1}/{get_page_count(lines)}{more}")
+    return embed
+
+
+def get_results_response_params(query: str,
+                                results: list[dict],
+                                has_more: bool = False,
+                                fetch_page: Callable[[int], Awaitable[dict]] = None) -> dict:
+    """
+    Builds the parameters of the single message answering a kanka search
+
+    :param query: the searched keyword
+    :param results: the data list of the first page of a kanka search response
+    :param has_more: True if the kanka api has further result pages
+    :param fetch_page: requests a result page of the kanka api, the further pages are only requested once the user
+        pages past the loaded results
+    :return: the message parameters, with page buttons if the results do not fit on one page
+    """
+    if len(results) == 0:
+        return {"content": f'Kanka found no results for "{query}"'}
+    lines = build_result_lines(results)
+    has_more = has_more and fetch_page is not None
+    params = {"embed": build_result_page_embed(query, lines, 0, has_more)}
+    if get_page_count(lines) > 1 or has_more:
+        params["view"] = KankaResultView(query, lines, fetch_page=fetch_page if has_more else None)
+    return params
+
+
+class KankaResultView(View):
+    """
+    Page buttons for kanka search results. Pages are only built once they are opened, further result pages of the
+    kanka api are only requested once the user pages past the loaded results.
+    """
+
+    def __init__(self,
+                 query: str,
+                 lines: list[str],
+                 page: int = 0,
+                 fetch_page: Optional[Callable[[int], Awaitable[dict]]] = None):
+        super().__init__(timeout=RESULT_VIEW_TIMEOUT)
+        self.query = query
+        self.lines = lines
+        self.page = page
+        # requests the next kanka api page, None once every page was loaded
+        self.fetch_page = fetch_page
+        self.loaded_api_pages = 1
+        self.update_buttons()
+
+    def has_more(self) -> bool:
+        return self.fetch_page is not None
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= get_page_count(self.lines) - 1 and not self.has_more()
+
+    async def load_next_api_page(self):
+        try:
+            response = await self.fetch_page(self.loaded_api_pages + 1)
+        except KankaRequestException as e:
+            logger.warning(f"loading further kanka results failed: {e}")
+            self.fetch_page = None
+            return
+        self.loaded_api_pages += 1
+        results = response.get("data", [])
+        self.lines.extend(build_result_lines(results))
+        if len(results) == 0 or not has_next_page(response):
+            self.fetch_page = None
+
+    @button(style=Bstyle.grey, row=0, emoji=PartialEmoji.from_str("◀"))
+    async def previous_page(self, _: Button, interaction: Interaction):
+        await self.show_page(interaction, self.page - 1)
+
+    @button(style=Bstyle.grey, row=0, emoji=PartialEmoji.from_str("▶"))
+    async def next_page(self, _: Button, interaction: Interaction):
+        await self.show_page(interaction, self.page + 1)
+
+    async def show_page(self, interaction: Interaction, page: int):
+        while page >= get_page_count(self.lines) and self.has_more():
+            await self.load_next_api_page()
+        self.page = max(0, min(get_page_count(self.lines) - 1, page))
+        self.update_buttons()
+        await edit_interaction_message(
+            interaction,
+            {
+                "embed": build_result_page_embed(self.query, self.lines, self.page, self.has_more()),
+                "view": self
+            }
+        )
@@ -1,12 +1,13 @@
 import logging
 from os.path import exists
 import os
-import json
 import pathlib
 import random
 
 from discord import Embed
 
+from ... import json_codec
+
 relative_asset_folder_path = os.sep.join(['Assets', ''])
 
 logger = logging.getLogger('bot')
@@ -53,8 +54,7 @@ def init_data():
     if not exists(get_text_data_path()):
         raise Exception("Weather text data does not exist.")
     else:
-        with open(get_text_data_path()) as data:
-            weather_tracker_text_data = json.load(data)
+        weather_tracker_text_data = json_codec.read_file(get_text_data_path())
 
 
 def get_titles(is_pathfinder):
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('bot')
+
+# JSON_COMPACT=1 writes save and user files without indentation
+COMPACT_FILES = os.environ.get("JSON_COMPACT") == "1"
+FILE_INDENT = 4
+
+
+def is_accelerated() -> bool:
+    return orjson is not None
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parses a json document
+
+    :param data: the json text or its utf-8 encoded bytes
+    :return: the parsed data
+    :raises json.JSONDecodeError: if the document is not valid json
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any, sort_keys: bool = False) -> str:
+    """
+    Encodes data as compact json text
+
+    :param data: the data to encode
+    :param sort_keys: if True, the keys of every object are sorted
+    :return: the json text
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=_get_orjson_options(sort_keys)).decode()
+    return json.dumps(data, sort_keys=sort_keys, separators=(',', ':'))
+
+
+def encode_file(data: Any, sort_keys: bool = True, compact: bool = None) -> bytes:
+    """
+    Encodes data as the utf-8 content of a json file. Files are indented unless compact files were configured.
+    orjson only supports an indentation of two spaces, so it is only used for compact files and indented files always
+    keep the same format.
+
+    :param data: the data to encode
+    :param sort_keys: if True, the keys of every object are sorted
+    :param compact: overrides whether the file is indented
+    :return: the encoded file content
+    """
+    compact = COMPACT_FILES if compact is None else compact
+    if compact:
+        if orjson is not None:
+            return orjson.dumps(data, option=_get_orjson_options(sort_keys))
+        return json.dumps(data, sort_keys=sort_keys, separators=(',', ':'), ensure_ascii=False).encode()
+    return json.dumps(data, sort_keys=sort_keys, indent=FILE_INDENT, ensure_ascii=False).encode()
+
+
+def read_file(file_path: str) -> Any:
+    """
+    Reads and parses a json file
+
+    :param file_path: the path of the file
+    :return: the parsed data
+    :raises json.JSONDecodeError: if the file is not valid json
+    """
+    with open(file_path, 'rb') as file:
+        return loads(file.read())
+
+
+def write_file(file_path: str, data: Any, sort_keys: bool = True):
+    with open(file_path, 'wb') as file:
+        file.write(encode_file(data, sort_keys))
+
+
+def _get_orjson_options(sort_keys: bool) -> int:
+    options = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    return options
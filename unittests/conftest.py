@@ -0,0 +1,18 @@
+import pytest
+
+from src.ext.Campaign import packg_variables as packg_vars
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, undo_log
+
+
+@pytest.fixture(autouse=True, scope="session")
+def temporary_save_folder(tmp_path_factory):
+    """
+    Runs every test against a temporary saves folder, so the saves, undo logs and lock files of the bot are never
+    touched or left behind by the tests
+    """
+    packg_vars.save_folder_override = str(tmp_path_factory.mktemp("saves"))
+    save_manager.setup_save_folders()
+    yield
+    # pending undo log writes must not land in the real saves folder
+    undo_log.wait_for_writes()
+    packg_vars.save_folder_override = None
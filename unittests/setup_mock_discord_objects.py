@@ -60,7 +60,7 @@ def get_mocked_bot(cog_func) -> Bot:
     user2 = mock.MagicMock(discord.User)
     user2.name = test_discord_username2
     bot.add_cog = MagicMock(return_value=None, side_effect=lambda c: cog_func(c))
-    bot.fetch_user = AsyncMock(bot.fetch_user, side_effect=lambda user_id: user if str(user_id) == test_user_id else user2)
+    bot.fetch_user = AsyncMock(discord.Bot.fetch_user, side_effect=lambda user_id: user if str(user_id) == test_user_id else user2)
 
     bot.get_channel = MagicMock(discord.Bot.get_channel, return_value=MockChannel())
     return bot
@@ -33,8 +33,8 @@ def setup() -> tuple[CampaignCog, ApplicationContext]:
 
 
 def assert_char_value_base_save(char_tag: str, attribute_name: str, value: Any):
-    assert char_access.get_char(test_user_id, char_tag).__dict__[attribute_name] == value
-    assert save_manager.character_from_save_file(unit_test_save_file_name, char_tag).__dict__[attribute_name] == value
+    assert getattr(char_access.get_char(test_user_id, char_tag), attribute_name) == value
+    assert getattr(save_manager.character_from_save_file(unit_test_save_file_name, char_tag), attribute_name) == value
 
 
 def assert_save_value_base_save(attribute_name: str, value: Any):
@@ -113,3 +113,15 @@ class TestCampaignCogInvalid:
         # failed cause too many characters
         await assert_failed_command(cog.add_c(ctx, "ttt", "test"), 10)
 
+    @pytest.mark.asyncio
+    async def test_invalid_stat_batch(self, create_own_char: tuple[CampaignCog, ApplicationContext]):
+        cog, ctx = create_own_char
+        undo_len = len(Undo.get_action_queue(test_user_id))
+        for operations in (f"{test_char_tag} crit 1; missing crit 1",
+                           f"{test_char_tag} crit 1; {test_char_tag} max_damage 4",
+                           f"{test_char_tag} crit 1; {test_char_tag} dodge -1",
+                           f"{test_char_tag} crit one",
+                           f"{test_char_tag} crit",
+                           " ; "):
+            await assert_failed_command(cog.stat_batch(ctx, operations), undo_len)
+            assert_char_value_base_save(test_char_tag, char_file.LABEL_CRITS, 0)
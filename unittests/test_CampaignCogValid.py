@@ -32,8 +32,8 @@ def setup() -> tuple[CampaignCog, ApplicationContext]:
 
 
 def assert_char_value_base_save(char_tag: str, attribute_name: str, value: Any):
-    assert char_access.get_char(test_user_id, char_tag).__dict__[attribute_name] == value
-    assert save_manager.character_from_save_file(unit_test_save_file_name, char_tag).__dict__[attribute_name] == value
+    assert getattr(char_access.get_char(test_user_id, char_tag), attribute_name) == value
+    assert getattr(save_manager.character_from_save_file(unit_test_save_file_name, char_tag), attribute_name) == value
 
 
 def assert_save_value_base_save(attribute_name: str, value: Any):
@@ -349,6 +349,29 @@ class TestCampaignCogValid:
         await assert_command(cog.redo(ctx))
         assert_char_value_base_save(NEW_TAG, char_file.LABEL_TAG, NEW_TAG)
 
+    @pytest.mark.asyncio
+    async def test_stat_batch(self, create_own_char: tuple[CampaignCog, ApplicationContext]):
+        cog, ctx = create_own_char
+        await assert_command(cog.add_c(ctx, "other", "other"))
+
+        def pre_undo_assert():
+            assert_char_value_base_save(test_char_tag, char_file.LABEL_CRITS, 2)
+            assert_char_value_base_save(test_char_tag, char_file.LABEL_CAUSED, 20)
+            assert_char_value_base_save(test_char_tag, char_file.LABEL_MAXDAM, 12)
+            assert_char_value_base_save("other", char_file.LABEL_TAKEN, 7)
+            assert_char_value_base_save("other", char_file.LABEL_DODGE, 1)
+
+        def post_undo_assert():
+            for stat in (char_file.LABEL_CRITS, char_file.LABEL_CAUSED, char_file.LABEL_MAXDAM):
+                assert_char_value_base_save(test_char_tag, stat, 0)
+            for stat in (char_file.LABEL_TAKEN, char_file.LABEL_DODGE):
+                assert_char_value_base_save("other", stat, 0)
+
+        await assert_command(cog.stat_batch(ctx, f"{test_char_tag} crit 2; {test_char_tag} cause 8; other take 7;"
+                                                 f"{test_char_tag} damage_caused 12\nother dodge 1"))
+        pre_undo_assert()
+        await undo_redo(cog, ctx, pre_undo_assert, post_undo_assert)
+
     @pytest.mark.asyncio
     async def test_session(self, create_own_char: tuple[CampaignCog, ApplicationContext]):
         cog, ctx = create_own_char
@@ -7,7 +7,7 @@ from .unit_test_template_manager import get_template_path, move_template_save_to
 
 
 def compare_char_with_dic(character: Character, check_char_dic: dict):
-    for tag, value in character.__dict__.items():
+    for tag, value in character.to_dict().items():
         assert check_char_dic[tag] == value
 
 
@@ -1,4 +1,7 @@
+import pytest
+
 from src.ext.Campaign.Character import Character
+from src.ext.Campaign.campaign_exceptions import CharacterDataException
 
 
 class TestCharacter:
@@ -90,3 +93,32 @@ class TestCharacter:
         c.heal(20)
         assert c.damage_healed == 30
 
+    def test_dict_round_trip(self):
+        c1 = Character("test", "test_name")
+        c1.set_player("20")
+        c1.cause_dam(30, 2)
+        c2 = Character.from_dict(c1.to_dict())
+        assert c2.to_dict() == c1.to_dict()
+        assert not hasattr(c2, "__dict__")
+
+    def test_from_dict_keeps_defaults(self):
+        c = Character.from_dict({"tag": "test", "name": "test_name", "crits": 3})
+        assert c.crits == 3
+        assert c.dodged == 0
+        assert c.player == ""
+
+    def test_from_dict_validates(self):
+        with pytest.raises(CharacterDataException):
+            Character.from_dict({"tag": "test", "name": "test_name", "mana": 3})
+        with pytest.raises(CharacterDataException):
+            Character.from_dict({"tag": "test", "name": "test_name", "crits": "3"})
+        with pytest.raises(CharacterDataException):
+            Character.from_dict({"tag": "test", "name": "test_name", "kills": True})
+
+    def test_from_dict_coerces_legacy_values(self):
+        c = Character.from_dict({"tag": "test", "name": "test_name", "player": 1234, "crits": 3.0})
+        assert c.player == "1234"
+        assert c.crits == 3
+        assert type(c.crits) is int
+        with pytest.raises(CharacterDataException):
+            Character.from_dict({"tag": "test", "name": "test_name", "crits": 3.5})
@@ -0,0 +1,53 @@
+import builtins
+import os
+import shutil
+
+import pytest
+
+from src.ext.Clocks import clock_data
+from src.ext.Clocks.clock_data import Clock
+
+
+@pytest.fixture
+def asset_copy(tmp_path, monkeypatch):
+    asset_path = os.path.join(tmp_path, "Assets", "")
+    shutil.copytree(clock_data.get_clock_asset_folder_path(), asset_path)
+    monkeypatch.setattr(clock_data, "get_clock_asset_folder_path", lambda: asset_path)
+    clock_data.load_clock_image_files()
+    yield asset_path
+    monkeypatch.undo()
+    clock_data.load_clock_image_files()
+
+
+class TestClockImages:
+
+    def test_clock_images_are_served_from_memory(self, monkeypatch):
+        clock_data.load_clock_image_files()
+        with open(clock_data.get_clock_asset_folder_path() + os.sep.join(["4", "4-2.jpg"]), 'rb') as image_file:
+            expected = image_file.read()
+
+        def failing_open(*args, **kwargs):
+            raise AssertionError("clock image was read from the disk")
+
+        monkeypatch.setattr(builtins, "open", failing_open)
+        file = clock_data.get_clock_image(Clock("test", 4, 2))
+        assert file.filename == "4-2.jpg"
+        assert file.fp.read() == expected
+
+    def test_missing_size_raises(self):
+        clock_data.load_clock_image_files()
+        with pytest.raises(clock_data.NoClockImageException):
+            clock_data.get_clock_image(Clock("test", 5))
+
+    def test_changed_assets_are_reloaded(self, asset_copy):
+        assert not clock_data.reload_clock_images_if_changed()
+
+        os.remove(os.path.join(asset_copy, "4", "4-3.jpg"))
+        assert clock_data.reload_clock_images_if_changed()
+        with pytest.raises(clock_data.NoClockImageException):
+            clock_data.get_clock_image(Clock("test", 4, 3))
+
+        shutil.copy(os.path.join(asset_copy, "4", "4-2.jpg"), os.path.join(asset_copy, "4", "4-3.jpg"))
+        assert clock_data.reload_clock_images_if_changed()
+        assert clock_data.get_clock_image(Clock("test", 4, 3)).fp.read() == \
+               clock_data.get_clock_image(Clock("test", 4, 2)).fp.read()
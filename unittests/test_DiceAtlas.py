@@ -0,0 +1,39 @@
+from PIL import Image as PILImage
+from PIL.Image import open as image_open
+
+from src.ext.BladesUtility import Dice, DiceAtlas
+
+
+def crop_reference(sheet_path: str, index: int, sprite_size: int):
+    sheet = image_open(sheet_path).convert('RGBA')
+    return DiceAtlas.get_sprite_from_uniform_spritesheet(sheet, sprite_size, index)
+
+
+class TestDiceAtlas:
+
+    def test_atlas_matches_spritesheets(self):
+        DiceAtlas.load_dice_atlas()
+        for index in range(DiceAtlas.blades_face_amount):
+            assert DiceAtlas.get_blades_face(index).tobytes() == crop_reference(
+                DiceAtlas.get_blade_dice_spritesheet_filepath(), index, DiceAtlas.blades_dice_sprite_size).tobytes()
+        for index in range(DiceAtlas.sided_base_amount):
+            assert DiceAtlas.get_sided_die_base(index).tobytes() == crop_reference(
+                DiceAtlas.get_sized_dice_spritesheet_filepath(), index, DiceAtlas.sided_die_sprite_size).tobytes()
+        for success in range(-1, 3):
+            assert DiceAtlas.get_success_tag_sprite(success).mode == 'RGBA'
+
+    def test_roll_images_do_not_open_files(self, monkeypatch):
+        DiceAtlas.load_dice_atlas()
+
+        def failing_open(*args, **kwargs):
+            raise AssertionError("spritesheet was opened during a roll")
+
+        monkeypatch.setattr(PILImage, "open", failing_open)
+        monkeypatch.setattr(DiceAtlas, "image_open", failing_open)
+        blades_image = Dice.generate_end_image(6, Dice.get_blades_sprite_size(), 100, True)
+        Dice.interpret_roll_info(Dice.get_blades_sprite_size(), 2, blades_image, [6, 6, 1, 2, 3, 4])
+        sized_image = Dice.generate_end_image(3, Dice.get_sided_die_sprite_size(), 5, True)
+        base_image = DiceAtlas.get_sided_die_base(Dice.get_base_sprite_indx(100))
+        for index, nr_rolled_index in enumerate([3, 41, 99]):
+            Dice.paste_nr_image(sized_image, base_image, index, 5, nr_rolled_index)
+        assert blades_image.getbbox() is not None and sized_image.getbbox() is not None
@@ -0,0 +1,54 @@
+import asyncio
+import io
+import os
+
+import pytest
+from PIL.Image import open as image_open
+
+from src.ext.BladesUtility import Dice, DiceAtlas
+from src.ext.BladesUtility.BladesResources.ResourceSpriteBuilding import build_stress_track_image
+from src.ext.BladesUtility.BladesResources.ResourceTracker import ResourceTracker
+from src.ext.BladesUtility.ImageEncoding import create_image_file, merged_image_name
+
+
+class RecordingContext:
+    def __init__(self):
+        self.responses = []
+
+    async def respond(self, **kwargs):
+        self.responses.append(kwargs)
+
+
+def list_asset_files() -> set[str]:
+    return set(os.listdir(DiceAtlas.get_asset_folder_filepath()))
+
+
+class TestImageEncoding:
+
+    def test_image_file_is_in_memory(self):
+        image = DiceAtlas.get_blades_face(0)
+        file = create_image_file(image)
+        assert file.filename == merged_image_name
+        decoded = image_open(file.fp)
+        assert decoded.size == image.size
+        assert decoded.convert('RGBA').tobytes() == image.tobytes()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_rolls_do_not_touch_the_disk(self):
+        assets_before = list_asset_files()
+        contexts = [RecordingContext() for _ in range(8)]
+        await asyncio.gather(*[Dice.blades_roll_command(ctx, dice_amount=index % 5 + 1)
+                               for index, ctx in enumerate(contexts)])
+        await Dice.all_size_roll(contexts[0], 4, 20)
+        await Dice.all_size_roll_sorted(contexts[0], 4, 6)
+        assert list_asset_files() == assets_before
+
+        for index, ctx in enumerate(contexts):
+            success_file, merged_file = ctx.responses[0]["files"]
+            assert isinstance(merged_file.fp, io.BytesIO)
+            assert image_open(merged_file.fp).size[0] == Dice.get_blades_sprite_size() * (index % 5 + 1)
+        assert all(isinstance(response["file"].fp, io.BytesIO) for response in contexts[0].responses[1:])
+
+    def test_stress_track_is_encoded_as_png(self):
+        png = build_stress_track_image(ResourceTracker(3, 9))
+        assert image_open(io.BytesIO(png)).format == "PNG"
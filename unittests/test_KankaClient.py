@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.ext.Kanka.KankaClient import KankaClient, KankaRequestException, has_next_page
+
+campaign_id = "1234"
+token = "test_token"
+result_etag = '"result-v1"'
+
+
+class StubKanka:
+    def __init__(self):
+        self.requests: list[web.Request] = []
+        self.peers = []
+        self.delay = 0.0
+        self.status = 200
+        self.html_body = False
+        self.error_body = False
+        self.api_pages = 1
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.requests.append(request)
+        self.peers.append(request.transport.get_extra_info("peername"))
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        if self.html_body:
+            return web.Response(text="<html>Service Unavailable</html>", content_type="text/html")
+        if self.error_body:
+            return web.json_response({"message": "Unauthenticated."})
+        if request.headers.get("If-None-Match") == result_etag:
+            return web.Response(status=304, headers={"ETag": result_etag})
+        query = request.match_info["query"]
+        page = int(request.query.get("page", 1))
+        next_link = f"{request.path}?page={page + 1}" if page < self.api_pages else None
+        return web.json_response(
+            {"data": [{"urls": {"view": f"https://kanka.io/entities/{query}/{page}"}}], "links": {"next": next_link}},
+            headers={"ETag": result_etag}
+        )
+
+
+@pytest_asyncio.fixture
+async def stub_server():
+    stub = StubKanka()
+    app = web.Application()
+    app.router.add_get("/campaigns/{campaign}/search/{query}", stub.search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    client = KankaClient(api_url=f"http://127.0.0.1:{port}", timeout_seconds=0.5, cache_seconds=60)
+    yield stub, client
+    await client.close()
+    await runner.cleanup()
+
+
+class TestKankaClient:
+
+    @pytest.mark.asyncio
+    async def test_cached_result_is_not_requested_again(self, stub_server):
+        stub, client = stub_server
+        first = await client.search(campaign_id, token, "dragon")
+        second = await client.search(campaign_id, token, "dragon")
+        assert first == second
+        assert first["data"][0]["urls"]["view"].endswith("dragon/1")
+        assert len(stub.requests) == 1
+        assert stub.requests[0].headers["Authorization"] == f"Bearer {token}"
+
+        await client.search(campaign_id, token, "city")
+        assert len(stub.requests) == 2
+        # both queries were sent over the same kept alive connection
+        assert stub.peers[0] == stub.peers[1]
+
+    @pytest.mark.asyncio
+    async def test_expired_result_is_revalidated(self, stub_server):
+        stub, client = stub_server
+        client.cache_seconds = 0
+        first = await client.search(campaign_id, token, "dragon")
+        second = await client.search(campaign_id, token, "dragon")
+        assert second is first
+        assert stub.requests[1].headers["If-None-Match"] == result_etag
+        assert client.revalidations == 1
+
+    @pytest.mark.asyncio
+    async def test_tokens_do_not_share_results(self, stub_server):
+        stub, client = stub_server
+        await client.search(campaign_id, token, "dragon")
+        await client.search(campaign_id, "other_token", "dragon")
+        assert len(stub.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_error_status_raises(self, stub_server):
+        stub, client = stub_server
+        stub.status = 401
+        with pytest.raises(KankaRequestException) as e:
+            await client.search(campaign_id, token, "dragon")
+        assert e.value.status == 401
+        assert len(client.cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_api_pages_are_cached_separately(self, stub_server):
+        stub, client = stub_server
+        stub.api_pages = 2
+        first = await client.search(campaign_id, token, "dragon")
+        second = await client.search(campaign_id, token, "dragon", 2)
+        assert has_next_page(first) and not has_next_page(second)
+        assert second["data"][0]["urls"]["view"].endswith("dragon/2")
+        assert "page" not in stub.requests[0].query
+        assert stub.requests[1].query["page"] == "2"
+        await client.search(campaign_id, token, "dragon", 2)
+        assert len(stub.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_non_json_body_raises(self, stub_server):
+        stub, client = stub_server
+        stub.html_body = True
+        with pytest.raises(KankaRequestException) as e:
+            await client.search(campaign_id, token, "dragon")
+        assert e.value.status == 200
+        assert len(client.cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_body_without_results_raises(self, stub_server):
+        stub, client = stub_server
+        stub.error_body = True
+        with pytest.raises(KankaRequestException) as e:
+            await client.search(campaign_id, token, "dragon")
+        assert e.value.status == 200
+        assert len(client.cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_response_times_out(self, stub_server):
+        stub, client = stub_server
+        stub.delay = 2
+        with pytest.raises(KankaRequestException) as e:
+            await client.search(campaign_id, token, "dragon")
+        assert e.value.status is None
@@ -0,0 +1,64 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.ext.Kanka import KankaViews
+
+
+def build_results(amount: int) -> list[dict]:
+    return [{"name": f"entity {index}", "urls": {"view": f"https://kanka.io/entities/{index}"}}
+            for index in range(amount)]
+
+
+class TestKankaViews:
+
+    def test_all_results_fit_into_one_message(self):
+        params = KankaViews.get_results_response_params("entity", build_results(7))
+        assert "view" not in params
+        description = params["embed"].description
+        assert description.count("\n") == 6
+        assert "[entity 6](https://kanka.io/entities/6)" in description
+
+    def test_no_results(self):
+        params = KankaViews.get_results_response_params("missing", [])
+        assert params == {"content": 'Kanka found no results for "missing"'}
+
+    @pytest.mark.asyncio
+    async def test_results_are_paged(self):
+        params = KankaViews.get_results_response_params("entity", build_results(25))
+        view: KankaViews.KankaResultView = params["view"]
+        assert params["embed"].footer.text == "25 results, page 1/3"
+        assert view.previous_page.disabled and not view.next_page.disabled
+
+        interaction = MagicMock()
+        interaction.response.is_done.return_value = False
+        interaction.response.edit_message = AsyncMock()
+        await view.show_page(interaction, 2)
+        await view.show_page(interaction, 5)
+        embed = interaction.response.edit_message.call_args.kwargs["embed"]
+        assert embed.footer.text == "25 results, page 3/3"
+        assert embed.description.count("\n") == 4
+        assert view.next_page.disabled and not view.previous_page.disabled
+
+    @pytest.mark.asyncio
+    async def test_further_api_pages_are_loaded_lazily(self):
+        requested_pages = []
+
+        async def fetch_page(api_page: int) -> dict:
+            requested_pages.append(api_page)
+            return {"data": build_results(15), "links": {"next": None if api_page == 2 else "next"}}
+
+        params = KankaViews.get_results_response_params("entity", build_results(15), True, fetch_page)
+        view: KankaViews.KankaResultView = params["view"]
+        assert params["embed"].footer.text == "15+ results, page 1/2+"
+
+        interaction = MagicMock()
+        interaction.response.is_done.return_value = False
+        interaction.response.edit_message = AsyncMock()
+        await view.show_page(interaction, 1)
+        assert requested_pages == []
+        await view.show_page(interaction, 2)
+        assert requested_pages == [2]
+        embed = interaction.response.edit_message.call_args.kwargs["embed"]
+        assert embed.footer.text == "30 results, page 3/3"
+        assert view.next_page.disabled
@@ -0,0 +1,86 @@
+import pytest
+
+from src.ext.Campaign import base_command_logic
+from src.ext.Campaign.Character import Character
+from src.ext.command_exceptions import CommandException
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    char_data_access as char_access, \
+    player_index
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+fez_player = "387274755616669696"
+
+
+class TestPlayerIndex:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        yield
+        live_manager.unload_all_files_and_users()
+        cleanup_template()
+
+    @staticmethod
+    def get_index() -> dict[str, str]:
+        return player_index.get_player_index(live_manager.get_loaded_dict(test_user_id))
+
+    def test_build_index(self):
+        chars = {"a": Character("a", "A"), "b": Character("b", "B"), "c": Character("c", "C")}
+        chars["a"].set_player("1")
+        chars["b"].set_player("1")
+        chars["c"].set_player("2")
+        assert player_index.build_player_index(chars) == {"1": "a", "2": "c"}
+
+    def test_lookups(self):
+        assert char_access.get_char_tag_by_id(test_user_id, fez_player) == "fez"
+        assert char_access.get_char_name_by_id(test_user_id, int(fez_player)) == \
+               char_access.get_char(test_user_id, "fez").name
+        assert char_access.check_if_user_has_char(test_user_id, fez_player)
+        assert not char_access.check_if_user_has_char(test_user_id, "1")
+        with pytest.raises(CommandException):
+            char_access.get_char_tag_by_id(test_user_id, "1")
+
+    def test_unclaim_and_undo(self):
+        base_command_logic.unclaim_char(test_user_id, "fez")
+        assert fez_player not in self.get_index()
+        base_command_logic.undo_command(test_user_id, 1)
+        assert self.get_index()[fez_player] == "fez"
+        base_command_logic.redo_command(test_user_id, 1)
+        assert fez_player not in self.get_index()
+
+    def test_retag_and_undo(self):
+        base_command_logic.retag_character(test_user_id, "fez", "fezzik")
+        assert self.get_index()[fez_player] == "fezzik"
+        base_command_logic.undo_command(test_user_id, 1)
+        assert self.get_index()[fez_player] == "fez"
+
+    def test_rem_char_and_undo(self):
+        base_command_logic.rem_char(test_user_id, "fez")
+        assert fez_player not in self.get_index()
+        base_command_logic.undo_command(test_user_id, 1)
+        assert self.get_index()[fez_player] == "fez"
+
+    def test_rem_player(self):
+        live_manager.add_player_to_save(test_user_id, fez_player)
+        live_manager.rem_player_from_save(test_user_id, fez_player)
+        assert fez_player not in self.get_index()
+        assert char_access.get_char(test_user_id, "fez").player == ""
+
+    def test_index_is_not_saved(self):
+        self.get_index()
+        live_manager.save_user_file(test_user_id)
+        assert player_index.player_index_tag not in save_manager.save_file_to_unparsed_dict(unit_test_save_file_name)
+
+    def test_character_limit(self, monkeypatch):
+        monkeypatch.setattr(base_command_logic, "MAX_SAVE_CHARACTERS", 5)
+        base_command_logic.add_char(test_user_id, "new", "New")
+        with pytest.raises(CommandException):
+            base_command_logic.add_char(test_user_id, "newer", "Newer")
+
+        monkeypatch.setattr(base_command_logic, "MAX_SAVE_CHARACTERS", 0)
+        for index in range(20):
+            base_command_logic.add_char(test_user_id, f"char{index}", f"Char {index}")
+        assert len(live_manager.get_loaded_chars(test_user_id)) == 25
@@ -0,0 +1,72 @@
+import pytest
+from PIL.Image import open as image_open
+
+from src.ext.BladesUtility import Dice
+from src.ext.BladesUtility.RenderCache import RenderCache
+
+
+class RecordingContext:
+    def __init__(self):
+        self.responses = []
+
+    async def respond(self, **kwargs):
+        self.responses.append(kwargs)
+
+
+class TestRenderCache:
+
+    @pytest.fixture(autouse=True)
+    def clear_caches(self):
+        Dice.blades_roll_cache.clear()
+        Dice.sized_roll_cache.clear()
+        yield "setup"
+        Dice.blades_roll_cache.clear()
+        Dice.sized_roll_cache.clear()
+
+    def test_least_recently_used_image_is_dropped(self):
+        cache = RenderCache("test", 2)
+        renders = []
+
+        def render(value: bytes):
+            renders.append(value)
+            return value
+
+        cache.get_or_render("a", lambda: render(b"a"))
+        cache.get_or_render("b", lambda: render(b"b"))
+        assert cache.get_or_render("a", lambda: render(b"x")) == b"a"
+        cache.get_or_render("c", lambda: render(b"c"))
+        assert not cache.contains("b")
+        assert renders == [b"a", b"b", b"c"]
+        assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_repeated_outcome_is_not_rendered_again(self, monkeypatch):
+        first = await Dice.get_blades_roll_png(2, [2, 1, 0, 0, 0, 1], True)
+        monkeypatch.setattr(Dice, "render_blades_roll", lambda *args: pytest.fail("outcome was rendered twice"))
+        assert await Dice.get_blades_roll_png(2, [2, 1, 0, 0, 0, 1], True) == first
+        assert Dice.blades_roll_cache.hits == 1
+
+        # the crit flag changes the image of the same faces
+        monkeypatch.undo()
+        assert await Dice.get_blades_roll_png(1, [2, 1, 0, 0, 0, 1], True) != first
+
+    @pytest.mark.asyncio
+    async def test_cached_image_matches_fresh_render(self):
+        rolled_array = [0, 2, 0, 1, 0, 0]
+        assert await Dice.get_sorted_roll_png(6, rolled_array) == await Dice.get_sorted_roll_png(6, rolled_array)
+        fresh = Dice.render_sorted_roll(6, ((1, 2), (3, 1)))
+        assert await Dice.get_sorted_roll_png(6, rolled_array) == fresh
+        assert Dice.sized_roll_cache.get_stats()["hit_rate"] == 2 / 3
+
+    @pytest.mark.asyncio
+    async def test_warm_up_covers_sorted_rolls(self, monkeypatch):
+        Dice.warm_up_roll_caches(max_dice=3)
+        rendered_count = Dice.blades_roll_cache.misses
+        monkeypatch.setattr(Dice, "render_blades_roll", lambda *args: pytest.fail("warm up missed an outcome"))
+        for _ in range(30):
+            ctx = RecordingContext()
+            await Dice.blades_roll_command(ctx, 3, sorted_dice=True)
+            _, merged_file = ctx.responses[0]["files"]
+            assert image_open(merged_file.fp).size == (Dice.get_blades_sprite_size() * 3, Dice.get_blades_sprite_size())
+        await Dice.blades_roll_command(RecordingContext(), 0, sorted_dice=True)
+        assert Dice.blades_roll_cache.misses == rendered_count
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.ext.BladesUtility import RenderExecutor
+
+
+class TestRenderExecutor:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        RenderExecutor.configure_render_executor(pool_size=2, max_pending=2)
+        yield "setup"
+        RenderExecutor.shutdown_render_executor()
+
+    @pytest.mark.asyncio
+    async def test_render_runs_outside_event_loop(self):
+        loop_thread = threading.get_ident()
+        render_thread = await RenderExecutor.run_render("test", threading.get_ident)
+        assert render_thread != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_during_render(self):
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(RenderExecutor.run_render("test", time.sleep, 0.1), ticker())
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.09
+
+    @pytest.mark.asyncio
+    async def test_pending_renders_are_limited(self):
+        running = []
+        most_running = []
+        lock = threading.Lock()
+
+        def render():
+            with lock:
+                running.append(1)
+                most_running.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+            return b"png"
+
+        results = await asyncio.gather(*[RenderExecutor.run_render("test", render) for _ in range(6)])
+        assert results == [b"png"] * 6
+        assert max(most_running) <= 2
+        stats = RenderExecutor.get_render_stats()
+        assert stats["jobs"] >= 6 and stats["max_wait_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_render_errors_reach_the_caller(self):
+        def broken_render():
+            raise ValueError("broken")
+
+        failed_before = RenderExecutor.get_render_stats()["failed"]
+        with pytest.raises(ValueError):
+            await RenderExecutor.run_render("test", broken_render)
+        assert RenderExecutor.get_render_stats()["failed"] == failed_before + 1
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from src import json_codec
+from src.ext.Campaign import base_command_logic
+from src.ext.Campaign.campaign_exceptions import SaveConflictException
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, save_journal, save_writer, save_index
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+def write_from_other_process(crits: int):
+    save_path = save_manager.build_savefile_path(unit_test_save_file_name)
+    save_dic = json_codec.read_file(save_path)
+    save_dic[save_manager.character_tag]["fez"]["crits"] = crits
+    save_manager.write_json_file(save_path, save_dic)
+
+
+def add_player_from_other_process(player: str):
+    save_path = save_manager.build_savefile_path(unit_test_save_file_name)
+    save_dic = json_codec.read_file(save_path)
+    save_dic[save_manager.players_tag].append(player)
+    save_manager.write_json_file(save_path, save_dic)
+
+
+class TestSaveFileLocks:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        yield
+        cleanup_template()
+
+    @staticmethod
+    def get_crits() -> int:
+        return live_manager.get_loaded_chars(test_user_id)["fez"].crits
+
+    def test_own_writes_keep_save_fresh(self):
+        base_command_logic.crit(test_user_id, "fez")
+        assert not save_manager.is_save_stale(unit_test_save_file_name)
+
+    @pytest.mark.asyncio
+    async def test_stale_save_is_reloaded(self):
+        write_from_other_process(42)
+        assert save_manager.is_save_stale(unit_test_save_file_name)
+        async with live_manager.lock_loaded_save(test_user_id):
+            assert self.get_crits() == 42
+        assert not save_manager.is_save_stale(unit_test_save_file_name)
+
+    def test_conflicting_write_is_refused(self):
+        write_from_other_process(42)
+        with pytest.raises(SaveConflictException):
+            base_command_logic.crit(test_user_id, "fez")
+        assert not live_manager.check_file_in_memory(unit_test_save_file_name)
+        assert self.get_crits() == 42
+        base_command_logic.crit(test_user_id, "fez")
+        assert save_manager.character_from_save_file(unit_test_save_file_name, "fez").crits == 43
+
+    @pytest.mark.asyncio
+    async def test_conflicting_pending_changes_are_refused(self, monkeypatch):
+        # the pending change only exists in memory
+        monkeypatch.setattr(save_journal, "SAVE_JOURNAL_ENABLED", False)
+        async with live_manager.lock_loaded_save(test_user_id):
+            base_command_logic.crit(test_user_id, "fez")
+        write_from_other_process(42)
+        with pytest.raises(SaveConflictException):
+            async with live_manager.lock_loaded_save(test_user_id):
+                pass
+        assert not live_manager.check_file_in_memory(unit_test_save_file_name)
+        assert self.get_crits() == 42
+
+    @pytest.mark.skipif(save_manager.fcntl is None, reason="advisory file locks need fcntl")
+    def test_lock_is_exclusive(self):
+        fcntl = save_manager.fcntl
+        with save_manager.lock_save_file(unit_test_save_file_name, exclusive=False):
+            with open(save_manager.build_lockfile_path(unit_test_save_file_name)) as other_lock:
+                fcntl.flock(other_lock.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(other_lock.fileno(), fcntl.LOCK_UN)
+        with save_manager.lock_save_file(unit_test_save_file_name):
+            with open(save_manager.build_lockfile_path(unit_test_save_file_name)) as other_lock:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(other_lock.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+
+    @pytest.mark.skipif(save_manager.fcntl is None, reason="advisory file locks need fcntl")
+    @pytest.mark.asyncio
+    async def test_journal_append_waits_on_writer_thread(self):
+        fcntl = save_manager.fcntl
+        with open(save_manager.build_lockfile_path(unit_test_save_file_name)) as other_lock:
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_EX)
+            # returns while the lock is held elsewhere, the append waits for it on the writer thread
+            base_command_logic.crit(test_user_id, "fez")
+            assert not save_journal.journal_exists(unit_test_save_file_name)
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_UN)
+        save_writer.wait_for_writes(unit_test_save_file_name)
+        assert save_journal.journal_exists(unit_test_save_file_name)
+
+    @pytest.mark.skipif(save_manager.fcntl is None, reason="advisory file locks need fcntl")
+    @pytest.mark.asyncio
+    async def test_conflict_on_writer_thread_drops_save(self):
+        fcntl = save_manager.fcntl
+        with open(save_manager.build_lockfile_path(unit_test_save_file_name)) as other_lock:
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_EX)
+            base_command_logic.crit(test_user_id, "fez")
+            write_from_other_process(42)
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_UN)
+        save_writer.wait_for_writes(unit_test_save_file_name)
+        # the save is dropped on the event loop, once the writer thread handed the conflict over
+        for _ in range(100):
+            if not live_manager.check_file_in_memory(unit_test_save_file_name):
+                break
+            await asyncio.sleep(0.01)
+        assert not live_manager.check_file_in_memory(unit_test_save_file_name)
+        assert not save_journal.journal_exists(unit_test_save_file_name)
+        assert self.get_crits() == 42
+
+    def test_player_added_by_other_process_is_found(self):
+        other_player = "1"
+        live_manager.file_dict.remove(unit_test_save_file_name)
+        save_index.build_save_index()
+        assert not live_manager.check_file_player(other_player, unit_test_save_file_name)
+
+        add_player_from_other_process(other_player)
+        assert live_manager.check_file_player(other_player, unit_test_save_file_name)
+        live_manager.access_file_as_user(other_player, unit_test_save_file_name)
+        assert live_manager.get_loaded_filename(other_player) == unit_test_save_file_name
@@ -0,0 +1,49 @@
+import pytest
+
+from src.ext.Campaign.campaign_exceptions import UserNotPlayerException, SaveFileNotFoundException
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    save_index
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+class TestSaveIndex:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        move_template_save_to_save_folder("base_test_full")
+        yield
+        cleanup_template()
+        save_index.clear_save_index()
+
+    def test_build_index(self):
+        assert save_index.build_save_index() >= 1
+        summary = save_index.get_save_summary(unit_test_save_file_name)
+        assert summary.admin == test_user_id
+        assert summary.players == (test_user_id,)
+        assert summary.last_change == "2022-11-15 15:17:25"
+        assert summary.version == save_manager.save_type_version
+
+    def test_unknown_user_does_not_load_save(self):
+        save_index.build_save_index()
+        with pytest.raises(UserNotPlayerException):
+            live_manager.access_file_as_user("1", unit_test_save_file_name)
+        assert not live_manager.check_file_in_memory(unit_test_save_file_name)
+
+    def test_save_copied_after_build_is_found(self):
+        save_index.clear_save_index()
+        assert save_manager.check_savefile_existence(unit_test_save_file_name)
+        assert save_index.get_save_summary(unit_test_save_file_name).players == (test_user_id,)
+        assert save_index.is_save_indexed(unit_test_save_file_name)
+
+    def test_index_follows_writes(self):
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        live_manager.add_player_to_save(test_user_id, "1")
+        live_manager.save_user_file(test_user_id)
+        assert save_index.get_save_summary(unit_test_save_file_name).players == (test_user_id, "1")
+
+        save_manager.remove_save_file(unit_test_save_file_name)
+        assert not save_index.is_save_indexed(unit_test_save_file_name)
+        with pytest.raises(SaveFileNotFoundException):
+            save_index.get_save_summary(unit_test_save_file_name)
@@ -0,0 +1,101 @@
+import json
+import os
+import pytest
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    save_writer, \
+    save_journal
+from src.ext.Campaign.SaveDataManagement.char_data_access import get_char
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+def read_save_from_disk() -> dict:
+    with open(save_manager.build_savefile_path(unit_test_save_file_name)) as file:
+        return json.load(file)
+
+
+def get_first_char_tag() -> str:
+    return next(iter(live_manager.get_loaded_chars(test_user_id)))
+
+
+class TestSaveJournal:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        yield "setup"
+        cleanup_template()
+
+    def test_failed_write_keeps_save_file(self, monkeypatch):
+        before = read_save_from_disk()
+
+        def broken_fsync(file_descriptor):
+            raise OSError("disk full")
+
+        # the write stops after a part of the save was written
+        monkeypatch.setattr(save_manager.json_codec, "encode_file", lambda data: b'{"characters": {')
+        monkeypatch.setattr(save_manager.os, "fsync", broken_fsync)
+        with pytest.raises(OSError):
+            save_manager.save_data_to_file(unit_test_save_file_name, live_manager.get_loaded_dict(test_user_id))
+
+        assert read_save_from_disk() == before
+        assert not any(name.endswith(save_manager.temp_files_suffix)
+                       for name in os.listdir(save_manager.get_save_folder_filepath()))
+
+    @pytest.mark.asyncio
+    async def test_journal_recovers_lost_write(self):
+        char_tag = get_first_char_tag()
+        start_crits = live_manager.get_loaded_chars(test_user_id)[char_tag].crits
+        get_char(test_user_id, char_tag).rolled_crit(3)
+        live_manager.save_user_file(test_user_id)
+        live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] += 1
+        live_manager.save_user_file(test_user_id)
+        session = live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag]
+
+        # the delayed write never happens, as if the bot crashed
+        save_writer.discard_pending_save(unit_test_save_file_name)
+        assert read_save_from_disk()[save_manager.character_tag][char_tag]["crits"] == start_crits
+        assert save_journal.journal_exists(unit_test_save_file_name)
+
+        recovered = save_manager.save_file_to_unparsed_dict(unit_test_save_file_name)
+        assert recovered[save_manager.character_tag][char_tag]["crits"] == start_crits + 3
+        assert recovered[save_manager.session_tag] == session
+
+    @pytest.mark.asyncio
+    async def test_incomplete_journal_entry_is_ignored(self):
+        char_tag = get_first_char_tag()
+        start_crits = live_manager.get_loaded_chars(test_user_id)[char_tag].crits
+        get_char(test_user_id, char_tag).rolled_crit()
+        live_manager.save_user_file(test_user_id)
+        save_writer.discard_pending_save(unit_test_save_file_name)
+        with open(save_journal.build_journal_path(unit_test_save_file_name), 'a') as journal:
+            journal.write('{"op": "char", "tag": "')
+
+        recovered = save_manager.save_file_to_unparsed_dict(unit_test_save_file_name)
+        assert recovered[save_manager.character_tag][char_tag]["crits"] == start_crits + 1
+
+    @pytest.mark.asyncio
+    async def test_written_save_compacts_journal(self):
+        char_tag = get_first_char_tag()
+        get_char(test_user_id, char_tag).dodge()
+        live_manager.save_user_file(test_user_id)
+        save_writer.wait_for_writes(unit_test_save_file_name)
+        assert save_journal.journal_exists(unit_test_save_file_name)
+
+        save_writer.flush_save(unit_test_save_file_name)
+        assert not save_journal.journal_exists(unit_test_save_file_name)
+        assert read_save_from_disk()[save_journal.journal_seq_tag] == \
+               save_journal.get_journal_seq(unit_test_save_file_name)
+
+    @pytest.mark.asyncio
+    async def test_only_touched_characters_are_journaled(self):
+        char_tag = get_first_char_tag()
+        live_manager.save_user_file(test_user_id)
+        get_char(test_user_id, char_tag).rolled_crit()
+        lines = save_journal.collect_changes(unit_test_save_file_name, live_manager.get_loaded_dict(test_user_id))
+        assert len(lines) == 1
+        assert json.loads(lines[0])["tag"] == char_tag
+        assert save_journal.collect_changes(unit_test_save_file_name,
+                                            live_manager.get_loaded_dict(test_user_id)) == []
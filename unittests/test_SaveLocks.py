@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from src.ext.Campaign.SaveDataManagement import live_save_manager as live_manager
+
+
+class TestSaveLocks:
+
+    @pytest.fixture(autouse=True)
+    def reset_stats(self):
+        live_manager.reset_save_lock_stats()
+        yield
+        live_manager.reset_save_lock_stats()
+
+    @pytest.mark.asyncio
+    async def test_readers_share_the_lock(self):
+        inside = 0
+        max_inside = 0
+
+        async def read():
+            nonlocal inside, max_inside
+            async with live_manager.lock_save("save", write=False):
+                inside += 1
+                max_inside = max(max_inside, inside)
+                await asyncio.sleep(0.01)
+                inside -= 1
+
+        await asyncio.gather(read(), read(), read())
+        assert max_inside == 3
+        stats = live_manager.get_save_lock_stats()
+        assert stats["read_acquired"] == 3
+        assert stats["read_contended"] == 0
+        assert stats["locked_saves"] == 0
+
+    @pytest.mark.asyncio
+    async def test_writers_are_exclusive(self):
+        events = []
+
+        async def write(name: str):
+            async with live_manager.lock_save("save"):
+                events.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                events.append(f"{name} end")
+
+        async def read():
+            async with live_manager.lock_save("save", write=False):
+                events.append("read")
+
+        await asyncio.gather(write("a"), read(), write("b"))
+        assert events.index("a end") < events.index("b start") or events.index("b end") < events.index("a start")
+        assert events[events.index("read") - 1].endswith("end")
+        stats = live_manager.get_save_lock_stats()
+        assert stats["write_acquired"] == 2
+        assert stats["write_contended"] + stats["read_contended"] >= 2
+        assert stats["max_wait_seconds"] > 0
+        assert stats["locked_saves"] == 0
+
+    @pytest.mark.asyncio
+    async def test_other_saves_are_not_blocked(self):
+        async with live_manager.lock_save("save"):
+            await asyncio.wait_for(self.hold(live_manager.lock_save("other")), 1)
+        assert live_manager.get_save_lock_stats()["write_contended"] == 0
+
+    @pytest.mark.asyncio
+    async def test_writer_can_lock_again(self):
+        async with live_manager.lock_save("save"):
+            # the nested locks are taken by the same task, so they must not wait for the outer one
+            await self.hold(live_manager.lock_save("save"))
+            await self.hold(live_manager.lock_save("save", write=False))
+        assert live_manager.get_save_lock_stats()["locked_saves"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lock_is_released_on_error(self):
+        with pytest.raises(ValueError):
+            async with live_manager.lock_save("save"):
+                raise ValueError()
+        await asyncio.wait_for(self.hold(live_manager.lock_save("save")), 1)
+
+    @staticmethod
+    async def hold(lock):
+        async with lock:
+            pass
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    save_migrations, \
+    save_writer
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import get_template_path, move_template_save_to_save_folder, cleanup_template
+
+
+def copy_template(folder: str, template_name: str, save_name: str) -> str:
+    destination = os.path.join(folder, save_name + save_manager.save_files_suffix)
+    shutil.copyfile(get_template_path(template_name), destination)
+    return destination
+
+
+class TestSaveMigrations:
+
+    def test_migrations_run_in_order(self, monkeypatch):
+        monkeypatch.setattr(save_manager, "save_type_version", 1.5)
+        monkeypatch.setattr(save_migrations, "_migrations", dict(save_migrations._migrations))
+        applied = []
+
+        @save_migrations.register_migration(1.3, 1.4)
+        def add_notes(save_dic: dict) -> dict:
+            applied.append(save_dic[save_manager.version_tag])
+            save_dic["notes"] = []
+            return save_dic
+
+        @save_migrations.register_migration(1.4, 1.5)
+        def rename_notes(save_dic: dict) -> dict:
+            applied.append(save_dic[save_manager.version_tag])
+            save_dic["journal"] = save_dic.pop("notes")
+            return save_dic
+
+        updated, save_dic = save_migrations.migrate_save_dict({save_manager.version_tag: "1.0"})
+        assert updated
+        assert applied == [1.3, 1.4]
+        assert save_dic["journal"] == [] and save_dic[save_manager.version_tag] == 1.5
+        assert save_manager.admin_tag in save_dic
+
+    def test_current_save_is_unchanged(self):
+        save_dic = {save_manager.version_tag: save_manager.save_type_version}
+        assert save_migrations.migrate_save_dict(save_dic) == (False, save_dic)
+
+    def test_missing_migration(self, monkeypatch):
+        monkeypatch.setattr(save_migrations, "_migrations", {})
+        with pytest.raises(Exception):
+            save_migrations.migrate_save_dict({save_manager.version_tag: "1.0"})
+
+    def test_bulk_migration(self, tmp_path):
+        old_path = copy_template(tmp_path, "old_vers_test_full", "old")
+        current_path = copy_template(tmp_path, "base_test_full", "current")
+        with open(current_path) as file:
+            current_text = file.read()
+        with open(os.path.join(tmp_path, "broken" + save_manager.save_files_suffix), 'w') as file:
+            file.write("{")
+
+        report = save_migrations.migrate_all_saves(str(tmp_path), workers=2)
+        assert report.checked == 3
+        assert report.updated == ["old"]
+        assert list(report.failed) == ["broken"]
+        with open(old_path) as file:
+            assert float(json.load(file)[save_manager.version_tag]) == save_manager.save_type_version
+        with open(current_path) as file:
+            assert file.read() == current_text
+
+    @pytest.mark.asyncio
+    async def test_lazy_migration_is_written_behind(self):
+        try:
+            save_path = move_template_save_to_save_folder("old_vers_test_full")
+            live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+            assert save_writer.is_save_pending(unit_test_save_file_name)
+            with open(save_path) as file:
+                assert json.load(file)[save_manager.version_tag] == "1.0"
+            save_writer.flush_save(unit_test_save_file_name)
+            with open(save_path) as file:
+                assert float(json.load(file)[save_manager.version_tag]) == save_manager.save_type_version
+        finally:
+            cleanup_template()
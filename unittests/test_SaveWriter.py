@@ -0,0 +1,105 @@
+import pytest
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    save_writer
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+class TestSaveWriter:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self, monkeypatch):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        written = []
+        original_write = save_manager.write_save_output
+
+        def counting_write(_save_name, output):
+            written.append(_save_name)
+            original_write(_save_name, output)
+
+        monkeypatch.setattr(save_manager, "write_save_output", counting_write)
+        yield written
+        cleanup_template()
+
+    @pytest.mark.asyncio
+    async def test_changes_are_coalesced(self, setup_teardown):
+        written = setup_teardown
+        char_tag = next(iter(live_manager.get_loaded_chars(test_user_id)))
+        start_crits = live_manager.get_loaded_chars(test_user_id)[char_tag].crits
+        for _ in range(12):
+            live_manager.get_loaded_chars(test_user_id)[char_tag].rolled_crit()
+            live_manager.save_user_file(test_user_id)
+
+        assert len(written) == 0
+        assert save_writer.is_save_pending(unit_test_save_file_name)
+
+        save_writer.flush_save(unit_test_save_file_name)
+        assert written == [unit_test_save_file_name]
+        assert not save_writer.is_save_pending(unit_test_save_file_name)
+        assert save_manager.character_from_save_file(unit_test_save_file_name, char_tag).crits == start_crits + 12
+
+    @pytest.mark.asyncio
+    async def test_read_flushes_pending_changes(self, setup_teardown):
+        written = setup_teardown
+        live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] = 42
+        live_manager.save_user_file(test_user_id)
+
+        assert save_manager.save_file_to_unparsed_dict(unit_test_save_file_name)[save_manager.session_tag] == 42
+        assert len(written) == 1
+
+    def test_write_without_event_loop(self, setup_teardown):
+        written = setup_teardown
+        live_manager.save_user_file(test_user_id)
+        assert written == [unit_test_save_file_name]
+        assert not save_writer.is_save_pending(unit_test_save_file_name)
+
+    @pytest.mark.asyncio
+    async def test_removed_save_is_not_rewritten(self, setup_teardown):
+        written = setup_teardown
+        live_manager.save_user_file(test_user_id)
+        save_manager.remove_save_file(unit_test_save_file_name)
+        save_writer.flush_all_saves()
+        assert len(written) == 0
+        assert not save_manager.check_savefile_existence(unit_test_save_file_name)
+
+    @pytest.mark.asyncio
+    async def test_evicted_save_is_flushed(self, setup_teardown, monkeypatch):
+        written = setup_teardown
+        monkeypatch.setattr(live_manager.file_dict, "max_entries", 1)
+        live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] = 42
+        live_manager.save_user_file(test_user_id)
+        assert len(written) == 0
+
+        live_manager.create_new_save("other_user", "other_save")
+        # eviction only submits the write, so the event loop is not blocked by it
+        save_writer.wait_for_writes(unit_test_save_file_name)
+        assert written == [unit_test_save_file_name]
+        assert "other_save" in live_manager.file_dict
+        assert unit_test_save_file_name not in live_manager.file_dict
+        assert live_manager.get_file_cache_stats()["evictions"] >= 1
+
+        assert live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] == 42
+        live_manager.file_dict.remove("other_save")
+
+    @pytest.mark.asyncio
+    async def test_async_flush_writes_pending_changes(self, setup_teardown):
+        written = setup_teardown
+        live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] = 42
+        live_manager.save_user_file(test_user_id)
+
+        await save_writer.flush_save_async(unit_test_save_file_name)
+        assert written == [unit_test_save_file_name]
+        assert not save_writer.is_save_pending(unit_test_save_file_name)
+
+    @pytest.mark.asyncio
+    async def test_locked_save_is_not_evicted(self, setup_teardown, monkeypatch):
+        monkeypatch.setattr(live_manager.file_dict, "max_entries", 1)
+        async with live_manager.lock_loaded_save(test_user_id):
+            live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] = 42
+            live_manager.create_new_save("other_user", "other_save")
+            assert unit_test_save_file_name in live_manager.file_dict
+            live_manager.save_user_file(test_user_id)
+        live_manager.file_dict.remove("other_save")
+        assert live_manager.get_loaded_dict(test_user_id)[save_manager.session_tag] == 42
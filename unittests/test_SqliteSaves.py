@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from src.ext.Campaign import base_command_logic
+from src.ext.Campaign.campaign_exceptions import SaveConflictException
+from src.ext.Campaign.SaveDataManagement import save_file_management as save_manager, \
+    live_save_manager as live_manager, \
+    sqlite_saves, save_index
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import get_template_path, cleanup_template
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(save_manager, "SAVE_BACKEND", "sqlite")
+    sqlite_saves.set_database_path(os.path.join(tmp_path, "saves.sqlite3"))
+    yield tmp_path
+    cleanup_template()
+    sqlite_saves.set_database_path(None)
+
+
+def import_template(tmp_path, template_name: str):
+    import_path = os.path.join(tmp_path, "import.json")
+    shutil.copyfile(get_template_path(template_name), import_path)
+    save_manager.import_save_file(import_path, unit_test_save_file_name)
+    assert not os.path.exists(import_path)
+
+
+class TestSqliteSaves:
+
+    def test_only_changed_character_is_written(self, sqlite_backend):
+        import_template(sqlite_backend, "base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        char = live_manager.get_loaded_chars(test_user_id)["fez"]
+        char.rolled_crit()
+
+        changes_before = sqlite_saves._get_connection().total_changes
+        live_manager.save_user_file(test_user_id)
+        # one row for the save values, one for the character
+        assert sqlite_saves._get_connection().total_changes - changes_before == 2
+
+        sqlite_saves.close_database()
+        assert save_manager.character_from_save_file(unit_test_save_file_name, "fez").crits == char.crits
+
+    def test_deleted_character_row_is_removed(self, sqlite_backend):
+        import_template(sqlite_backend, "base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        del live_manager.get_loaded_chars(test_user_id)["del"]
+        live_manager.save_user_file(test_user_id)
+        assert "del" not in sqlite_saves.read_save(unit_test_save_file_name)[save_manager.character_tag]
+
+    def test_existence_and_removal(self, sqlite_backend):
+        assert not save_manager.check_savefile_existence(unit_test_save_file_name)
+        import_template(sqlite_backend, "base_test_full")
+        assert save_manager.check_savefile_existence(unit_test_save_file_name)
+        assert unit_test_save_file_name in save_manager.list_save_names()
+        save_manager.remove_save_file(unit_test_save_file_name)
+        assert not save_manager.check_savefile_existence(unit_test_save_file_name)
+
+    def test_json_round_trip(self, sqlite_backend):
+        import_folder = os.path.join(sqlite_backend, "json_saves")
+        export_folder = os.path.join(sqlite_backend, "exported")
+        os.makedirs(import_folder)
+        for template_name in ["base_test_full", "base_test"]:
+            shutil.copyfile(get_template_path(template_name),
+                            os.path.join(import_folder, template_name + save_manager.save_files_suffix))
+
+        assert sqlite_saves.import_json_saves(import_folder) == ["base_test", "base_test_full"]
+        assert sqlite_saves.import_json_saves(import_folder) == []
+        assert sqlite_saves.export_json_saves(export_folder) == ["base_test", "base_test_full"]
+        for file_name in os.listdir(import_folder):
+            with open(os.path.join(import_folder, file_name)) as original, \
+                    open(os.path.join(export_folder, file_name)) as exported:
+                assert json.load(original) == json.load(exported)
+
+    def test_write_of_other_process_is_refused(self, sqlite_backend):
+        import_template(sqlite_backend, "base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        other_process = sqlite3.connect(sqlite_saves.get_database_path())
+        other_process.execute("UPDATE saves SET version = version + 1 WHERE name = ?", (unit_test_save_file_name,))
+        other_process.commit()
+        other_process.close()
+
+        assert save_manager.is_save_stale(unit_test_save_file_name)
+        with pytest.raises(SaveConflictException):
+            base_command_logic.crit(test_user_id, "fez")
+        assert not live_manager.check_file_in_memory(unit_test_save_file_name)
+        base_command_logic.crit(test_user_id, "fez")
+        assert not save_manager.is_save_stale(unit_test_save_file_name)
+
+    def test_database_without_versions_is_upgraded(self, sqlite_backend):
+        sqlite_saves.close_database()
+        old_database = sqlite3.connect(sqlite_saves.get_database_path())
+        old_database.execute("CREATE TABLE saves (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        old_database.execute("INSERT INTO saves (name, data) VALUES (?, ?)", (unit_test_save_file_name, "{}"))
+        old_database.commit()
+        old_database.close()
+        assert sqlite_saves.get_save_version(unit_test_save_file_name) == 0
+
+    def test_index_summary_stays_fresh(self, sqlite_backend):
+        import_template(sqlite_backend, "base_test_full")
+        save_index.build_save_index()
+        summary = save_index.get_save_summary(unit_test_save_file_name)
+        assert summary.stamp == save_manager.get_save_stamp(unit_test_save_file_name)
+        assert save_index.get_save_summary(unit_test_save_file_name) is summary
@@ -0,0 +1,31 @@
+import pytest
+
+from src.ext.BladesUtility.BladesResources import ResourceLogic, ResourceSpriteBuilding
+from src.ext.BladesUtility.BladesResources.ResourceTracker import ResourceTracker
+
+
+class TestStressTrackCache:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        ResourceLogic.stress_track_cache.clear()
+        yield "setup"
+        ResourceLogic.stress_track_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_precomputed_tracks_are_not_rendered_again(self, monkeypatch):
+        ResourceLogic.precompute_stress_tracks(max_resource=9)
+        monkeypatch.setattr(ResourceLogic, "build_stress_track_image",
+                            lambda *args: pytest.fail("precomputed stress track was rendered again"))
+        for value in range(10):
+            embed, png = await ResourceLogic.get_stress_tracker_embed(ResourceTracker(value, 9))
+            assert embed.description == f"Stress: {value}/9"
+            assert png == ResourceLogic.stress_track_cache.entries[(value, 9)]
+
+    @pytest.mark.asyncio
+    async def test_tracks_are_rendered_lazily(self):
+        tracker = ResourceTracker(4, 15)
+        png = await ResourceLogic.get_stress_track_png(tracker)
+        assert png == ResourceSpriteBuilding.build_stress_track_image(tracker)
+        assert await ResourceLogic.get_stress_track_png(ResourceTracker(4, 15)) is png
+        assert ResourceLogic.stress_track_cache.get_stats()["hits"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from src.ext.Campaign.SaveDataManagement.TempEntryDict import TempEntryDict
+
+
+class TestTempEntryDict:
+
+    def test_set_get_remove(self):
+        removed = []
+        temp_dict = TempEntryDict(60, "Test", lambda key, value: removed.append((key, value)))
+        temp_dict.set("a", 1)
+        temp_dict.set("a", 2)
+        assert "a" in temp_dict
+        assert temp_dict.get("a") == 2
+        assert temp_dict.get("b") is None
+
+        temp_dict.remove("a")
+        assert "a" not in temp_dict
+        assert removed == [("a", 2)]
+
+    def test_expires_without_event_loop(self):
+        temp_dict = TempEntryDict(0.05, "Test")
+        temp_dict.set("a", 1)
+        time.sleep(0.1)
+        assert "a" not in temp_dict
+        assert temp_dict.get("a") is None
+        assert len(temp_dict) == 0
+
+    def test_no_threads_per_entry(self):
+        thread_count = threading.active_count()
+        temp_dict = TempEntryDict(60, "Test")
+        for i in range(1000):
+            temp_dict.set(str(i), i)
+            temp_dict.get(str(i))
+        assert threading.active_count() == thread_count
+
+    @pytest.mark.asyncio
+    async def test_event_loop_sweeps_expired_entries(self):
+        removed = []
+        temp_dict = TempEntryDict(0.1, "Test", lambda key, _: removed.append(key))
+        temp_dict.set("a", 1)
+        temp_dict.set("b", 2)
+        await asyncio.sleep(0.05)
+        assert temp_dict.get("b") == 2
+        await asyncio.sleep(0.07)
+        assert sorted(removed) == ["a"]
+        assert len(temp_dict) == 1
+        await asyncio.sleep(0.1)
+        assert sorted(removed) == ["a", "b"]
+        assert len(temp_dict) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        removed = []
+        temp_dict = TempEntryDict(60, "Test", lambda key, _: removed.append(key), max_entries=2)
+        temp_dict.set("a", 1)
+        temp_dict.set("b", 2)
+        assert temp_dict.get("a") == 1
+        temp_dict.set("c", 3)
+        assert removed == ["b"]
+        assert "a" in temp_dict and "c" in temp_dict
+        assert temp_dict.get("b") is None
+        assert temp_dict.get_stats() == {"entries": 2, "bytes": 0, "hits": 1, "misses": 1, "evictions": 1}
+
+    def test_byte_limit_evicts_entries(self):
+        removed = []
+        temp_dict = TempEntryDict(60, "Test", lambda key, _: removed.append(key), max_bytes=10, size_func=len)
+        temp_dict.set("a", [0] * 4)
+        temp_dict.set("b", [0] * 4)
+        assert removed == []
+
+        values = temp_dict.get("b")
+        values.extend([0] * 4)
+        temp_dict.refresh_size("b")
+        assert removed == ["a"]
+        assert temp_dict.total_size == 8
+
+        # an entry that is larger than the limit by itself is kept
+        temp_dict.set("c", [0] * 20)
+        assert removed == ["a", "b"]
+        assert temp_dict.get("c") is not None
+
+    def test_pinned_entries_are_not_evicted(self):
+        removed = []
+        pinned = {"a"}
+        temp_dict = TempEntryDict(0.05, "Test", lambda key, _: removed.append(key), max_entries=1,
+                                  can_evict=lambda key: key not in pinned)
+        temp_dict.set("a", 1)
+        temp_dict.set("b", 2)
+        assert removed == []
+        assert len(temp_dict) == 2
+
+        time.sleep(0.1)
+        assert temp_dict.get("a") == 1
+        pinned.clear()
+        temp_dict.set("c", 3)
+        assert removed == ["b", "a"]
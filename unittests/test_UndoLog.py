@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from src.ext.Campaign import base_command_logic, Undo, UndoActions
+from src.ext.Campaign.Character import Character
+from src.ext.Campaign.UndoActions.BaseUndoAction import action_to_record, action_from_record
+from src.ext.Campaign.SaveDataManagement import live_save_manager as live_manager, undo_log, \
+    save_file_management as save_manager
+from src.ext.command_exceptions import CommandException
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+def build_actions() -> list[UndoActions.BaseUndoAction]:
+    char = Character("tag", "name")
+    multiple = UndoActions.MultipleBaseAction(char, ["damage_caused", "kills"])
+    char.cause_dam(5, 1)
+    multiple.update()
+    return [
+        UndoActions.StatUndoAction("tag", "crits", 1, 2),
+        multiple,
+        UndoActions.CharUndoAction(None, char),
+        UndoActions.RetagCharUndoAction("old", "new"),
+        UndoActions.FileDataUndoAction("players", ["0"], ["0", "1"]),
+        UndoActions.LoadFileUndoAction("", "file"),
+        UndoActions.UndoActionGroup([UndoActions.StatUndoAction("tag", "player", "", "1"),
+                                     UndoActions.FileDataUndoAction("session", 1, 2)])
+    ]
+
+
+class TestUndoLog:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        yield
+        cleanup_template()
+
+    @staticmethod
+    def get_crits() -> int:
+        return live_manager.get_loaded_chars(test_user_id)["fez"].crits
+
+    @pytest.mark.parametrize("action", build_actions(), ids=lambda action: type(action).__name__)
+    def test_record_round_trip(self, action):
+        record = action_to_record(action)
+        loaded = action_from_record(record)
+        assert type(loaded) is type(action)
+        assert action_to_record(loaded) == record
+        assert str(loaded) == str(action)
+
+    def test_history_survives_restart(self):
+        crits = self.get_crits()
+        for _ in range(3):
+            base_command_logic.crit(test_user_id, "fez")
+        base_command_logic.undo_command(test_user_id, 1)
+        Undo.undo_dict.clear()
+
+        assert Undo.get_pointer(test_user_id) == 1
+        assert len(Undo.get_action_queue(test_user_id)) == 3
+        base_command_logic.undo_command(test_user_id, 2)
+        assert self.get_crits() == crits
+        Undo.undo_dict.clear()
+        base_command_logic.redo_command(test_user_id, 3)
+        assert self.get_crits() == crits + 3
+
+    def test_discard_is_kept(self):
+        base_command_logic.crit(test_user_id, "fez")
+        base_command_logic.crit(test_user_id, "fez")
+        base_command_logic.undo_command(test_user_id, 1)
+        Undo.discard_undo_queue_after_pointer(test_user_id)
+        Undo.undo_dict.clear()
+        assert len(Undo.get_action_queue(test_user_id)) == 1
+
+    def test_depth_and_compaction(self, monkeypatch):
+        monkeypatch.setattr(Undo, "UNDO_HISTORY_DEPTH", 3)
+        for _ in range(20):
+            base_command_logic.crit(test_user_id, "fez")
+            base_command_logic.undo_command(test_user_id, 1)
+            base_command_logic.redo_command(test_user_id, 1)
+        assert len(Undo.get_action_queue(test_user_id)) == 3
+        undo_log.wait_for_writes(test_user_id)
+        with open(undo_log.build_undo_log_path(test_user_id)) as log:
+            assert len(log.readlines()) <= Undo.UNDO_LOG_COMPACTION_FACTOR * 3
+        Undo.undo_dict.clear()
+        assert len(Undo.get_action_queue(test_user_id)) == 3
+        assert Undo.get_pointer(test_user_id) == 2
+
+    def test_incomplete_line_is_ignored(self):
+        base_command_logic.crit(test_user_id, "fez")
+        undo_log.wait_for_writes(test_user_id)
+        with open(undo_log.build_undo_log_path(test_user_id), 'a') as log:
+            log.write('a {"s": "unit_test", "a": {"t"')
+        Undo.undo_dict.clear()
+        assert len(Undo.get_action_queue(test_user_id)) == 1
+
+    def test_action_of_other_save_is_refused(self):
+        crits = self.get_crits()
+        base_command_logic.crit(test_user_id, "fez")
+        live_manager.create_new_save(test_user_id, "other_unit_test")
+        with pytest.raises(CommandException):
+            base_command_logic.undo_command(test_user_id, 1)
+        assert Undo.get_pointer(test_user_id) == 0
+
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        base_command_logic.undo_command(test_user_id, 1)
+        assert self.get_crits() == crits
+
+    @pytest.mark.skipif(save_manager.fcntl is None, reason="advisory file locks need fcntl")
+    def test_append_waits_for_other_process(self):
+        fcntl = save_manager.fcntl
+        # the history is read before the log is locked elsewhere
+        Undo.get_action_queue(test_user_id)
+        with open(undo_log.build_undo_lock_path(test_user_id), 'a') as other_lock:
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_EX)
+            # returns while the log is locked elsewhere, the append waits for the lock on the undo log thread
+            base_command_logic.crit(test_user_id, "fez")
+            assert not os.path.exists(undo_log.build_undo_log_path(test_user_id))
+            fcntl.flock(other_lock.fileno(), fcntl.LOCK_UN)
+        undo_log.wait_for_writes(test_user_id)
+        assert os.path.exists(undo_log.build_undo_log_path(test_user_id))
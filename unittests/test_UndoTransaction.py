@@ -0,0 +1,88 @@
+import pytest
+
+from src.ext.Campaign import base_command_logic, Undo
+from src.ext.Campaign.UndoActions import BaseUndoAction
+from src.ext.Campaign.UndoActions.BaseUndoAction import register_undo_action
+from src.ext.Campaign.SaveDataManagement import live_save_manager as live_manager
+from .test_const_vars import unit_test_save_file_name, test_user_id
+from .unit_test_template_manager import move_template_save_to_save_folder, cleanup_template
+
+
+@register_undo_action("test_failing")
+class FailingUndoAction(BaseUndoAction):
+    def __str__(self):
+        return "failing"
+
+    def to_record(self) -> dict:
+        return {}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "FailingUndoAction":
+        return cls()
+
+    def undo(self, executing_user: str) -> str:
+        raise Exception("undo failed")
+
+    def redo(self, executing_user: str) -> str:
+        raise Exception("redo failed")
+
+
+class TestUndoTransaction:
+
+    @pytest.fixture(autouse=True)
+    def setup_teardown(self, monkeypatch):
+        move_template_save_to_save_folder("base_test_full")
+        live_manager.access_file_as_user(test_user_id, unit_test_save_file_name)
+        self.marked_saves = []
+        original_mark = live_manager.mark_save_dirty
+
+        def counting_mark(_save_name, save_dict):
+            self.marked_saves.append(_save_name)
+            original_mark(_save_name, save_dict)
+
+        monkeypatch.setattr(live_manager, "mark_save_dirty", counting_mark)
+        yield
+        live_manager.unload_all_files_and_users()
+        Undo.purge_undo_history()
+        cleanup_template()
+
+    @staticmethod
+    def get_crits(char_tag: str) -> int:
+        return live_manager.get_loaded_chars(test_user_id)[char_tag].crits
+
+    def test_saves_once_per_batch(self):
+        crits = self.get_crits("fez")
+        for _ in range(5):
+            base_command_logic.crit(test_user_id, "fez")
+        self.marked_saves.clear()
+
+        base_command_logic.undo_command(test_user_id, 5)
+        assert self.get_crits("fez") == crits
+        assert self.marked_saves == [unit_test_save_file_name]
+
+        self.marked_saves.clear()
+        text = base_command_logic.redo_command(test_user_id, 10)
+        assert self.get_crits("fez") == crits + 5
+        assert text.endswith("No actions to redo")
+        assert self.marked_saves == [unit_test_save_file_name]
+
+    def test_rollback_on_failure(self):
+        crits = self.get_crits("fez")
+        char = live_manager.get_loaded_chars(test_user_id)["fez"]
+        Undo.queue_undo_action(test_user_id, FailingUndoAction())
+        base_command_logic.crit(test_user_id, "fez")
+        base_command_logic.rem_char(test_user_id, "olav")
+        pointer = Undo.get_pointer(test_user_id)
+        self.marked_saves.clear()
+
+        with pytest.raises(Exception):
+            base_command_logic.undo_command(test_user_id, 3)
+        assert Undo.get_pointer(test_user_id) == pointer
+        assert "olav" not in live_manager.get_loaded_chars(test_user_id)
+        assert self.get_crits("fez") == crits + 1
+        assert live_manager.get_loaded_chars(test_user_id)["fez"] is char
+        assert self.marked_saves == []
+
+        assert base_command_logic.undo_command(test_user_id, 2).startswith("Undid removal of")
+        assert "olav" in live_manager.get_loaded_chars(test_user_id)
+        assert self.get_crits("fez") == crits
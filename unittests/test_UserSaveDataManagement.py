@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from src import UserSaveDataManagement as user_saves
+
+
+class CountingBackend(user_saves.UserSaveBackend):
+    def __init__(self, backend: user_saves.UserSaveBackend):
+        self.backend = backend
+        self.loads = 0
+        self.saves = 0
+
+    def load(self, user_id: str):
+        self.loads += 1
+        return self.backend.load(user_id)
+
+    def save(self, user_id: str, user_dict: dict):
+        self.saves += 1
+        self.backend.save(user_id, user_dict)
+
+    def delete(self, user_id: str):
+        self.backend.delete(user_id)
+
+    def close(self):
+        self.backend.close()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    folder = os.path.join(tmp_path, "user_saves")
+    if request.param == "json":
+        inner = user_saves.JsonUserSaveBackend(folder)
+    else:
+        inner = user_saves.SqliteUserSaveBackend(os.path.join(folder, user_saves.user_save_database_name))
+    counting = CountingBackend(inner)
+    user_saves.set_user_save_backend(counting)
+    yield counting
+    user_saves.set_user_save_backend(None)
+
+
+class TestUserSaveDataManagement:
+
+    def test_repeated_loads_read_once(self, backend):
+        for _ in range(5):
+            user_dict = user_saves.load_user_dict("1")
+            assert user_dict == {user_saves.clocks_dict_tag: {}, user_saves.version_tag: 1.0}
+        assert backend.loads == 1
+
+    def test_saved_dict_survives_cache_reset(self, backend):
+        user_dict = user_saves.load_user_dict("1")
+        user_dict[user_saves.kanka_data_tag] = {"id": "5", "token": "abc"}
+        user_saves.save_user_dict("1", user_dict)
+        assert user_saves.load_user_dict("1") == user_dict
+        assert backend.loads == 1
+
+        user_saves.set_user_save_backend(backend)
+        assert user_saves.load_user_dict("1") == user_dict
+        assert backend.loads == 2
+
+    def test_unsaved_changes_do_not_leak_into_cache(self, backend):
+        user_saves.load_user_dict("1")[user_saves.kanka_data_tag] = {"id": "5"}
+        assert user_saves.kanka_data_tag not in user_saves.load_user_dict("1")
+
+    def test_empty_user_is_deleted(self, backend):
+        user_dict = user_saves.load_user_dict("1")
+        user_dict[user_saves.kanka_data_tag] = {"id": "5"}
+        user_saves.save_user_dict("1", user_dict)
+        del user_dict[user_saves.kanka_data_tag]
+        user_saves.save_user_dict("1", user_dict)
+        assert backend.backend.load("1") is None
+        assert user_saves.kanka_data_tag not in user_saves.load_user_dict("1")
+
+    def test_legacy_clock_file_is_upgraded(self, backend):
+        backend.backend.save("1", {"clock": {"size": 4}})
+        assert user_saves.load_user_dict("1") == {user_saves.clocks_dict_tag: {"clock": {"size": 4}},
+                                                  user_saves.version_tag: 1.0}
+        assert user_saves.version_tag in backend.backend.load("1")
@@ -0,0 +1,88 @@
+import random
+import string
+
+import pytest
+
+from src.ext.BladesUtility.Wiki import ItemWiki
+from src.ext.BladesUtility.Wiki.WikiSearchIndex import WikiSearchIndex, bounded_levenshtein_distance
+
+
+def reference_distance(word1: str, word2: str) -> int:
+    previous_row = list(range(len(word2) + 1))
+    for row, char1 in enumerate(word1, 1):
+        current_row = [row]
+        for col, char2 in enumerate(word2, 1):
+            current_row.append(min(current_row[col - 1] + 1,
+                                   previous_row[col] + 1,
+                                   previous_row[col - 1] + (char1 != char2)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def reference_search(keys: list[str], term: str) -> list[tuple[str, int]]:
+    found = []
+    for key in keys:
+        if term in key and len(term) >= 4:
+            found.append((key, -1))
+            continue
+        distance = reference_distance(term, key)
+        if distance < 5:
+            found.append((key, distance))
+    return sorted(found, key=lambda match: match[1])[:5]
+
+
+def mutate(word: str, rng: random.Random) -> str:
+    chars = list(word)
+    for _ in range(rng.randint(0, 5)):
+        index = rng.randint(0, len(chars))
+        operation = rng.random()
+        if operation < 0.33 and len(chars) > 0:
+            chars[min(index, len(chars) - 1)] = rng.choice(string.ascii_lowercase)
+        elif operation < 0.66:
+            chars.insert(index, rng.choice(string.ascii_lowercase))
+        elif len(chars) > 0:
+            del chars[min(index, len(chars) - 1)]
+    return "".join(chars)
+
+
+@pytest.fixture(scope="module")
+def wiki_keys():
+    ItemWiki.setup_wiki()
+    return list(ItemWiki.wiki.keys())
+
+
+class TestWikiSearchIndex:
+
+    def test_bounded_distance(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            word1 = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 10)))
+            word2 = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 10)))
+            distance = reference_distance(word1, word2)
+            for bound in range(0, 8):
+                assert bounded_levenshtein_distance(word1, word2, bound) == min(distance, bound + 1)
+
+    def test_suggestions_match_full_scan(self, wiki_keys):
+        rng = random.Random(11)
+        terms = ["fine", "lantern", "spiritbane charm", "a", "", "xyz", "cutter", "knife"]
+        terms += [mutate(rng.choice(wiki_keys), rng) for _ in range(300)]
+        terms += [key[rng.randint(0, 3):rng.randint(4, len(key) + 1)] for key in rng.sample(wiki_keys, 30)]
+        for term in terms:
+            if term in ItemWiki.wiki:
+                continue
+            expected = [{"key": key, "distance": distance} for key, distance in reference_search(wiki_keys, term)]
+            assert ItemWiki.find_wiki_suggestions(term) == expected, term
+
+    def test_ties_keep_insertion_order(self):
+        index = WikiSearchIndex(["abcdx", "zzzzz", "abcdy", "abcdz"])
+        assert index.search("abcdq") == [("abcdx", 1), ("abcdy", 1), ("abcdz", 1)]
+        assert index.search("abcd") == [("abcdx", -1), ("abcdy", -1), ("abcdz", -1)]
+
+    def test_repeated_search_is_cached(self):
+        index = WikiSearchIndex(["lantern", "lanterns", "latern"])
+        first = index.search("lanter")
+        assert index.search("lanter") == first
+        assert len(index.cached_searches) == 1
+        index.add_key("lanterna")
+        assert len(index.cached_searches) == 0
+        assert ("lanterna", -1) in index.search("lanter")
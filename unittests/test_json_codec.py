@@ -0,0 +1,48 @@
+import json
+from json import JSONDecodeError
+
+import pytest
+
+from src import json_codec
+
+DATA = {"b": [1, 2.5, None, True], "a": {"name": "Éowyn", "tag": "eow"}}
+
+
+@pytest.fixture(params=["accelerated", "stdlib"])
+def codec(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif not json_codec.is_accelerated():
+        pytest.skip("orjson is not installed")
+    return json_codec
+
+
+class TestJsonCodec:
+
+    def test_round_trip(self, codec):
+        assert codec.loads(codec.dumps(DATA)) == DATA
+        assert codec.loads(codec.encode_file(DATA)) == DATA
+        assert codec.loads(codec.encode_file(DATA, compact=True)) == DATA
+
+    def test_sorted_and_compact(self, codec):
+        text = codec.dumps(DATA, sort_keys=True)
+        assert text.index('"a"') < text.index('"b"')
+        assert "\n" not in text and " " not in text.replace("Éowyn", "")
+        assert b"\n" not in codec.encode_file(DATA, compact=True)
+        assert b"\n" in codec.encode_file(DATA, compact=False)
+
+    def test_output_matches_stdlib(self, codec):
+        assert json.loads(codec.encode_file(DATA)) == DATA
+
+    def test_indented_file_format_does_not_depend_on_orjson(self, codec):
+        expected = json.dumps(DATA, sort_keys=True, indent=4, ensure_ascii=False).encode()
+        assert codec.encode_file(DATA, compact=False) == expected
+
+    def test_file_round_trip(self, codec, tmp_path):
+        file_path = str(tmp_path / "data.json")
+        codec.write_file(file_path, DATA)
+        assert codec.read_file(file_path) == DATA
+
+    def test_decode_error(self, codec):
+        with pytest.raises(JSONDecodeError):
+            codec.loads('{"characters": {')
@@ -22,7 +22,7 @@ def move_template_save_to_save_folder(template_name):
 
 
 def cleanup_template():
-    Undo.reset_undo()
+    Undo.purge_undo_history()
     live_manager.unload_all_files_and_users()
     save_manager.remove_save_file(unit_test_save_file_name)
     packg_vars.bot_admin_id = None